@@ -1,9 +1,8 @@
 import subprocess
 import glob       # used to find available parameter files
-import pandas as pd
-import yaml
 
 import user
+import registry
 import utilities as util
 import constants as c
 from system import *
@@ -24,12 +23,7 @@ def add_system_component(user, building, system, year):
     component_path = available_components[selection - 1]
 
     # create component
-    with open(component_path, "r") as stream:
-        component_file = yaml.safe_load(stream)
-
-    params = list(component_file.items())[0][1] # extract single value from dict
-    constructor =  globals()[params['type']] # create reference to component class
-    my_component = constructor(params)
+    my_component = load_component(component_path)
 
     # configure component (not yet implemented)
     my_component.configure(year)
@@ -54,7 +48,7 @@ def add_system_component(user, building, system, year):
     my_component.name = usr_input
 
     # add component to system obj
-    system.components[my_component.name] = my_component
+    system.add_component(my_component)
 
     # dont calc invest for system generation
     if year >= c.START_YEAR:
@@ -85,7 +79,7 @@ def delete_system_component(building, system):
         return system
 
     # remove component from system object
-    system.components.pop(existing_components[selection-1], None)
+    system.remove_component(existing_components[selection-1])
 
     print(f'Removed {existing_components[selection-1]} from system.')
 
@@ -96,22 +90,94 @@ def delete_system_component(building, system):
     system.write_yaml(system_path + '.yaml')
     return system
 
+def load_component(component_path, params = None):
+    ''' Create a component from a component template file, params overwrite the template parameters '''
+    template_params = registry.component_template(component_path)
+    template_params.update(params or {})
+    constructor =  globals()[template_params['type']] # create reference to component class
+    return constructor(template_params)
+
+def buy_component(user, system, template, year, params = None):
+    ''' Add a component to the system without user interaction.
+    Parameters
+    ----------
+    template: str
+        name of the component template in data/systems/components, e.g. 'HeatPumpAir'
+    params: dict
+        parameters overwriting the template parameters, e.g. {'name' : 'HeatPump', 'power_nom' : 9}
+    Returns
+    -------
+    bool
+        True if the component was purchased, False if the user can't afford it
+    '''
+    my_component = load_component(f'data/systems/components/{template}.yaml', params)
+    my_component.commission(year)
+
+    investment_cost = my_component.calc_investment_cost()
+    if not user.check_solvency(investment_cost):
+        return False
+    system.add_component(my_component)
+    user.action_economic_balance += investment_cost
+    return True
+
+# building components which can be insulated
+INSULATION_COMPONENTS = {'1' : 'facade', '2' : 'roof', '3' : 'upper_ceiling', '4' : 'groundplate'}
+# wood double-glazed (1), plastic insulating glass (2), alu/steel insulating glass (3)
+WINDOW_TYPES = {'1' : 'window_wood_double-glazed', '2' : 'window_plastic_iso', '3' : 'window_metal_iso'}
+
+def insulated_u_value(u_value, thickness):
+    ''' u-value [W/(m^2K)] after adding an insulation layer of the given thickness [cm], works element-wise on arrays '''
+    return 1 / (1 / u_value + thickness/100 /0.04) # [W/(m^2K)]
+
+def window_u_value(type):
+    ''' u-value [W/(m^2K)] of new windows of the given type, see WINDOW_TYPES '''
+    u_values = registry.u_values().iloc[-1] # use u-values of latest building age class
+    return u_values[WINDOW_TYPES[type]]
+
 def insulate(building, component, thickness):
-    components = {'1' : 'facade', '2' : 'roof', '3' : 'upper_ceiling', '4' : 'groundplate'}
+    components = INSULATION_COMPONENTS
     old_u_value = getattr(building, f'u_value_{components[component]}')
-    new_u_value = 1 / (1 / old_u_value + thickness/100 /0.04) # [W/(m^2K)]
+    new_u_value = insulated_u_value(old_u_value, thickness) # [W/(m^2K)]
     print(f"{components[component]} renovated: u-value {old_u_value:.2f} -> {new_u_value:.2f} W/(m^2K)")
     setattr(building, f"u_value_{components[component]}", new_u_value)
     #print(f"u_value_{components[component]} = {getattr(building, f'u_value_{components[component]}')}")
     
 def change_windows(building, type):
-    # wood double-glazed (1), plastic insulating glass (2), alu/steel insulating glass (3)
-    types = {'1' : 'window_wood_double-glazed', '2' : 'window_plastic_iso', '3' : 'window_metal_iso'}
-    u_values = pd.read_csv("data/components/u_values.csv", index_col = "bac").iloc[-1] # use u-values of latest building age class
-    new_u_value = u_values[types[type]]
+    new_u_value = window_u_value(type)
     print(f"Windows exchanged: u-value {building.u_value_window:.2} -> {new_u_value} W/(m^2K)")
     building.u_value_window = new_u_value
 
+def apply(action, params, user, building, system, year):
+    ''' Apply an action without user interaction (used for batch runs).
+    Parameters
+    ----------
+    action: str
+        'insulate'         : params component (facade, roof, upper_ceiling, groundplate), thickness [cm]
+        'change_windows'   : params type (wood double-glazed (1), plastic insulating glass (2), alu/steel insulating glass (3))
+        'add_component'    : params template (name of the component template), further params overwrite the template
+        'remove_component' : params name
+        'set_point'        : params temperature [degC]
+    Returns
+    -------
+    bool
+        False if the action could not be carried out (e.g. not enough money), else True
+    '''
+    params = dict(params or {})
+    if action == 'insulate':
+        codes = {name : code for code, name in INSULATION_COMPONENTS.items()}
+        insulate(building, codes.get(params['component'], str(params['component'])), params['thickness'])
+    elif action == 'change_windows':
+        change_windows(building, str(params['type']))
+    elif action == 'add_component':
+        return buy_component(user, system, params.pop('template'), year, params)
+    elif action == 'remove_component':
+        return system.remove_component(params['name']) is not None
+    elif action == 'set_point':
+        user.set_point_temperature = params['temperature']
+    else:
+        raise ValueError(f"Unknown action '{action}'")
+    return True
+
 def generate_system(user, building):
     '''
     Parameters
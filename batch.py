@@ -0,0 +1,108 @@
+''' Play many games without user interaction.
+
+The runs are defined in a manifest (csv) with one row per run and the columns
+    name, user, building, system, scenario, actions (optional: action plan .yaml, see data/actions/ExamplePlan.yaml)
+
+usage:
+    python batch.py data/batch/ExampleManifest.csv --workers 4 --output batch_results.csv
+    python batch.py data/batch/ExampleManifest.csv --hourly hourly_results    # hourly results of all runs, see results.HourlyStore
+'''
+import io
+import argparse
+import functools
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import yaml
+
+import utilities as util
+import registry
+import constants as c
+import user
+import building
+import system
+import scenario
+import game
+import results
+
+def load_action_plan(path):
+    ''' Read an action plan file: year -> list of (action, params) tuples, see actions.apply '''
+    if not isinstance(path, str) or path == '':
+        return {}
+    with open(path, "r") as stream:
+        plan_file = yaml.safe_load(stream) or {}
+
+    action_plan = {}
+    for year, entries in plan_file.items():
+        action_plan[int(year)] = [(entry.pop('action'), entry) for entry in entries]
+    return action_plan
+
+def summarize(name, annual_results, reason):
+    ''' Return the summary row of a finished game '''
+    played = annual_results.loc[c.START_YEAR:].dropna(subset = ['CO2 Budget [t]'])
+    last_year = played.index[-1] if len(played) > 0 else c.START_YEAR - 1
+    summary = {'name' : name,
+               'Win' : reason is None,
+               'Game over' : reason or '',
+               'Last year' : last_year,
+               'CO2 Budget [t]' : annual_results.at[last_year, 'CO2 Budget [t]'],
+               'Bank Deposit [Euro]' : annual_results.at[last_year, 'Bank Deposit [Euro]'],
+               'Comfort' : annual_results.at[last_year, 'Comfort']}
+    for key in ['CO2 emissions total [t]', 'Energy cost total [Euro]', 'Investment cost [Euro/a]']:
+        if key in played:
+            summary[f'Sum {key}'] = played[key].sum()
+    return summary
+
+def run_game(run, hourly_dir = None):
+    ''' Play one game of the manifest, returns the summary row
+    The hourly results are written to the hourly results store in hourly_dir (results.HourlyStore), if given.
+    '''
+    util.INTERACTIVE = False
+    try:
+        with contextlib.redirect_stdout(io.StringIO()): # the game messages are not needed in batch runs
+            me = user.User(run['user'])
+            my_building = building.Building(run['building'])
+            my_system = system.System(run['system'])
+            my_scenario = scenario.Eco2(run['scenario'])
+            hourly_store = results.HourlyStore(hourly_dir) if hourly_dir else None
+            annual_results, reason = game.play(me, my_building, my_system, my_scenario, load_action_plan(run.get('actions')),
+                                               hourly_store = hourly_store, run = run['name'])
+        return summarize(run['name'], annual_results, reason)
+    except Exception as exc:
+        return {'name' : run['name'], 'Error' : repr(exc)}
+
+def run_batch(manifest, workers = None, hourly_dir = None):
+    ''' Play all games of the manifest on a process pool.
+    Parameters
+    ----------
+    manifest: pandas df
+        one run per row, see module docstring
+    workers: int
+        number of worker processes (default: number of cpus)
+    hourly_dir: str
+        directory of the hourly results store, hourly results are not written if None
+    Returns
+    -------
+    pandas df
+        one summary row per run
+    '''
+    runs = manifest.to_dict('records')
+    registry.preload() # inherited by the worker processes
+    with ProcessPoolExecutor(max_workers = workers) as pool:
+        summaries = list(pool.map(functools.partial(run_game, hourly_dir = hourly_dir), runs))
+    return pd.DataFrame(summaries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = 'Play many games without user interaction.')
+    parser.add_argument('manifest', help = 'csv file with the columns name, user, building, system, scenario, actions')
+    parser.add_argument('--workers', type = int, default = None, help = 'number of worker processes')
+    parser.add_argument('--output', default = 'batch_results.csv', help = 'csv file for the summary of all runs')
+    parser.add_argument('--hourly', default = None, help = 'directory of the hourly results store (one file per run and year)')
+    args = parser.parse_args()
+
+    manifest = pd.read_csv(args.manifest, keep_default_na = False)
+    summary = run_batch(manifest, args.workers, args.hourly)
+    summary.to_csv(args.output, index = False)
+    print(summary.to_string())
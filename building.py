@@ -1,27 +1,58 @@
 
-import os
-import math
-from pathlib import Path
 import numpy as np
 import pandas as pd
 
-import yaml
-
-from ruamel.yaml import YAML # this version of pyyaml support dumping without loosing the comments in the .yaml file
-yaml = YAML()
-
-from pvlib import solarposition
-
 import utilities
+import config
+import registry
+import weather
 import constants as C
 
+# results of Building.calc per building fingerprint and set point, CALC_CACHE.info() reports hits and misses
+CALC_CACHE = utilities.LRUCache(maxsize = 64)
+
+# keys of the annual results of Building.calc
+ANNUAL_KEYS = ['Annual heat demand [kWh/a]', 'Transmission losses [kWh/a]', 'Transmission losses facade [kWh/a]', 'Transmission losses roof [kWh/a]',
+               'Transmission losses ground [kWh/a]', 'Transmission losses window [kWh/a]', 'Ventilation losses [kWh/a]',
+               'Infiltration losses [kWh/a]', 'Solar gains [kWh/a]']
+
+# Parameters for area estimation method according to IWU 2005
+F_BASEMENT = {'none' : 0, 'unheated' : 0, 'partly heated' : 0.5, 'fully heated' : 1} # partly heating factor basement
+F_ATTIC = {'none' : 0, 'unheated' : 0, 'partly heated' : 0.5, 'fully heated' : 1} # partly heating factor attic 
+F_DORMERS = {'none' : 1, 'existing' : 1.3} # correction factor for dormers
+P_GROUND = 1.33 # [m^2 ground area / m^2 heated area per story]
+P_ROOF = {'none' : 1.33, 'unheated' : 0, 'partly heated' : 0.75, 'fully heated' : 1.5} # [m^2 roof area / m^2 heated area per story]
+P_UPPER_CEILING = {'none' : 0, 'unheated' : 1.33, 'partly heated' : 0.67, 'fully heated' : 0} # [m^2 upper ceiling area / m^2 heated area per story]
+P_FACADE = {'compact' : 0.66, 'elongated' : 0.8} # [m^2 facade area / m^2 heated area per story]
+P_WINDOW = 0.2 # [m^2 window area /m^2 heated living area]
+Q_FACADE = {'detached' : 50, 'semi-detached' : 30, 'terraced' : 10} # [m^2] additional area per story
+H_STORY_NOM = 2.5 # [m] nominal story height
+
+# parameters describing the heating state of attic and basement (based on IWU f_attic / f_basement)
+X_BASEMENT = {'none' : 1, 'unheated' : 0, 'partly heated' : 0.5, 'fully heated' : 1} # transmission factor basement
+X_ATTIC = {'none' : 1, 'unheated' : 0, 'partly heated' : 0.5, 'fully heated' : 1} # transmission factor attic 
+
+# temperatures of unheated adjacent rooms according to DIN 12831-1 Table 4
+T_ADJ = {'<1918' : 12.0, '1919-1948' : 12.0, '1949-1957' : 12.0, '1958-1968' : 12.0, '1969-1978' : 12.0, '1979-1983' : 14.0, '1984-1994' : 14.0, '>1995' : 16.0} # [degC]
+
+# u-value table columns of the window types of the building files (type_window)
+WINDOW_CONSTRUCTIONS = {'0' : 'wood_single-glazed', '1' : 'wood_double-glazed', '2' : 'plastic_iso', '3' : 'metal_iso'}
+
+def lookup(table, key):
+    ''' Return table[key], element-wise for arrays of keys (e.g. building stocks, see stock.py) '''
+    if isinstance(key, str):
+        return table[key]
+    values = pd.Series(key).map(table)
+    if values.isna().any():
+        raise KeyError(f"Unknown keys {sorted(set(pd.Series(key)[values.isna()]))}")
+    return values.to_numpy(dtype = float)
+
 class Building:
     def __init__(self, building_path, verbose = False):
         ''' Initialize the building, read all parameters from the given '''
 
         # load building parameters from file
-        with open(building_path, "r") as stream:
-            building_params = yaml.load(stream)
+        building_params = config.Config(building_path)
         
         for key, value in building_params.items():
             if verbose == True:
@@ -33,47 +64,40 @@ class Building:
 
         # get u-values
         if self.use_default_u_values == 1: # yes
-            self.get_u_values(building_params, building_path)
+            self.get_u_values(building_params)
 
         # load location dependend weather data
         self.weather = self.get_weather()
 
 
+    def fingerprint(self):
+        ''' Fingerprint of all building parameters and the weather data, changes whenever calc() could give other results '''
+        params = {key : (value.tolist() if isinstance(value, np.ndarray) else value) for key, value in self.__dict__.items() if key != 'weather'}
+        return utilities.fingerprint(params, self.weather.attrs.get('source', id(self.weather)))
+
     def calc_geometry(self):
         '''This function calculates dimensions, areas and volume of the building
         according to the area-estimation-method by IWU 2005
         and own assumptions'''
-        # Parameters for area estimation method according to IWU 2005
-        f_basement = {'none' : 0, 'unheated' : 0, 'partly heated' : 0.5, 'fully heated' : 1} # partly heating factor basement
-        f_attic = {'none' : 0, 'unheated' : 0, 'partly heated' : 0.5, 'fully heated' : 1} # partly heating factor attic 
-        f_dormers = {'none' : 1, 'existing' : 1.3} # correction factor for dormers
-        p_ground = 1.33 # [m^2 ground area / m^2 heated area per story]
-        p_roof = {'none' : 1.33, 'unheated' : 0, 'partly heated' : 0.75, 'fully heated' : 1.5} # [m^2 roof area / m^2 heated area per story]
-        p_upper_ceilig = {'none' : 0, 'unheated' : 1.33, 'partly heated' : 0.67, 'fully heated' : 0} # [m^2 upper ceiling area / m^2 heated area per story]
-        p_facade = {'compact' : 0.66, 'elongated' : 0.8} # [m^2 facade area / m^2 heated area per story]
-        p_window = 0.2 # [m^2 window area /m^2 heated living area]
-        q_facade = {'detached' : 50, 'semi-detached' : 30, 'terraced' : 10} # [m^2] additional area per story
-        h_story_nom = 2.5 # [m] nominal story height
-
         # Calculations according to IWU
-        self.n_heated_stories = f_basement[self.basement] + self.stories + 0.75 * f_attic[self.attic] # arithmetic number of heated stories
+        self.n_heated_stories = lookup(F_BASEMENT, self.basement) + self.stories + 0.75 * lookup(F_ATTIC, self.attic) # arithmetic number of heated stories
         self.area_story_heated = self.area_floor / self.n_heated_stories # [m^2] heated area per story
-        self.area_ground = p_ground * self.area_story_heated # [m^2]
-        self.area_roof = f_dormers[self.dormers] * p_roof[self.attic] * self.area_story_heated # [m^2]
-        self.area_upper_ceiling = p_upper_ceilig[self.attic] * self.area_story_heated # [m^2]
-        self.area_facade_story = self.story_height / h_story_nom * (p_facade[self.shape] * self.area_story_heated + q_facade[self.neighbours]) #[m^2] facade area per story
-        self.area_window = p_window * self.area_floor # [m^2]
-        self.area_basement_wall = 0.5 * f_basement[self.basement] * self.area_facade_story # [m^2] basement wall areas agains soil / unheated basement
+        self.area_ground = P_GROUND * self.area_story_heated # [m^2]
+        self.area_roof = lookup(F_DORMERS, self.dormers) * lookup(P_ROOF, self.attic) * self.area_story_heated # [m^2]
+        self.area_upper_ceiling = lookup(P_UPPER_CEILING, self.attic) * self.area_story_heated # [m^2]
+        self.area_facade_story = self.story_height / H_STORY_NOM * (lookup(P_FACADE, self.shape) * self.area_story_heated + lookup(Q_FACADE, self.neighbours)) #[m^2] facade area per story
+        self.area_window = P_WINDOW * self.area_floor # [m^2]
+        self.area_basement_wall = 0.5 * lookup(F_BASEMENT, self.basement) * self.area_facade_story # [m^2] basement wall areas agains soil / unheated basement
         self.area_facade = self.n_heated_stories * self.area_facade_story - self.area_basement_wall - self.area_window # [m^2] total opaque facade area
-        #self.volume_heated = 4 * self.area_floor * self.story_height / h_story_nom # [m^3]
-        self.volume_air = self.area_floor * h_story_nom # [m^3]
+        #self.volume_heated = 4 * self.area_floor * self.story_height / H_STORY_NOM # [m^3]
+        self.volume_air = self.area_floor * H_STORY_NOM # [m^3]
 
         # own assumption
-        self.facade_orientations = np.array([0,90,180,-90]) + self.orientation_offset # [deg]
+        self.facade_orientations = weather.FACADE_ORIENTATIONS + self.orientation_offset # [deg]
 
-    def get_u_values(self, file, path):
-        u_values = pd.read_csv("data/components/u_values.csv", index_col = "bac").loc[self.bac]
-        window_types = {'0' : 'wood_single-glazed', '1' : 'wood_double-glazed', '2' : 'plastic_iso', '3' : 'metal_iso'}
+    def get_u_values(self, building_params):
+        ''' Set the default u-values of the building age class and constructions, and write them to the building file if they changed '''
+        u_values = registry.u_values().loc[self.bac]
         components = ['facade', 'roof', 'upper_ceiling', 'groundplate']
         for i, component in enumerate(components):
             construction_type = getattr(self, f"construction_{component}")
@@ -82,7 +106,7 @@ class Building:
             #print(f"u_value_{components[i]} = {u_value}")
             #print(getattr(self, f"u_value_{components[i]}"))
 
-        self.u_value_window = float(u_values[f'window_{window_types[str(self.type_window)]}'])
+        self.u_value_window = float(u_values[f'window_{WINDOW_CONSTRUCTIONS[str(self.type_window)]}'])
         #print(f"window = {self.u_value_window}")
 
         components.append('window')
@@ -90,93 +114,88 @@ class Building:
         for component in components:
             u_value = getattr(self, f"u_value_{component}")
             #print(f"{component} = {u_value}")
-            file[f"u_value_{component}"] = u_value
-        with open(path, 'w') as f:
-            yaml.dump(file, f)
+            building_params[f"u_value_{component}"] = u_value
+        building_params.save() # only if a u-value changed
         
         
     def get_weather(self):
-        # If there is no weather data for the given location in the input directory download it
-        latitude, longitude = self.location['latitude'], self.location['longitude']
-        tmy_filename = f"TMY_lat{latitude}_lon{longitude}.json"
-        #print(tmy_filename)
-        
-        weather_path = f"data/weather/{tmy_filename}" #Path.joinpath("data").joinpath("weather").joinpath(tmy_filename)
-        if not os.path.isfile(weather_path):
-            print(f'Downloading TMY data for latitude: {latitude}, longitude: {longitude}')
-            data = utilities.get_tmy_data(latitude=latitude, longitude=longitude)
-            utilities.save_tmy_data(data, weather_path)
-
-        df_weather = utilities.read_tmy_data(weather_path)
-
-        column_names = {
-            'T2m':'T_amb [degC]', # Ambient air temperature [°C]
-            'G(h)': 'G(h) [W/m^2]', # Global horizontal irradiance [W/m^2]
-            'Gb(n)': 'Gb(n) [W/m^2]', # Normal beam irradiance [W/m^2]
-            'Gd(h)': 'Gd(h) [W/m^2]', # Diffuse horizontal irradiance [W/m^2]
-        }
+        ''' Load the weather data of the location of the building, see weather.load_weather '''
+        return weather.load_weather(self.location, self.orientation_offset)
 
-        df_weather.rename(columns=column_names, inplace=True)
-
-        # calculate solar position with weather index and add to weather_df
-        solar_position = solarposition.get_solarposition(df_weather.index, latitude, longitude)
-        df_weather['solar_zenith [deg]'], df_weather['solar_azimuth [deg]'] = solar_position['zenith'], solar_position['azimuth']
-
-        # calculate solar irradiance on vertical planes
-        tilt_angle = 90 # [deg] vertical
-        for orientation in self.facade_orientations:
-            irrad_facade = utilities.calc_irradiance_on_tilted_plane(df_weather, tilt_angle, orientation)
-            df_weather[f'G(v,{orientation}deg) [W/(m^2)'] = irrad_facade
-
-        # calculate ground temperature dependent on ambient temperature
-        df_weather['T_ground [degC]'] = 4.918 * (0.095 * (df_weather['T_amb [degC]'] - 10.545)).apply(math.tanh) + 8.261 # [degC]
-
-        df_weather.reset_index(inplace = True)
-        # print(df_weather.head())
-
-        return df_weather
+    def derive_weather(self, weather_path, latitude, longitude):
+        ''' Read the raw TMY data and derive solar position, facade irradiance and ground temperature '''
+        return weather.derive_weather(weather_path, latitude, longitude, self.facade_orientations)
 
 
     def calc(self, user):
         '''calculate the annual heat demand of the building
+        The results are memoized (CALC_CACHE) and only calculated again if a building parameter,
+        the weather data or the set point temperature changed.
+        Returns
+        -------
+        tuple
+            dict of the annual results, pandas series of the hourly heat demand [W]
+        '''
+        key = utilities.fingerprint(self.fingerprint(), user.set_point_temperature)
+        annual_results, heatdemand = CALC_CACHE.get(key, lambda: self._calc(user.set_point_temperature))
+        # copies: the callers must not change the cached results (a shallow copy shares the buffer without copy on write)
+        return dict(annual_results), heatdemand.copy()
+
+    def loss_coefficients(self):
+        ''' Heat loss coefficients [W/K] of the building, grouped by the temperature the losses go to
+        Returns
+        -------
+        dict
+            ambient: ventilation, infiltration, facade, window, roof heated
+            ground: ground heated
+            adjacent (unheated rooms at T_adj [degC]): roof unheated, ground unheated
+            solar aperture [m^2]: effective window area for the solar gains
         '''
-        # parameters describing the heating state of attic and basement (based on IWU f_attic / f_basement)
-        x_basement = {'none' : 1, 'unheated' : 0, 'partly heated' : 0.5, 'fully heated' : 1} # transmission factor basement
-        x_attic = {'none' : 1, 'unheated' : 0, 'partly heated' : 0.5, 'fully heated' : 1} # transmission factor attic 
+        H_roof = self.u_value_roof * self.area_roof + self.u_value_upper_ceiling * self.area_upper_ceiling # [W/K]
+        H_ground = self.u_value_groundplate * (self.area_ground + self.area_basement_wall) # [W/K]
+        return {'ventilation' : self.ventilation_rate * self.volume_air * C.DENSITY_AIR, # [W/K]
+                'infiltration' : self.infiltration_rate * self.volume_air * C.DENSITY_AIR, # [W/K]
+                'facade' : self.u_value_facade * self.area_facade, # [W/K]
+                'window' : self.u_value_window * self.area_window, # [W/K]
+                # from heated space to exterior through building envelope
+                'roof heated' : lookup(X_ATTIC, self.attic) * H_roof, # [W/K]
+                # from heated space to exterior through unheated space
+                'roof unheated' : (1 - lookup(X_ATTIC, self.attic)) * H_roof, # [W/K]
+                # from heated space to ground
+                'ground heated' : lookup(X_BASEMENT, self.basement) * H_ground, # [W/K]
+                # from heated space to ground through unheated space
+                'ground unheated' : (1 - lookup(X_BASEMENT, self.basement)) * H_ground, # [W/K]
+                'T_adj [degC]' : lookup(T_ADJ, self.bac),
+                # solar gains assuming equally distributed window areas over orientations
+                'solar aperture [m^2]' : self.g_value_window * (1 - self.shading_window) * self.area_window/4}
+
+    def _calc(self, set_point_temperature):
+        H = self.loss_coefficients()
 
         # temperature differences
-        dT = user.set_point_temperature - self.weather['T_amb [degC]'] # [degC]  between ambient and indoor temperature
-        dT_ground = user.set_point_temperature - self.weather['T_ground [degC]'] # [degC] between ground and indoor temperature
-
-        # temperatures of unheated adjacent rooms according to DIN 12831-1 Table 4
-        bac = ['<1918', '1919-1948', '1949-1957', '1958-1968', '1969-1978', '1979-1983', '1984-1994', '>1995']
-        temp_adj_data = [12, 12, 12, 12, 12, 14, 14, 16]
-        temp_adj = pd.Series(temp_adj_data, index = bac)
-        
-        f_corr2ext = (user.set_point_temperature - temp_adj[self.bac]) / dT # [-] temperature correction factor against ambient
-        f_corr2ground = (user.set_point_temperature - temp_adj[self.bac]) / dT_ground # [-] temperature correction factor against ground
+        dT = set_point_temperature - self.weather['T_amb [degC]'] # [degC]  between ambient and indoor temperature
+        dT_ground = set_point_temperature - self.weather['T_ground [degC]'] # [degC] between ground and indoor temperature
+        # temperature difference to unheated adjacent rooms, corresponds to dT * f_corr2ext resp. dT_ground * f_corr2ground
+        # (temperature correction factors against ambient / ground), but stays defined if dT or dT_ground is zero
+        dT_adj = pd.Series(set_point_temperature - H['T_adj [degC]'], index = dT.index) # [degC]
     
-        ventilation_losses  = self.ventilation_rate * self.volume_air * C.DENSITY_AIR * dT # [W]
-        infiltration_losses  = self.infiltration_rate * self.volume_air * C.DENSITY_AIR * dT # [W]
+        ventilation_losses  = H['ventilation'] * dT # [W]
+        infiltration_losses  = H['infiltration'] * dT # [W]
 
         # Transmission losses
-        # from heated space to exterior through building envelope
-        transmission_losses_facade = self.u_value_facade * self.area_facade * dT # [W]
-        transmission_losses_window = self.u_value_window * self.area_window * dT # [W]
-        transmission_losses_roof_heated = x_attic[self.attic] * (self.u_value_roof * self.area_roof + self.u_value_upper_ceiling * self.area_upper_ceiling) * dT # [W]
-        # from heated space to exterior through unheated space
-        transmission_losses_roof_unheated = (1 - x_attic[self.attic]) * (self.u_value_roof * self.area_roof + self.u_value_upper_ceiling * self.area_upper_ceiling) * dT * f_corr2ext # [W]
-        # from heated space to ground
-        transmission_losses_ground_heated = self.u_value_groundplate * x_basement[self.basement] * (self.area_ground + self.area_basement_wall) * dT_ground # [W]
-        # from heated space to ground through unheated space
-        transmission_losses_ground_unheated = self.u_value_groundplate * (1 - x_basement[self.basement]) * (self.area_ground + self.area_basement_wall) * dT_ground * f_corr2ground # [W]
+        transmission_losses_facade = H['facade'] * dT # [W]
+        transmission_losses_window = H['window'] * dT # [W]
+        transmission_losses_roof_heated = H['roof heated'] * dT # [W]
+        transmission_losses_roof_unheated = H['roof unheated'] * dT_adj # [W]
+        transmission_losses_ground_heated = H['ground heated'] * dT_ground # [W]
+        transmission_losses_ground_unheated = H['ground unheated'] * dT_adj # [W]
         # total
         transmission_losses = transmission_losses_facade + transmission_losses_window + transmission_losses_roof_heated + transmission_losses_roof_unheated + transmission_losses_ground_heated + transmission_losses_ground_unheated # [W]
         
-        # solar gains assuming equally distributed window areas over orientations
+        # solar gains
         solar_gains = 0 # initialization
         for orientation in self.facade_orientations:
-            solar_gain = self.g_value_window * (1 - self.shading_window) * self.weather[f'G(v,{orientation}deg) [W/(m^2)'] * self.area_window/4 # [W]
+            solar_gain = H['solar aperture [m^2]'] * self.weather[f'G(v,{orientation}deg) [W/(m^2)'] # [W]
             solar_gains =+ solar_gain # [W]
 
         heatdemand = ventilation_losses + transmission_losses + infiltration_losses - solar_gains # [Wh] assuming hourly time steps
@@ -191,4 +210,4 @@ class Building:
                           'Infiltration losses [kWh/a]': infiltration_losses.sum()/1000,
                           'Solar gains [kWh/a]': solar_gains.sum()/1000}
 
-        return annual_results, heatdemand
\ No newline at end of file
+        return annual_results, heatdemand
@@ -0,0 +1,71 @@
+''' Parameter files (.yaml): parsed once per file content, written back only if a parameter changed.
+
+The parsed (round trip, i.e. with comments) parameters are cached as binary snapshot (pickle) keyed by the file hash,
+loading an unchanged file skips the yaml parser.
+'''
+import os
+import pickle
+from pathlib import Path
+
+from ruamel.yaml import YAML # this version of pyyaml support dumping without loosing the comments in the .yaml file
+yaml = YAML()
+
+import utilities
+
+CONFIG_CACHE_DIR = "data/cache/config" # parsed parameter files, can be deleted at any time
+
+def load(path):
+    ''' Return the parameters of the .yaml file (ruamel CommentedMap), from the snapshot of the file content if it exists '''
+    content = Path(path).read_bytes()
+    snapshot_path = Path(CONFIG_CACHE_DIR).joinpath(f"{Path(path).stem}_{utilities.bytes_hash(content)[:16]}.pickle")
+    if snapshot_path.is_file():
+        with open(snapshot_path, 'rb') as file:
+            return pickle.load(file)
+
+    params = yaml.load(content)
+    snapshot_path.parent.mkdir(parents = True, exist_ok = True)
+    tmp_path = snapshot_path.with_suffix(f'.{os.getpid()}.tmp')
+    with open(tmp_path, 'wb') as file:
+        pickle.dump(params, file)
+    tmp_path.replace(snapshot_path)
+    return params
+
+class Config:
+    ''' Parameters of a .yaml file with dirty tracking '''
+    def __init__(self, path):
+        self.path = Path(path)
+        self.params = load(path)
+        self.dirty = False
+
+    def __getitem__(self, key):
+        return self.params[key]
+
+    def __setitem__(self, key, value):
+        if key not in self.params or self.params[key] != value:
+            self.params[key] = value
+            self.dirty = True
+
+    def __contains__(self, key):
+        return key in self.params
+
+    def items(self):
+        return self.params.items()
+
+    def save(self, path = None):
+        ''' Write the parameters to the file (default: the file they were loaded from), only if they changed or to another file.
+        The file is replaced atomically, concurrent readers (e.g. batch workers) see either the old or the new file.
+        Returns
+        -------
+        bool
+            True if the file was written
+        '''
+        path = Path(path or self.path)
+        if not self.dirty and path == self.path:
+            return False
+        tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as file:
+            yaml.dump(self.params, file)
+        tmp_path.replace(path)
+        if path == self.path:
+            self.dirty = False
+        return True
@@ -1,47 +1,79 @@
+import numpy as np
+
 
 def select_controller(system):
-    available_components = []
-    for component, params in system.components.items():
-        # find gas boiler, note only the last component with type gasboiler will be used!
-        if params.type == 'GasBoiler':
-            available_components.append('GasBoiler')
-        if params.type == 'Photovoltaic':
-            available_components.append('Photovoltaic')
-        if params.type == 'HeatPumpAir':
-            available_components.append('HeatPumpAir')
-
-        if 'Photovoltaic' in available_components:
-            controller = Ctrl_PV()
-        if 'GasBoiler' in available_components:
-            controller = Ctrl_GasBoiler()
-        if 'HeatPumpAir' in available_components:
-            controller = Ctrl_HeatPumpAir()
-        if 'Photovoltaic' in available_components and 'GasBoiler' in available_components:
-            controller = Ctrl_GasBoiler_PV()
-            break
-
-    return controller
+    available_components = [component.type for component in system.components.values()]
+
+    if 'Photovoltaic' in available_components and 'GasBoiler' in available_components:
+        return Ctrl_GasBoiler_PV(system)
+    if 'HeatPumpAir' in available_components:
+        return Ctrl_HeatPumpAir(system)
+    if 'GasBoiler' in available_components:
+        return Ctrl_GasBoiler(system)
+    if 'Photovoltaic' in available_components:
+        return Ctrl_PV(system)
+    raise ValueError(f"No controller available for a system with the components {available_components}")
+
+class DispatchPlan:
+    ''' Controller strategy, component references and result keys of a system.
+    The plan is compiled once per change of the system components (see System.dispatch_plan),
+    the simulation only calls the plan.
+    '''
+    def __init__(self, system):
+        self.revision = system.revision
+        self.controller = select_controller(system)
+        self.outputs = {'system' : self.controller.outputs,
+                        'ecology' : system.emission_outputs(),
+                        'economy' : system.cost_outputs()}
+
+    def __call__(self, Qdot_heat_load, P_el_hh, disturbances):
+        return self.controller.control(Qdot_heat_load, P_el_hh, disturbances)
+
+def find_component(system, component_type):
+    ''' Return the last component of the given type in the system (None if there is no such component) '''
+    found = None
+    for component in system.components.values():
+        if component.type == component_type:
+            found = component
+    return found
+
+def cover_heat_load(power_nom, Qdot_heat_load):
+    ''' Split the heat load into the part covered by a generator of the given nominal power and the uncovered rest.
+    Works on scalars and on whole-year arrays alike.
+    Parameters
+    ----------
+    power_nom : float
+        nominal power of the heat generator [W]
+    Qdot_heat_load : float or numpy array
+        heat load [W]
+    Returns
+    -------
+    tuple
+        actual heat production [W], uncovered heat [W]
+    '''
+    # comparisons with NaN (undefined heat load) evaluate to False, thus NaN is passed on as actual heat production
+    overload = power_nom < Qdot_heat_load
+    Qdot_heat_actual = np.where(overload, power_nom, Qdot_heat_load)
+    Qdot_heat_uncovered = np.where(overload, Qdot_heat_load - power_nom, 0)
+    return Qdot_heat_actual, Qdot_heat_uncovered
 
 
 class Ctrl_GasBoiler():
-    
-    def control(self, Qdot_heat_load, P_el_hh, disturbances, system):
-        # HEAT BALANCE
+    def __init__(self, system):
         # find gas boiler, note only the last component with type gasboiler will be used!
-        for component, params in system.components.items():
-            if params.type == 'GasBoiler':
-                gasboiler = system.components[component]
+        self.gasboiler = find_component(system, 'GasBoiler')
+        # keys of the results returned by control()
+        self.outputs = [self.gasboiler.heat, "Uncovered heat [Wh]", self.gasboiler.energy, "Electricity grid household [Wh]"]
+
+    def control(self, Qdot_heat_load, P_el_hh, disturbances):
+        # HEAT BALANCE
+        gasboiler = self.gasboiler
 
         # find nominal power of gas boiler
         power_nom = gasboiler.power_nom * 1000 # [W]
 
         # check if heat load can be covered
-        if power_nom < Qdot_heat_load:
-            Qdot_heat_actual = power_nom
-            Qdot_heat_uncovered = Qdot_heat_load - Qdot_heat_actual
-        else:
-            Qdot_heat_actual = Qdot_heat_load
-            Qdot_heat_uncovered = 0
+        Qdot_heat_actual, Qdot_heat_uncovered = cover_heat_load(power_nom, Qdot_heat_load)
 
         # write results to dict
         res = {gasboiler.heat : Qdot_heat_actual, "Uncovered heat [Wh]" : Qdot_heat_uncovered}
@@ -60,7 +92,13 @@ class Ctrl_GasBoiler():
         return res
 
 class Ctrl_PV():
-    def control(self, Qdot_heat_load, P_el_hh, disturbances, system):
+    def __init__(self, system):
+        # find PV system, note only the last component with type Photovoltaic will be used!
+        self.pv_system = find_component(system, 'Photovoltaic')
+        # keys of the results returned by control()
+        self.outputs = ["Uncovered heat [Wh]", self.pv_system.energy, "Electricity PV feedin [Wh]", "Electricity grid household [Wh]"]
+
+    def control(self, Qdot_heat_load, P_el_hh, disturbances):
         # HEAT BALANCE
         Qdot_heat_uncovered = Qdot_heat_load
         # write results to dict
@@ -70,44 +108,39 @@ class Ctrl_PV():
         # T_comfort_dev = bldg.calc_comfort_dev(Qdot_heat_actual)
 
         # ENERGY
-        # find PV system, note only the last component with type Photovoltaic will be used!
-        for component, params in system.components.items():
-            if params.type == 'Photovoltaic':
-                pv_system = system.components[component]
+        pv_system = self.pv_system
 
-        P_el_pv_prod = pv_system.calc_energy(disturbances) 
+        P_el_pv_prod = np.asarray(pv_system.calc_energy(disturbances))
         res[pv_system.energy] = P_el_pv_prod
 
         # ELECTRICITY BALANCE
         P_el_grid_hh = P_el_hh - P_el_pv_prod
-        P_pv_feedin = 0
-        if P_el_grid_hh < 0:
-            P_el_pv_prod_excess = -P_el_grid_hh
-            P_pv_feedin = P_el_pv_prod_excess
-            P_el_grid_hh = 0
+        # excess PV production is fed into the grid
+        P_pv_feedin = np.where(P_el_grid_hh < 0, -P_el_grid_hh, 0)
+        P_el_grid_hh = np.where(P_el_grid_hh < 0, 0, P_el_grid_hh)
         res["Electricity PV feedin [Wh]"] = P_pv_feedin
         res["Electricity grid household [Wh]"] = P_el_grid_hh
 
         return res
 
 class Ctrl_GasBoiler_PV():
-    def control(self, Qdot_heat_load, P_el_hh, disturbances, system):
+    def __init__(self, system):
+        # find gas boiler and PV system, note only the last component of each type will be used!
+        self.gasboiler = find_component(system, 'GasBoiler')
+        self.pv_system = find_component(system, 'Photovoltaic')
+        # keys of the results returned by control()
+        self.outputs = [self.gasboiler.heat, "Uncovered heat [Wh]", self.gasboiler.energy, self.pv_system.energy,
+                        "Electricity PV feedin [Wh]", "Electricity grid household [Wh]"]
+
+    def control(self, Qdot_heat_load, P_el_hh, disturbances):
         # HEAT BALANCE
-        # find gas boiler, note only the last component with type gasboiler will be used!
-        for component, params in system.components.items():
-            if params.type == 'GasBoiler':
-                gasboiler = system.components[component]
+        gasboiler = self.gasboiler
 
         # find nominal power of gas boiler
         power_nom = gasboiler.power_nom * 1000 # [W]
 
         # check if heat load can be covered
-        if power_nom < Qdot_heat_load:
-            Qdot_heat_actual = power_nom
-            Qdot_heat_uncovered = Qdot_heat_load - Qdot_heat_actual
-        else:
-            Qdot_heat_actual = Qdot_heat_load
-            Qdot_heat_uncovered = 0
+        Qdot_heat_actual, Qdot_heat_uncovered = cover_heat_load(power_nom, Qdot_heat_load)
 
         # !ToDo calc comfort deviation from uncovered heat
         # T_comfort_dev = bldg.calc_comfort_dev(Qdot_heat_actual)
@@ -119,50 +152,42 @@ class Ctrl_GasBoiler_PV():
         used_gas = gasboiler.calc_energy(Qdot_heat_actual) 
         res[gasboiler.energy] = used_gas
 
-        # find PV system, note only the last component with type Photovoltaic will be used!
-        for component, params in system.components.items():
-            if params.type == 'Photovoltaic':
-                pv_system = system.components[component]
-
-        P_el_pv_prod = pv_system.calc_energy(disturbances) 
+        pv_system = self.pv_system
+        P_el_pv_prod = np.asarray(pv_system.calc_energy(disturbances))
         res[pv_system.energy] = P_el_pv_prod
 
         # ELECTRICITY BALANCE
         P_el_grid_hh = P_el_hh - P_el_pv_prod
-        P_pv_feedin = 0
-        if P_el_grid_hh < 0:
-            P_el_pv_prod_excess = -P_el_grid_hh
-            P_pv_feedin = P_el_pv_prod_excess
-            P_el_grid_hh = 0
+        # excess PV production is fed into the grid
+        P_pv_feedin = np.where(P_el_grid_hh < 0, -P_el_grid_hh, 0)
+        P_el_grid_hh = np.where(P_el_grid_hh < 0, 0, P_el_grid_hh)
         res["Electricity PV feedin [Wh]"] = P_pv_feedin
         res["Electricity grid household [Wh]"] = P_el_grid_hh
 
         return res
 
 class Ctrl_HeatPumpAir():
-    def control(self, Qdot_heat_load, P_el_hh, disturbances, system):
-        # HEAT BALANCE
+    def __init__(self, system):
         # find heatpump, note only the last component with type heatpumpair will be used!
-        for component, params in system.components.items():
-            if params.type == 'HeatPumpAir':
-                heatpump = system.components[component]
+        self.heatpump = find_component(system, 'HeatPumpAir')
+        # keys of the results returned by control()
+        self.outputs = [self.heatpump.heat, "Uncovered heat [Wh]", self.heatpump.energy, "Electricity grid household [Wh]"]
+
+    def control(self, Qdot_heat_load, P_el_hh, disturbances):
+        # HEAT BALANCE
+        heatpump = self.heatpump
 
         # find nominal power of gas boiler
         power_nom = heatpump.power_nom * 1000 # [W]
 
         # check if heat load can be covered
-        if power_nom < Qdot_heat_load:
-            Qdot_heat_actual = power_nom
-            Qdot_heat_uncovered = Qdot_heat_load - Qdot_heat_actual
-        else:
-            Qdot_heat_actual = Qdot_heat_load
-            Qdot_heat_uncovered = 0
+        Qdot_heat_actual, Qdot_heat_uncovered = cover_heat_load(power_nom, Qdot_heat_load)
 
         res = {heatpump.heat : Qdot_heat_actual, "Uncovered heat [Wh]" : Qdot_heat_uncovered}
 
         # ELECTRICITY BALANCE
         # Heatpump
-        used_el = heatpump.calc_energy(Qdot_heat_load, disturbances)
+        used_el = np.asarray(heatpump.calc_energy(Qdot_heat_actual, disturbances)) # only the heat produced
         res[heatpump.energy] = used_el
         # Household
         P_el_grid_hh = P_el_hh
@@ -4,6 +4,9 @@ import cowsay
 import utilities as util
 # These events can happen randomly during the obersvation period.
 
+# random number generator of the events, seed it for reproducible event sequences
+rng = random.Random()
+
 # add new event (the function name) to this list to register it.
 
 events = ['nothing', 'inherit', 'nothing', 'sarscov', 'nothing', 'saharaSand', 'nothing', 'unemployed',
@@ -18,7 +21,7 @@ def nothing(year, user, building, system, event_states):
 
 def inherit(year, user, building, system, event_states):
     # This event adds money to your bank account
-    heritage = random.randint(5,50) * user.monthly_sallary # [Euro] 
+    heritage = rng.randint(5,50) * user.monthly_sallary # [Euro] 
     user.event_economic_balance += heritage
     util.clear_console()
     cowsay.cow(f"You inherit! Added {heritage} € to your bank account.")
@@ -26,14 +29,14 @@ def inherit(year, user, building, system, event_states):
 def sarscov(year, user, building, system, event_states):
     # This event increases the ventilation rate of your building
     delta_ventilation = 0.2
-    duration = random.randint(1,3)
+    duration = rng.randint(1,3)
 
     # check if ventilation rate has to be reset
     if 'sarscov' in event_states:
         if year == event_states['sarscov']:
             building.ventilation_rate = building.ventilation_rate - delta_ventilation
             print(f"Yeey, the pandemic is over. Resetting ventilation rate back to {building.ventilation_rate:.2} 1/h.")
-            input('    ENTER to continue.')
+            util.pause()
             event_states.pop('sarscov', None) # remove event from event_states dictionary
 
         return
@@ -53,7 +56,7 @@ def saharaSand(year, user, building, system, event_states):
         if year == event_states['saharaSand']:
             system.components['Photovoltaic'].efficiency_param += delta_efficiency
             print(f"Your PV modules are clean again. Resetting efficiency back to {system.components['Photovoltaic'].efficiency_param}.")
-            input('    ENTER to continue.')
+            util.pause()
             event_states.pop('saharaSand', None) # remove event from event_states dictionary
         return
 
@@ -70,13 +73,13 @@ def unemployed(year, user, building, system, event_states):
         if year == event_states['unemployed']:
             user.monthly_sallary = user.monthly_sallary * (1 + benefit_rate)
             print(f"Congratulations! You found a new job. Your monthly sallary is {user.monthly_sallary:.2f} euro.")
-            input('    ENTER to continue.')
+            util.pause()
             event_states.pop('unemployed', None) # remove event from event_states dictionary
         return
 
     print(f"Unfortunately you've lost your job. You receive unemployment benefits in the amount of {(benefit_rate * user.monthly_sallary):.2f} euro/month.")
     user.monthly_sallary = user.monthly_sallary * benefit_rate
-    event_states['unemployed'] = year + random.randint(1,2)
+    event_states['unemployed'] = year + rng.randint(1,2)
     
 
 def promotion(year, user, building, system, event_states):
@@ -84,7 +87,7 @@ def promotion(year, user, building, system, event_states):
 
     # check if user is not unemployed in the simulated year
     if 'unemployed' not in event_states:
-        promotion_factor = 1 + random.randint(5,25)/100
+        promotion_factor = 1 + rng.randint(5,25)/100
         print(f"Congratulations! You've been promoted. Your new monthly sallary increased from {user.monthly_sallary:.2f} euro to {user.monthly_sallary * promotion_factor:.2f} euro.")
         user.monthly_sallary = user.monthly_sallary * promotion_factor
 
@@ -109,13 +112,13 @@ def gasBoilerAging(year, user, building, system, event_states):
             system.components['GasBoiler'].efficiency += delta_efficiency
             user.event_economic_balance -=  cost # [Euro]
             print(f"A mechanic repairs your gas boiler for {cost} euro. Resetting efficiency back to {system.components['GasBoiler'].efficiency}.")
-            input('    ENTER to continue.')
+            util.pause()
             event_states.pop('gasBoilerAging', None) # remove event from event_states dictionary
         return
 
     print(f"Uh-oh! The efficiency of the gas boiler drops from {system.components['GasBoiler'].efficiency} to {system.components['GasBoiler'].efficiency-delta_efficiency:.2} due to aging effects.")
     system.components['GasBoiler'].efficiency -= delta_efficiency
-    event_states['gasBoilerAging'] = year + random.randint(1,2)
+    event_states['gasBoilerAging'] = year + rng.randint(1,2)
 
 '''
 def balconyPV(year, user, building, system, event_states):
@@ -136,7 +139,7 @@ def coldYear(year, user, building, system, event_states):
             user.comfort_temperature = user.comfort_temperature - temp_amb_drop
             user.set_point_temperature = user.set_point_temperature - temp_amb_drop
             print(f"Ambient temperature back at normal level.")
-            input('    ENTER to continue.')
+            util.pause()
             event_states.pop('coldYear', None) # remove event from event_states dictionary
         return
 
@@ -157,11 +160,11 @@ def homeOffice(year, user, building, system, event_states):
             user.set_point_temperature = user.set_point_temperature - delta_temp
             user.annual_el_demand = user.annual_el_demand - delta_el
             print(f"Back to office. Annual electricity demand and set point temperature back to {user.annual_el_demand} kWh and {user.comfort_temperature} degC.")
-            input('    ENTER to continue.')
+            util.pause()
             event_states.pop('homeOffice', None) # remove event from event_states dictionary
         return
     
-    duration = random.randint(1,3)
+    duration = rng.randint(1,3)
     print(f"You work in homeoffice for {duration} years. Your annual electricity demand such as comfort and set point temperature of your heating system increase: {user.annual_el_demand} kWh -> {user.annual_el_demand + delta_el} kWh and {user.comfort_temperature} degC -> {user.comfort_temperature + delta_temp} degC")
     user.comfort_temperature = user.comfort_temperature + delta_temp
     user.set_point_temperature = user.set_point_temperature + delta_temp
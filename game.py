@@ -0,0 +1,128 @@
+''' Game logic shared by the interactive game (main.py) and runs without user interaction (batch.py) '''
+
+import constants as c
+import gamelog
+import actions
+import events
+import simulator
+import results
+
+GAME_LOG_KEYS = ['CO2 Budget [t]', 'Bank Deposit [Euro]', 'Comfort']
+
+def init_annual_results(scenario, user, stream_path = None, system = None):
+    ''' Create the annual results ledger (results.AnnualLedger), holding the initial game state in the year before the start year
+    Parameters
+    ----------
+    stream_path: str
+        csv file the annual results are written to year by year, not written if None
+    system: system.System
+        system of the game, its results are declared in addition to those of all component combinations (optional)
+    '''
+    initial_year = c.START_YEAR - 1 # initialization in year 2021
+    annual_results = results.AnnualLedger(GAME_LOG_KEYS + simulator.declared_annual_keys(system), range(initial_year, c.END_YEAR + 1),
+                                          stream_path = stream_path)
+    annual_results.append(initial_year, {'CO2 Budget [t]' : scenario.CO2_budget,
+                                         'Bank Deposit [Euro]' : user.bank_deposit,
+                                         'Comfort' : " =) =) =)"})
+    return annual_results
+
+def random_event(year, user, building, system, event_states):
+    ''' Reset expired events and draw a random event (events.rng), returns the name of the event
+    The events change the user, building and system objects in place.
+    '''
+    # check if we have to reset one of the events
+    for key in list(event_states): # list enforces a copy of dict - required to avoid removing changing size of dict while iterating over it
+        getattr(events, key)(year, user, building, system, event_states)
+
+    event_status = -1
+    while event_status == -1:
+        # draw random event, events which can't happen (e.g. no PV system) return -1
+        event = events.rng.choice(events.events)
+        event_status = getattr(events, event)(year, user, building, system, event_states)
+    return event
+
+def simulate_year(my_simulator, year, annual_results, hourly_store = None, run = None):
+    ''' Simulate one year, update the bank deposit of the user and append the results to the annual results ledger
+    Parameters
+    ----------
+    hourly_store: results.HourlyStore
+        store the hourly results of the year are written to (as run), only annual results if None
+    Returns
+    -------
+    tuple
+        dict of the annual building/system/ecology/economy/comfort results, game log dict
+    '''
+    # !ToDo use actual room temperature for calculation of comfort deviation -> return hourly values
+    if hourly_store is None:
+        annual = my_simulator.simulate_year_annual(year)
+    else:
+        annual, results_year = my_simulator.simulate_year_hourly(year)
+        hourly_store.write(run, year, results_year)
+
+    # calculate game log
+    game_log = gamelog.calculate(annual['ecology'], annual['economy'], annual['comfort'], annual_results.row(year-1))
+
+    # update user
+    my_simulator.user.bank_deposit = game_log['Bank Deposit [Euro]']
+
+    # append game_log and annual building/sytem/ecologic/economic results to the annual results ledger
+    annual_results.append(year, game_log, *annual.values())
+
+    return annual, game_log
+
+def game_over(game_log):
+    ''' Return the reason why the game is lost, None if the game goes on '''
+    if game_log["CO2 Budget [t]"] < 0:
+        return 'CO2 budget exceeded!'
+    if game_log["Bank Deposit [Euro]"] < 0:
+        return 'Bank account empty!'
+    if game_log['Comfort'] == "":
+        return 'Comfort violated!'
+    return None
+
+def play(user, building, system, scenario, action_plan = None, event_seed = None, results_path = None, hourly_store = None, run = None, policy = None):
+    ''' Play a complete game from START_YEAR to END_YEAR without user interaction.
+    Parameters
+    ----------
+    action_plan: dict
+        year -> list of (action, params) tuples, see actions.apply.
+        If an action fails (e.g. not enough money), the remaining actions of the year are skipped.
+    event_seed: int
+        seed of the random events, no events happen if None
+    results_path: str
+        csv file the annual results are streamed to, not written if None
+    hourly_store: results.HourlyStore
+        store the hourly results of every year are written to (as run), not written if None
+    policy: policies.Policy
+        player deciding further actions of every year from the game state (after the actions of the action plan)
+    Returns
+    -------
+    tuple
+        annual_results df, game over reason (None if the game was won)
+    '''
+    action_plan = action_plan or {}
+    annual_results = init_annual_results(scenario, user, results_path, system)
+    my_simulator = simulator.Simulator(user, building, system, scenario)
+    event_states = {}
+    if event_seed is not None:
+        events.rng.seed(event_seed)
+
+    for year in range(c.START_YEAR, c.END_YEAR + 1):
+        planned = list(action_plan.get(year, []))
+        if policy is not None:
+            planned += policy(year, annual_results.row(year - 1), user, building, system)
+        for action, params in planned:
+            # the remaining actions of the year depend on the failed one (e.g. removing the old heating system)
+            if not actions.apply(action, params, user, building, system, year):
+                break
+
+        if event_seed is not None:
+            random_event(year, user, building, system, event_states)
+
+        annual, game_log = simulate_year(my_simulator, year, annual_results, hourly_store, run)
+
+        reason = game_over(game_log)
+        if reason is not None:
+            return annual_results.finalize(), reason
+
+    return annual_results.finalize(), None
@@ -0,0 +1,109 @@
+''' Annual heat demand queries without an hourly pass over the weather data.
+
+With the weather data fixed, the hourly heat demand of Building.calc is linear in the set point and the heat loss coefficients:
+    heatdemand(t) = H_amb * (T_set - T_amb(t)) + H_ground * (T_set - T_ground(t)) + H_adj * (T_set - T_adj) - A_sol * G(t)
+so the annual sums follow from the annual sums of the weather data (O(1) per query).
+The hours with a positive heat demand are the hours with a "weather load" w(t) = T_amb(t) + H_ground/H_amb * T_ground(t) + A_sol/H_amb * G(t)
+below a threshold, the sums over these hours follow from prefix sums over the sorted weather loads (O(log n) per query).
+
+usage:
+    index = heatindex.HeatDemandIndex.of(my_building)
+    index.annual_results(my_building.loss_coefficients(), 20, clip = True)
+'''
+import numpy as np
+
+import utilities
+
+# heat demand indexes per weather data, see HeatDemandIndex.of
+INDEX_CACHE = utilities.LRUCache(maxsize = 8)
+
+AMBIENT_TERMS = ['ventilation', 'infiltration', 'facade', 'window', 'roof heated']
+ADJACENT_TERMS = ['roof unheated', 'ground unheated']
+
+class HeatDemandIndex:
+    def __init__(self, weather, solar_column):
+        ''' Annual sums of the weather data, built once per weather data
+        Parameters
+        ----------
+        weather: pandas df
+            weather data of the building, see Building.get_weather
+        solar_column: str
+            column of the irradiance on the windows [W/m^2]
+        '''
+        self.n_hours = len(weather)
+        self.hourly = {'T_amb' : weather['T_amb [degC]'].to_numpy(dtype = float),
+                       'T_ground' : weather['T_ground [degC]'].to_numpy(dtype = float),
+                       'G' : weather[solar_column].to_numpy(dtype = float)}
+        self.sums = {key : values.sum() for key, values in self.hourly.items()}
+        # sorted weather loads and prefix sums per direction of the loss coefficients
+        self.prefix_cache = utilities.LRUCache(maxsize = 32)
+
+    @classmethod
+    def of(cls, building):
+        ''' Return the (cached) index of the weather data of the building '''
+        # Building.calc only counts the windows of the last facade orientation (solar_gains =+ solar_gain)
+        solar_column = f'G(v,{building.facade_orientations[-1]}deg) [W/(m^2)'
+        key = (building.weather.attrs.get('source', id(building.weather)), solar_column)
+        return INDEX_CACHE.get(key, lambda: cls(building.weather, solar_column))
+
+    def prefix_sums(self, r_ground, r_solar):
+        ''' Sorted weather loads w(t) = T_amb + r_ground * T_ground + r_solar * G and the prefix sums of T_amb, T_ground and G in this order '''
+        def compute():
+            load = self.hourly['T_amb'] + r_ground * self.hourly['T_ground'] + r_solar * self.hourly['G']
+            order = np.argsort(load, kind = 'stable')
+            prefix = {key : np.concatenate(([0.0], np.cumsum(values[order]))) for key, values in self.hourly.items()}
+            return load[order], prefix
+        return self.prefix_cache.get((r_ground, r_solar), compute)
+
+    def sums_over_hours(self, H, set_point_temperature, clip):
+        ''' Number of hours and sums of T_amb, T_ground and G over all hours, or over the hours with a positive heat demand (clip) '''
+        if not clip:
+            return self.n_hours, self.sums
+        H_amb = sum(H[term] for term in AMBIENT_TERMS) # [W/K]
+        if H_amb <= 0:
+            raise ValueError("Clipped heat demand queries need a positive heat loss coefficient against the ambient air")
+        H_adj = sum(H[term] for term in ADJACENT_TERMS) # [W/K]
+        H_total = H_amb + H['ground heated'] + H_adj # [W/K]
+        loads, prefix = self.prefix_sums(H['ground heated'] / H_amb, H['solar aperture [m^2]'] / H_amb)
+        # heatdemand(t) = H_amb * (threshold - w(t)) is positive below the threshold
+        threshold = (H_total * set_point_temperature - H_adj * H['T_adj [degC]']) / H_amb
+        n = int(np.searchsorted(loads, threshold, side = 'left'))
+        return n, {key : values[n] for key, values in prefix.items()}
+
+    def annual_results(self, H, set_point_temperature, clip = False):
+        ''' Annual heat demand and losses like Building.calc, without an hourly pass
+        Parameters
+        ----------
+        H: dict
+            heat loss coefficients, see Building.loss_coefficients
+        clip: bool
+            only sum the hours with a positive heat demand
+        Returns
+        -------
+        dict
+            annual results, same keys as Building.calc
+        '''
+        n, sums = self.sums_over_hours(H, set_point_temperature, clip)
+        dT = n * set_point_temperature - sums['T_amb'] # [Kh]
+        dT_ground = n * set_point_temperature - sums['T_ground'] # [Kh]
+        dT_adj = n * (set_point_temperature - H['T_adj [degC]']) # [Kh]
+
+        losses = {term : H[term] * dT for term in AMBIENT_TERMS} # [Wh/a]
+        losses['ground heated'] = H['ground heated'] * dT_ground # [Wh/a]
+        losses.update({term : H[term] * dT_adj for term in ADJACENT_TERMS}) # [Wh/a]
+        transmission_losses = sum(value for term, value in losses.items() if term not in ['ventilation', 'infiltration']) # [Wh/a]
+        solar_gains = H['solar aperture [m^2]'] * sums['G'] # [Wh/a]
+
+        return {'Annual heat demand [kWh/a]': (losses['ventilation'] + transmission_losses + losses['infiltration'] - solar_gains)/1000,
+                'Transmission losses [kWh/a]': transmission_losses/1000,
+                'Transmission losses facade [kWh/a]': losses['facade']/1000,
+                'Transmission losses roof [kWh/a]': (losses['roof heated'] + losses['roof unheated'])/1000,
+                'Transmission losses ground [kWh/a]': (losses['ground heated'] + losses['ground unheated'])/1000,
+                'Transmission losses window [kWh/a]': losses['window']/1000,
+                'Ventilation losses [kWh/a]': losses['ventilation']/1000,
+                'Infiltration losses [kWh/a]': losses['infiltration']/1000,
+                'Solar gains [kWh/a]': solar_gains/1000}
+
+    def heat_demand(self, H, set_point_temperature, clip = False):
+        ''' Annual heat demand [kWh/a], see annual_results '''
+        return self.annual_results(H, set_point_temperature, clip)['Annual heat demand [kWh/a]']
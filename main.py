@@ -1,27 +1,19 @@
 # modules from pythons std library
-import random     # used to draw a random event
 import glob       # used to find available parameter files
-import shutil     # used to create copies of the default parameter files
 import subprocess # used to run the nano texteditor to edit config files from the cmd prompt
 from pathlib import Path
 
-# these modules have to be installed (e.g. with pip)
-import numpy as np
-import pandas as pd
-from ruamel.yaml import YAML # this version of pyyaml support dumping without loosing the comments in the .yaml file
-yaml = YAML()
-
 # modules you find in this directory
 import utilities as util
+import config
 import constants as c
 import user
 import building
 import system
 import actions
-import events
 import simulator
 import scenario
-import gamelog
+import game
 
 util.clear_console()
 
@@ -36,9 +28,6 @@ my_scenario = scenario.Eco2("data/eco2_paths/Scenario.csv")
 #print(my_scenario.eco2_path.head())
 selection = input(f"\n    ENTER to continue: ")
 util.clear_console()
-# initalize results dataframe
-initial_year = c.START_YEAR - 1 # initialization in year 2021
-annual_results = pd.DataFrame(index = my_scenario.eco2_path.index)
 
 # choose user
 print("Choose a character or create a new one (0): ")
@@ -53,14 +42,10 @@ selection = int(input(f''))
 if selection == 0:
     user_name = input("Give your new character a name: ")
     new_user_path = Path(f'data/users/{user_name}.yaml')
-    # create a copy of the default user
-    shutil.copy(Path('data/users/DefaultUser.yaml'), new_user_path)
-    # write user name to user config file
-    with open(new_user_path, "r") as stream:
-        user_file = yaml.load(stream)
+    # create a copy of the default user with the user name
+    user_file = config.Config('data/users/DefaultUser.yaml')
     user_file['name'] = user_name
-    with open(new_user_path, 'w') as f:
-        yaml.dump(user_file, f)
+    user_file.save(new_user_path)
     # let the user edit it's config file
     subprocess.call(['nano', new_user_path])
     user_path = new_user_path
@@ -74,11 +59,8 @@ me = user.User(user_path)
 util.clear_console()
 print(f"Hello {me.name} :).", end = ' ')
 
-# initalize user columns in results df
-annual_results[['CO2 Budget [t]','Bank Deposit [Euro]', 'Comfort']] = np.nan
-annual_results.at[initial_year, 'CO2 Budget [t]'] = my_scenario.CO2_budget
-annual_results.at[initial_year, 'Bank Deposit [Euro]'] = me.bank_deposit
-annual_results.at[initial_year, 'Comfort'] = " =) =) =)"
+# initalize the annual results with the initial game state, every year is appended to annual_results.csv
+annual_results = game.init_annual_results(my_scenario, me, stream_path = 'annual_results.csv')
 
 # Let's choose a building config in a simmilar manner
 util.clear_console()
@@ -96,14 +78,10 @@ building_path = existing_buildings[selection-1]
 if selection == 0:
     building_name = input("Give your new building a name: ")
     new_building_path = Path(f'data/buildings/{building_name}.yaml')
-    # create a copy of the default building
-    shutil.copy(Path('data/buildings/DefaultBuilding.yaml'), new_building_path)
-    # write building name to user config file
-    with open(new_building_path, "r") as stream:
-        building_file = yaml.load(stream)
+    # create a copy of the default building with the building name
+    building_file = config.Config('data/buildings/DefaultBuilding.yaml')
     building_file['name'] = building_name
-    with open(new_building_path, 'w') as f:
-        yaml.dump(building_file, f)
+    building_file.save(new_building_path)
 
     # let the user edit the default building config file
     subprocess.call(['nano', new_building_path])
@@ -140,8 +118,6 @@ if selection == 0:
 else:
     my_system = system.System(system_path)
 
-annual_results.to_csv('annual_results.csv')
-
 # initalize the simulator
 my_simulator = simulator.Simulator(me, my_building, my_system, my_scenario)
 
@@ -185,55 +161,21 @@ while year <= c.END_YEAR: # end year
         elif user_input == '3': # change user behaviour
             print("Let's change the user behaviour!")
             me = actions.adopt(user_path)
+            my_simulator.user = me
 
-    # check if we have to reset one of the events
-    if event_states != {}:
-        #print(event_states)
-        for key, value in list(event_states.items()): # list enforces a copy of dict - required to avoid removing changing size of dict while iterating over it
-            getattr(events, key)(year, me, my_building, my_system, event_states)
-
-    event_status = -1
-    while event_status == -1:
-        # draw random event
-        event = random.choice(events.events)
-        #print(f'Event: {event}')
-        # call the random event and pass user, building (system) objects (so they can be changed by the event).
-        event_status = getattr(events, event)(year, me, my_building, my_system, event_states)
+    # reset expired events and draw a random event, the event can change the user, building and system objects
+    event = game.random_event(year, me, my_building, my_system, event_states)
 
     if event != 'nothing':
         input("    ENTER to continue: ")
 
-    # simulate
-    results = my_simulator.simulate_year(year)
-    annual_building_results = results['building']
-    annual_system_results = results['system'].sum()
-    annual_ecology_results = results['ecology'].sum()
-    annual_economy_results = results['economy'].sum()
-    comfort_deviation = results['comfort'] # !ToDo use actual room temperature for calculation of comfort deviation -> return hourly values
-
-
-    # calculate game log
-    game_log = gamelog.calculate(annual_ecology_results, annual_economy_results, comfort_deviation, annual_results.loc[year-1]) #ToDo add parameters
-
-    # update user
-    me.bank_deposit = game_log['Bank Deposit [Euro]']
-
-
-    # append game_log dict to annual_results df  
-    for key, value in game_log.items():
-            annual_results.at[year, key] = value
-    
-    # append annual building/sytem/ecologic/economic results dicts to annual_results df
-    dicts = [annual_building_results, annual_system_results, annual_ecology_results, annual_economy_results, comfort_deviation]
-    for dict in dicts:
-        if year == initial_year:
-            annual_results = annual_results.join(pd.DataFrame([dict], index=[year]))
-        else:
-            for key, value in dict.items():
-                annual_results.at[year, key] = value
-
-    # write annual results to csv-file
-    annual_results.to_csv('annual_results.csv')
+    # simulate, calculate game log and append the annual results
+    annual, game_log = game.simulate_year(my_simulator, year, annual_results)
+    annual_building_results = annual['building']
+    annual_system_results = annual['system']
+    annual_ecology_results = annual['ecology']
+    annual_economy_results = annual['economy']
+    comfort_deviation = annual['comfort']
 
     # print rewards
     util.clear_console()
@@ -281,19 +223,14 @@ while year <= c.END_YEAR: # end year
     year = year + 1
 
     # game over
-    if game_log["CO2 Budget [t]"] < 0:
-        print('CO2 budget exceeded!')
-        win = False
-        break
-    elif game_log["Bank Deposit [Euro]"] < 0:
-        print('Bank account empty!', end = ' ')
-        win = False
-        break
-    elif game_log['Comfort'] == "":
-        print('Comfort violated!', end = ' ')
+    reason = game.game_over(game_log)
+    if reason is not None:
+        print(reason, end = ' ')
         win = False
         break
 
+annual_results.finalize()
+
 if win == True:
     print('Yaayy!! You made it. ')
 else:
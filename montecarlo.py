@@ -0,0 +1,118 @@
+''' Monte Carlo analysis of the random events: play many games of one configuration with independent, reproducible event sequences.
+
+usage:
+    python montecarlo.py --system data/systems/Default_GasBoiler12kW.yaml -n 1000 --seed 42
+'''
+import os
+import io
+import copy
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import utilities as util
+import registry
+import user
+import building
+import system
+import scenario
+import game
+import batch
+
+# configuration of the worker process, see init_worker
+_configuration = None
+
+def load_configuration(user_path, building_path, system_path, scenario_path, action_plan_path = None):
+    ''' Load the objects of one game configuration: dict with user, building, system, scenario, action_plan '''
+    with contextlib.redirect_stdout(io.StringIO()):
+        return {'user' : user.User(user_path),
+                'building' : building.Building(building_path),
+                'system' : system.System(system_path),
+                'scenario' : scenario.Eco2(scenario_path),
+                'action_plan' : batch.load_action_plan(action_plan_path)}
+
+def trajectory_seeds(seed, n_trajectories):
+    ''' Independent seeds of the trajectories, derived from one seed '''
+    return [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(n_trajectories)]
+
+def play_trajectory(configuration, seed, policy = None):
+    ''' Play one game with the random events drawn from the given seed, returns the summary row
+    The actions of the policy (see policies.Policy) are drawn from the same seed.
+    The events change user, building and system, so the game is played on copies of the configuration.
+    The weather data is not changed and is shared by all copies.
+    '''
+    base_building = configuration['building']
+    memo = {id(base_building.weather) : base_building.weather}
+    me, my_building, my_system = copy.deepcopy((configuration['user'], base_building, configuration['system']), memo)
+
+    with contextlib.redirect_stdout(io.StringIO()): # the event messages are not needed
+        if policy is not None:
+            policy.reset(seed)
+        annual_results, reason = game.play(me, my_building, my_system, configuration['scenario'], configuration['action_plan'], event_seed = seed,
+                                           policy = policy)
+
+    summary = batch.summarize(seed, annual_results, reason)
+    summary['seed'] = summary.pop('name')
+    summary['Comfort level [-]'] = len(summary['Comfort'].split()) # number of remaining smileys
+    return summary
+
+def init_worker(configuration_paths):
+    global _configuration
+    util.INTERACTIVE = False
+    _configuration = load_configuration(*configuration_paths)
+
+def _play_trajectory(seed):
+    return play_trajectory(_configuration, seed)
+
+def run_montecarlo(configuration_paths, n_trajectories, seed = None, workers = None):
+    ''' Play n_trajectories games of one configuration on a process pool.
+    Parameters
+    ----------
+    configuration_paths: tuple
+        user, building, system, scenario and action plan (or None) file paths
+    seed: int
+        seed the trajectory seeds are derived from, None for a random seed
+    Returns
+    -------
+    pandas df
+        one summary row per trajectory
+    '''
+    seeds = trajectory_seeds(seed, n_trajectories)
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, n_trajectories // (4 * workers))
+    registry.preload() # inherited by the worker processes
+    with ProcessPoolExecutor(max_workers = workers, initializer = init_worker, initargs = (configuration_paths,)) as pool:
+        summaries = list(pool.map(_play_trajectory, seeds, chunksize = chunksize))
+    return pd.DataFrame(summaries)
+
+def report(trajectories):
+    ''' Distribution of the final game state and win probability '''
+    columns = ['CO2 Budget [t]', 'Bank Deposit [Euro]', 'Comfort level [-]', 'Last year']
+    distribution = trajectories[columns].describe(percentiles = [0.05, 0.25, 0.5, 0.75, 0.95])
+    return distribution, trajectories['Win'].mean()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = 'Play many games of one configuration with reproducible random events.')
+    parser.add_argument('--user', default = 'data/users/DefaultUser.yaml')
+    parser.add_argument('--building', default = 'data/buildings/DefaultBuilding.yaml')
+    parser.add_argument('--system', default = 'data/systems/Default_GasBoiler12kW.yaml')
+    parser.add_argument('--scenario', default = 'data/eco2_paths/Scenario.csv')
+    parser.add_argument('--actions', default = None, help = 'action plan .yaml')
+    parser.add_argument('-n', '--trajectories', type = int, default = 1000)
+    parser.add_argument('--seed', type = int, default = None)
+    parser.add_argument('--workers', type = int, default = None)
+    parser.add_argument('--output', default = None, help = 'csv file for the results of all trajectories')
+    args = parser.parse_args()
+
+    configuration_paths = (args.user, args.building, args.system, args.scenario, args.actions)
+    trajectories = run_montecarlo(configuration_paths, args.trajectories, args.seed, args.workers)
+    if args.output:
+        trajectories.to_csv(args.output, index = False)
+
+    distribution, win_probability = report(trajectories)
+    print(distribution.to_string())
+    print(f"\nWin probability: {win_probability:.1%}")
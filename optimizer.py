@@ -0,0 +1,158 @@
+''' Cost-optimal renovation path: the plan of renovations and system changes from START_YEAR to END_YEAR
+that keeps the CO2 budget and the bank deposit non-negative and ends with the highest bank deposit.
+
+Dynamic programming over the years: a state is the set of measures carried out so far (one measure per year at most),
+its labels are the non-dominated (CO2 budget, bank deposit) pairs of the plans reaching it. Plans with an
+insolvent purchase, a negative CO2 budget or bank deposit and dominated labels are pruned.
+The annual results of a configuration are memoized by the configuration fingerprint and year, every configuration
+is simulated once (see Simulator.simulate_aggregates), so the search takes seconds. Random events are not considered.
+
+usage:
+    python optimizer.py --system data/systems/Default_GasBoiler12kW.yaml --output data/actions/OptimalPlan.yaml
+'''
+import io
+import copy
+import argparse
+import contextlib
+
+import yaml
+
+import utilities as util
+import constants as c
+import actions
+import simulator
+import montecarlo
+
+def default_measures(system, thickness = 16, window_type = 2, heat_pump_power = None):
+    ''' Candidate measures: name -> list of (action, params) tuples, see actions.apply
+    insulation of every part of the building envelope, new windows and the replacement of the gas boilers by an air heat pump
+    '''
+    measures = {f'insulate {component}' : [('insulate', {'component' : component, 'thickness' : thickness})]
+                for component in actions.INSULATION_COMPONENTS.values()}
+    measures['change windows'] = [('change_windows', {'type' : str(window_type)})]
+    boilers = [name for name, component in system.components.items() if component.type == 'GasBoiler']
+    if boilers:
+        heat_pump = {'template' : 'HeatPumpAir', 'name' : 'HeatPumpAir'}
+        if heat_pump_power is not None:
+            heat_pump['power_nom'] = heat_pump_power
+        measures['heat pump'] = [('add_component', heat_pump)] + [('remove_component', {'name' : name}) for name in boilers]
+    return measures
+
+class Optimizer:
+    def __init__(self, user, building, system, scenario, measures = None):
+        ''' Search the renovation paths of the configuration (not changed), measures: see default_measures '''
+        self.base = (user, building, system)
+        self.scenario = scenario
+        self.measures = measures or default_measures(system)
+        self.configurations = {} # measures (frozenset) -> user, building, system
+        self.annual = {} # (configuration fingerprint, year) -> CO2 emissions [t], balance without investment [Euro]
+        self.investments = {name : self.investment(steps) for name, steps in self.measures.items()}
+
+    def investment(self, steps):
+        ''' Investment cost [Euro] of the components bought by the actions of a measure '''
+        cost = 0
+        for action, params in steps:
+            if action == 'add_component':
+                params = dict(params)
+                component = actions.load_component(f"data/systems/components/{params.pop('template')}.yaml", params)
+                cost += component.calc_investment_cost()
+        return cost
+
+    def configure(self, measures):
+        ''' Return user, building and system with the measures carried out (copies of the configuration, built once per set of measures) '''
+        if measures not in self.configurations:
+            base_building = self.base[1]
+            memo = {id(base_building.weather) : base_building.weather} # the weather data is shared by all copies
+            user, building, system = copy.deepcopy(self.base, memo)
+            user.bank_deposit = float('inf') # the purchases are checked by the search
+            with contextlib.redirect_stdout(io.StringIO()): # the renovation messages are not needed
+                for name in sorted(measures):
+                    for action, params in self.measures[name]:
+                        actions.apply(action, params, user, building, system, c.START_YEAR)
+            user.event_economic_balance, user.action_economic_balance = 0, 0
+            self.configurations[measures] = (user, building, system)
+        return self.configurations[measures]
+
+    def evaluate(self, measures, year):
+        ''' CO2 emissions [t] and economic balance without investment [Euro] of a configuration in a year '''
+        user, building, system = self.configure(measures)
+        my_simulator = simulator.Simulator(user, building, system, self.scenario)
+        key = (my_simulator.configuration_fingerprint(), year)
+        if key not in self.annual:
+            annual = my_simulator.simulate_year_annual(year)
+            self.annual[key] = (annual['ecology']['CO2 emissions total [t]'], annual['economy']['Balance [Euro/a]'])
+        return self.annual[key]
+
+    def search(self, co2_budget = None, bank_deposit = None):
+        ''' Cheapest feasible plan: the plan with the highest bank deposit at the end of the game
+        Returns
+        -------
+        tuple
+            action plan (year -> list of (action, params) tuples, see game.play), CO2 budget [t] and bank deposit [Euro] at the end,
+            None if there is no feasible plan
+        '''
+        co2_budget = self.scenario.CO2_budget if co2_budget is None else co2_budget
+        bank_deposit = self.base[0].bank_deposit if bank_deposit is None else bank_deposit
+        # measures -> labels (CO2 budget [t], bank deposit [Euro], measures of the years (tuple))
+        states = {frozenset() : [(co2_budget, bank_deposit, ())]}
+        for year in range(c.START_YEAR, c.END_YEAR + 1):
+            next_states = {}
+            for measures, labels in states.items():
+                for name in [None] + [name for name in self.measures if name not in measures]:
+                    next_measures = measures if name is None else measures | {name}
+                    cost = 0 if name is None else self.investments[name]
+                    emissions, balance = self.evaluate(next_measures, year)
+                    for co2, bank, path in labels:
+                        if bank < cost: # the user can't afford the measure
+                            continue
+                        label = (co2 - emissions, bank + balance - cost, path + (name,))
+                        if label[0] >= 0 and label[1] >= 0: # game over otherwise
+                            next_states.setdefault(next_measures, []).append(label)
+            states = {measures : pareto(labels) for measures, labels in next_states.items()}
+            if not states:
+                return None
+
+        co2, bank, path = max((label for labels in states.values() for label in labels), key = lambda label: (label[1], label[0]))
+        plan = {year : copy.deepcopy(self.measures[name]) for year, name in zip(range(c.START_YEAR, c.END_YEAR + 1), path) if name is not None}
+        return plan, co2, bank
+
+def pareto(labels):
+    ''' Labels not dominated by another label (higher or equal CO2 budget and bank deposit) '''
+    front = []
+    for label in sorted(labels, key = lambda label: (-label[1], -label[0])): # descending bank deposit
+        if not front or label[0] > front[-1][0]:
+            front.append(label)
+    return front
+
+def save_plan(plan, path):
+    ''' Write an action plan in the format of data/actions/ExamplePlan.yaml (see batch.load_action_plan) '''
+    plan_file = {year : [dict(params, action = action) for action, params in steps] for year, steps in plan.items()}
+    with open(path, 'w') as file:
+        yaml.safe_dump(plan_file, file, sort_keys = False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = 'Search the cost-optimal renovation path of a configuration.')
+    parser.add_argument('--user', default = 'data/users/DefaultUser.yaml')
+    parser.add_argument('--building', default = 'data/buildings/DefaultBuilding.yaml')
+    parser.add_argument('--system', default = 'data/systems/Default_GasBoiler12kW.yaml')
+    parser.add_argument('--scenario', default = 'data/eco2_paths/Scenario.csv')
+    parser.add_argument('--thickness', type = int, default = 16, help = '[cm] insulation thickness of the measures')
+    parser.add_argument('--heat-pump-power', type = float, default = None, help = '[kW] nominal power of the heat pump')
+    parser.add_argument('--output', default = None, help = 'action plan .yaml file')
+    args = parser.parse_args()
+
+    util.INTERACTIVE = False
+    configuration = montecarlo.load_configuration(args.user, args.building, args.system, args.scenario)
+    measures = default_measures(configuration['system'], args.thickness, heat_pump_power = args.heat_pump_power)
+    optimizer = Optimizer(configuration['user'], configuration['building'], configuration['system'], configuration['scenario'], measures)
+    result = optimizer.search()
+    if result is None:
+        print('No feasible renovation path.')
+    else:
+        plan, co2, bank = result
+        for year, steps in plan.items():
+            print(f"{year}: {', '.join(f'{action} {params}' for action, params in steps)}")
+        print(f"CO2 budget {co2:.2f} t, bank deposit {bank:.2f} Euro in {c.END_YEAR} ({len(optimizer.configurations)} configurations evaluated)")
+        if args.output:
+            save_plan(plan, args.output)
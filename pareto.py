@@ -0,0 +1,188 @@
+''' Pareto front of the cumulative CO2 emissions and costs of renovation and system options.
+
+A candidate is a row with the insulation thickness of the building components [cm] (0: not insulated),
+the new window type (0: windows not changed), the heating system (GasBoiler or HeatPumpAir) with its nominal power
+and the nominal power of a PV system (0: no PV system, only combined with a gas boiler, the heat pump controller has no PV).
+CO2 emissions and costs (investment and energy cost) are summed from START_YEAR to END_YEAR.
+The candidates of the same building and PV system are evaluated together, all heating powers in one dispatch (see sizing).
+
+The results are cached by the hash of the base configuration and the candidate, in memory and in an optional csv file,
+so refined or extended candidate sets only evaluate the new candidates.
+
+usage:
+    python pareto.py --heating-powers 6 8 10 12 14 --pv-powers 0 5 10 --workers 8 --cache data/cache/pareto.csv
+'''
+import os
+import io
+import copy
+import argparse
+import contextlib
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import utilities as util
+import constants as c
+import registry
+import system
+import actions
+import sizing
+import montecarlo
+
+RENOVATION_KEYS = ['facade', 'roof', 'upper_ceiling', 'groundplate', 'window']
+CANDIDATE_KEYS = RENOVATION_KEYS + ['heating', 'heating_power', 'pv_power']
+RESULT_KEYS = ['CO2 emissions [t]', 'Cost [Euro]', 'Investment cost [Euro]', 'Energy cost [Euro]', 'Uncovered hours [h/a]']
+# component templates of the candidate systems, see configure
+COMPONENT_TEMPLATES = ['GasBoiler', 'HeatPumpAir', 'Photovoltaic']
+
+def template_path(template):
+    return f'{registry.COMPONENT_TEMPLATES_DIR}/{template}.yaml'
+
+def candidates(thicknesses = (0, 8, 16, 24), window_types = (0, 2), heating_powers = (6, 8, 10, 12, 14), pv_powers = (0, 5, 10)):
+    ''' Full factorial candidates of the insulation thicknesses [cm] (all components), window types, heating and PV powers [kW] '''
+    renovations = [thicknesses] * 4 + [window_types]
+    gas_boiler = pd.MultiIndex.from_product(renovations + [['GasBoiler'], heating_powers, pv_powers], names = CANDIDATE_KEYS)
+    heat_pump = pd.MultiIndex.from_product(renovations + [['HeatPumpAir'], heating_powers, [0]], names = CANDIDATE_KEYS)
+    return pd.concat([gas_boiler.to_frame(index = False), heat_pump.to_frame(index = False)], ignore_index = True)
+
+def base_key(configuration):
+    ''' Hash of everything the results of the candidates depend on apart from the candidate, the component templates included '''
+    user, building, scenario = configuration['user'], configuration['building'], configuration['scenario']
+    templates = [util.file_hash(template_path(template)) for template in COMPONENT_TEMPLATES]
+    return util.fingerprint(building.fingerprint(), user.set_point_temperature, util.array_hash(user.profile['el_hh [W]'].to_numpy()),
+                            list(scenario.eco2_path.columns), util.array_hash(scenario.eco2_path.to_numpy(dtype = float)), c.START_YEAR, c.END_YEAR,
+                            templates)
+
+def candidate_keys(candidates, base):
+    ''' Cache keys of the candidates, the values are normalized (8 and 8.0 give the same key) '''
+    normalized = candidates[CANDIDATE_KEYS].astype({key : float for key in CANDIDATE_KEYS if key != 'heating'} | {'heating' : str})
+    return [util.fingerprint(base, tuple(row)) for row in normalized.itertuples(index = False, name = None)]
+
+def configure(configuration, renovation, heating, pv_power):
+    ''' Return building and system of a candidate (copies of the base configuration, the base system is replaced) '''
+    base_building = configuration['building']
+    my_building = copy.deepcopy(base_building, {id(base_building.weather) : base_building.weather})
+    with contextlib.redirect_stdout(io.StringIO()): # the renovation messages are not needed
+        for component, thickness in zip(RENOVATION_KEYS[:-1], renovation[:-1]):
+            if thickness > 0:
+                actions.apply('insulate', {'component' : component, 'thickness' : thickness}, None, my_building, None, c.START_YEAR)
+        if renovation[-1] > 0:
+            actions.change_windows(my_building, str(int(renovation[-1])))
+
+    my_system = system.System()
+    components = [(heating, {'name' : heating})]
+    if pv_power > 0:
+        components.append(('Photovoltaic', {'name' : 'Photovoltaic', 'power_nom' : float(pv_power)}))
+    for template, params in components:
+        component = actions.load_component(template_path(template), params)
+        component.commission(c.START_YEAR)
+        my_system.add_component(component)
+    return my_building, my_system
+
+def evaluate_group(configuration, renovation, heating, pv_power, heating_powers):
+    ''' Results of the candidates with the same building and PV system, pandas df (one row per heating power) '''
+    my_building, my_system = configure(configuration, renovation, heating, pv_power)
+    with contextlib.redirect_stdout(io.StringIO()): # the feed-in tariff messages are not needed
+        table = sizing.size(configuration['user'], my_building, my_system, configuration['scenario'], heating, heating_powers)
+    other_investment = sum(component.calc_investment_cost() for name, component in my_system.components.items() if name != heating)
+    investment_cost = table['Investment cost [Euro]'].to_numpy() + other_investment
+    return pd.DataFrame({'CO2 emissions [t]' : table['CO2 emissions [t]'].to_numpy(),
+                         'Cost [Euro]' : investment_cost + table['Energy cost [Euro]'].to_numpy(),
+                         'Investment cost [Euro]' : investment_cost,
+                         'Energy cost [Euro]' : table['Energy cost [Euro]'].to_numpy(),
+                         'Uncovered hours [h/a]' : table['Uncovered hours [h/a]'].to_numpy()})
+
+def _evaluate_group(group):
+    return evaluate_group(montecarlo._configuration, *group)
+
+def pareto_front(results, max_uncovered_hours = 0):
+    ''' Candidates not dominated by another one with lower or equal CO2 emissions and cost, sorted by cost '''
+    feasible = results[results['Uncovered hours [h/a]'] <= max_uncovered_hours]
+    ordered = feasible.sort_values(['Cost [Euro]', 'CO2 emissions [t]'], kind = 'stable')
+    co2 = ordered['CO2 emissions [t]'].to_numpy()
+    lowest_before = np.concatenate([[np.inf], np.minimum.accumulate(co2)[:-1]])
+    return ordered[co2 < lowest_before]
+
+def refine(front, step):
+    ''' Candidates with the heating and PV powers of the candidates of the front changed by +-step [kW] '''
+    refined = [front[CANDIDATE_KEYS]]
+    for key in ['heating_power', 'pv_power']:
+        for change in [-step, step]:
+            variant = front[CANDIDATE_KEYS].copy()
+            variant[key] = variant[key] + change
+            if key == 'pv_power':
+                variant = variant[(variant['heating'] == 'GasBoiler') & (front[key] > 0)]
+            refined.append(variant[variant[key] > 0])
+    return pd.concat(refined, ignore_index = True).drop_duplicates(ignore_index = True)
+
+class Explorer:
+    def __init__(self, configuration_paths, cache_path = None):
+        ''' Explore the candidates of a base configuration (user, building, system, scenario and action plan paths, see montecarlo.load_configuration),
+        cache_path: csv file of the evaluated candidates, read if it exists and extended by every evaluation
+        '''
+        self.configuration_paths = configuration_paths
+        self.base = base_key(montecarlo.load_configuration(*configuration_paths))
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.cache = pd.DataFrame(columns = CANDIDATE_KEYS + RESULT_KEYS, index = pd.Index([], name = 'key'))
+        if self.cache_path is not None and self.cache_path.is_file():
+            self.cache = pd.read_csv(self.cache_path, index_col = 'key')
+
+    def evaluate(self, candidates, workers = None):
+        ''' Results of the candidates (candidate and result columns), only candidates which are not cached are evaluated '''
+        candidates = candidates[CANDIDATE_KEYS].reset_index(drop = True)
+        keys = pd.Index(candidate_keys(candidates, self.base), name = 'key')
+        missing = candidates[~keys.isin(self.cache.index)].set_axis(keys[~keys.isin(self.cache.index)]).drop_duplicates()
+        missing = missing[~missing.index.duplicated()]
+        if len(missing) > 0:
+            self.cache = pd.concat([self.cache, self._evaluate(missing, workers)]) if len(self.cache) > 0 else self._evaluate(missing, workers)
+        return self.cache.loc[keys].reset_index(drop = True)
+
+    def _evaluate(self, missing, workers):
+        group_keys = RENOVATION_KEYS + ['heating', 'pv_power']
+        groups, indices = [], []
+        for (*renovation, heating, pv_power), rows in missing.groupby(group_keys, sort = True): # same buildings one after the other (Building.calc cache)
+            groups.append((tuple(renovation), heating, pv_power, rows['heating_power'].to_numpy(dtype = float)))
+            indices.append(rows.index)
+
+        workers = workers or os.cpu_count() or 1
+        chunksize = max(1, len(groups) // (4 * workers))
+        registry.preload() # inherited by the worker processes
+        with ProcessPoolExecutor(max_workers = workers, initializer = montecarlo.init_worker, initargs = (self.configuration_paths,)) as pool:
+            tables = list(pool.map(_evaluate_group, groups, chunksize = chunksize))
+
+        evaluated = pd.concat([table.set_index(index) for table, index in zip(tables, indices)])
+        evaluated = pd.concat([missing, evaluated], axis = 1)
+        if self.cache_path is not None: # append only, the evaluated candidates are never written again
+            self.cache_path.parent.mkdir(parents = True, exist_ok = True)
+            evaluated.to_csv(self.cache_path, mode = 'a', header = not self.cache_path.is_file(), index_label = 'key')
+        return evaluated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = 'Pareto front of the cumulative CO2 emissions and costs of renovation and system options.')
+    parser.add_argument('--user', default = 'data/users/DefaultUser.yaml')
+    parser.add_argument('--building', default = 'data/buildings/DefaultBuilding.yaml')
+    parser.add_argument('--scenario', default = 'data/eco2_paths/Scenario.csv')
+    parser.add_argument('--thicknesses', type = float, nargs = '+', default = [0, 8, 16, 24], help = '[cm] insulation thicknesses')
+    parser.add_argument('--window-types', type = int, nargs = '+', default = [0, 2], help = 'window types, 0: not changed')
+    parser.add_argument('--heating-powers', type = float, nargs = '+', default = [6, 8, 10, 12, 14], help = '[kW]')
+    parser.add_argument('--pv-powers', type = float, nargs = '+', default = [0, 5, 10], help = '[kW]')
+    parser.add_argument('--refine', type = float, default = None, help = '[kW] evaluate the powers of the front +- this step again')
+    parser.add_argument('--workers', type = int, default = None)
+    parser.add_argument('--cache', default = None, help = 'csv file of the evaluated candidates')
+    parser.add_argument('--output', default = None, help = 'csv file for the pareto front')
+    args = parser.parse_args()
+
+    util.INTERACTIVE = False
+    # the base system is replaced by the system of the candidates
+    explorer = Explorer((args.user, args.building, 'data/systems/Default_GasBoiler12kW.yaml', args.scenario, None), args.cache)
+    results = explorer.evaluate(candidates(args.thicknesses, args.window_types, args.heating_powers, args.pv_powers), args.workers)
+    front = pareto_front(results)
+    if args.refine:
+        front = pareto_front(pd.concat([results, explorer.evaluate(refine(front, args.refine), args.workers)]))
+    if args.output:
+        front.to_csv(args.output, index = False)
+    print(front.to_string(index = False))
+    print(f"\n{len(front)} of {len(results)} candidates on the pareto front ({len(explorer.cache)} evaluated candidates cached)")
@@ -0,0 +1,172 @@
+''' Players without user interaction (policies) and a runner playing many games of several policies for automated playtesting.
+
+A policy decides the actions of a year (list of (action, params) tuples, see actions.apply) from the game state:
+the year, the annual results of the last year (dict, see results.AnnualLedger) and the user, building and system objects.
+All policies play the same seeded random event sequences, so their results can be compared game by game.
+
+usage:
+    python policies.py do_nothing greedy_insulation heat_pump:2030 -n 1000 --seed 42
+'''
+import os
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import registry
+import montecarlo
+import actions
+
+class Policy:
+    ''' Player that never acts, base class of the policies '''
+    def __init__(self):
+        self.reset()
+
+    def reset(self, seed = None):
+        ''' Start a new game, seed of the random decisions of the policy '''
+        self.rng = np.random.default_rng(seed)
+
+    def __call__(self, year, last_results, user, building, system):
+        ''' Return the actions of the year: list of (action, params) tuples, see actions.apply '''
+        return []
+
+class DoNothing(Policy):
+    pass
+
+class GreedyInsulation(Policy):
+    ''' Insulate the part of the building envelope with the highest transmission losses of the last year, one part per year.
+    Every part is insulated once, the roof losses are reduced at the roof or the upper ceiling, whichever loses more heat.
+    '''
+    def __init__(self, thickness = 16, windows = 2):
+        super().__init__()
+        self.thickness = thickness # [cm]
+        self.windows = str(windows) # new window type, see actions.WINDOW_TYPES
+
+    def reset(self, seed = None):
+        super().reset(seed)
+        self.renovated = set()
+
+    def __call__(self, year, last_results, user, building, system):
+        if 'Transmission losses facade [kWh/a]' not in last_results or np.isnan(last_results['Transmission losses facade [kWh/a]']):
+            return [] # no building results yet
+        roof = 'roof' if building.u_value_roof * building.area_roof > building.u_value_upper_ceiling * building.area_upper_ceiling else 'upper_ceiling'
+        losses = {'facade' : last_results['Transmission losses facade [kWh/a]'],
+                  roof : last_results['Transmission losses roof [kWh/a]'],
+                  'groundplate' : last_results['Transmission losses ground [kWh/a]'],
+                  'window' : last_results['Transmission losses window [kWh/a]']}
+        candidates = {part : loss for part, loss in losses.items() if part not in self.renovated}
+        if not candidates:
+            return []
+        part = max(candidates, key = candidates.get)
+        self.renovated.add(part)
+        if part == 'window':
+            return [('change_windows', {'type' : self.windows})]
+        return [('insulate', {'component' : part, 'thickness' : self.thickness})]
+
+class HeatPumpSwitch(Policy):
+    ''' Replace the gas boilers by an air heat pump in the given year, or as soon as the user can afford it afterwards '''
+    def __init__(self, year = 2030, power_nom = None):
+        super().__init__()
+        self.year = int(year)
+        self.power_nom = power_nom # [kW] default: power of the component template
+
+    def __call__(self, year, last_results, user, building, system):
+        if year < self.year or any(component.type == 'HeatPumpAir' for component in system.components.values()):
+            return []
+        params = {'template' : 'HeatPumpAir', 'name' : 'HeatPumpAir'}
+        if self.power_nom is not None:
+            params['power_nom'] = self.power_nom
+        # the gas boilers are only removed if the heat pump was purchased (game.play skips the actions after a failed one)
+        boilers = [name for name, component in system.components.items() if component.type == 'GasBoiler']
+        return [('add_component', params)] + [('remove_component', {'name' : name}) for name in boilers]
+
+class RandomRenovation(Policy):
+    ''' Renovate a random part of the building envelope with the given probability per year '''
+    def __init__(self, probability = 0.2):
+        super().__init__()
+        self.probability = probability
+
+    def __call__(self, year, last_results, user, building, system):
+        if self.rng.random() >= self.probability:
+            return []
+        parts = list(actions.INSULATION_COMPONENTS.values()) + ['window']
+        part = parts[self.rng.integers(len(parts))]
+        if part == 'window':
+            return [('change_windows', {'type' : str(self.rng.integers(1, 4))})]
+        return [('insulate', {'component' : part, 'thickness' : int(self.rng.integers(4, 21))})]
+
+# policy names of make_policy
+POLICIES = {'do_nothing' : DoNothing,
+            'greedy_insulation' : GreedyInsulation,
+            'heat_pump' : HeatPumpSwitch,
+            'random_renovation' : RandomRenovation}
+
+def make_policy(spec):
+    ''' Create a policy from its name and arguments, e.g. 'do_nothing', 'heat_pump:2030,9' (year, power_nom) '''
+    name, _, args = spec.partition(':')
+    try:
+        policy_class = POLICIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown policy '{name}', available policies: {list(POLICIES)}") from None
+    return policy_class(*[float(arg) if '.' in arg else int(arg) for arg in args.split(',') if arg])
+
+def _play_game(task):
+    spec, seed = task
+    summary = montecarlo.play_trajectory(montecarlo._configuration, seed, make_policy(spec))
+    summary['policy'] = spec
+    return summary
+
+def run_policies(configuration_paths, specs, n_games, seed = None, workers = None):
+    ''' Play n_games games of every policy on a process pool, all policies play the same random event sequences.
+    Parameters
+    ----------
+    configuration_paths: tuple
+        user, building, system, scenario and action plan (or None) file paths, see montecarlo.load_configuration
+    specs: list
+        policies, see make_policy
+    seed: int
+        seed the game seeds are derived from, None for a random seed
+    Returns
+    -------
+    pandas df
+        one summary row per game
+    '''
+    for spec in specs:
+        make_policy(spec) # fail before the pool is started
+    tasks = list(itertools.product(specs, montecarlo.trajectory_seeds(seed, n_games)))
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (4 * workers))
+    registry.preload() # inherited by the worker processes
+    with ProcessPoolExecutor(max_workers = workers, initializer = montecarlo.init_worker, initargs = (configuration_paths,)) as pool:
+        summaries = list(pool.map(_play_game, tasks, chunksize = chunksize))
+    return pd.DataFrame(summaries)
+
+def compare(games):
+    ''' Win probability, game over reasons and final game state per policy '''
+    grouped = games.groupby('policy', sort = False)
+    comparison = grouped[['CO2 Budget [t]', 'Bank Deposit [Euro]', 'Comfort level [-]', 'Last year']].mean()
+    comparison.insert(0, 'Win probability [-]', grouped['Win'].mean())
+    reasons = games[~games['Win']].groupby(['policy', 'Game over']).size().unstack(fill_value = 0)
+    return comparison.join(reasons).fillna(0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = 'Play many games of several policies with reproducible random events.')
+    parser.add_argument('policies', nargs = '+', help = f'policies {list(POLICIES)}, arguments after a colon, e.g. heat_pump:2030')
+    parser.add_argument('--user', default = 'data/users/DefaultUser.yaml')
+    parser.add_argument('--building', default = 'data/buildings/DefaultBuilding.yaml')
+    parser.add_argument('--system', default = 'data/systems/Default_GasBoiler12kW.yaml')
+    parser.add_argument('--scenario', default = 'data/eco2_paths/Scenario.csv')
+    parser.add_argument('-n', '--games', type = int, default = 100, help = 'games per policy')
+    parser.add_argument('--seed', type = int, default = None)
+    parser.add_argument('--workers', type = int, default = None)
+    parser.add_argument('--output', default = None, help = 'csv file for the results of all games')
+    args = parser.parse_args()
+
+    configuration_paths = (args.user, args.building, args.system, args.scenario, None)
+    games = run_policies(configuration_paths, args.policies, args.games, args.seed, args.workers)
+    if args.output:
+        games.to_csv(args.output, index = False)
+    print(compare(games).to_string())
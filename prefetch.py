@@ -0,0 +1,108 @@
+''' Download the missing TMY files of many locations concurrently, e.g. before the first simulation of a new region.
+
+Locations with a TMY file within the tolerance (see weather.TOLERANCE) are skipped, so an interrupted prefetch
+resumes with the missing files when started again.
+
+usage:
+    python prefetch.py --locations stock.csv --workers 8    # csv with the columns latitude, longitude
+    python prefetch.py 48.1,7.2 49.5,8.4
+'''
+import json
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import requests
+
+import utilities
+import weather
+
+RETRY_STATUS = [429, 500, 502, 503, 504] # worth retrying, the other errors are permanent
+
+def missing_locations(locations, repository, tolerance = weather.TOLERANCE):
+    ''' Locations without a TMY file within the tolerance [km], nearby locations share one download '''
+    missing = []
+    planned = np.empty((0, 3)) # unit vectors of the missing locations
+    for latitude, longitude in locations:
+        if repository.nearest(latitude, longitude, tolerance) is not None:
+            continue
+        vector = weather.unit_vectors(latitude, longitude)
+        if len(planned) > 0 and weather.chord_to_distance(np.linalg.norm(planned - vector, axis = 1).min()) <= tolerance:
+            continue
+        missing.append((latitude, longitude))
+        planned = np.vstack([planned, vector])
+    return missing
+
+def download(session, latitude, longitude, directory, retries = 4, backoff = 1.0, timeout = 60):
+    ''' Download the TMY file of one location, retry with exponential backoff on network errors and overload responses
+    Returns
+    -------
+    str
+        error message, None if the download succeeded
+    '''
+    path = Path(directory).joinpath(weather.tmy_filename(latitude, longitude))
+    for attempt in range(retries + 1):
+        try:
+            data = utilities.get_tmy_data(latitude, longitude, session = session, timeout = timeout)
+            json.loads(data)['outputs']['tmy_hourly'] # only save complete weather data
+            utilities.save_tmy_data(data, path)
+            return None
+        except requests.HTTPError as exc:
+            error = repr(exc)
+            if exc.response is not None and exc.response.status_code not in RETRY_STATUS:
+                return error
+        except (requests.ConnectionError, requests.Timeout, ValueError, KeyError) as exc:
+            error = repr(exc)
+        if attempt < retries:
+            time.sleep(backoff * 2**attempt)
+    return error
+
+def prefetch(locations, directory = None, workers = 4, tolerance = weather.TOLERANCE, retries = 4, backoff = 1.0, timeout = 60):
+    ''' Download the missing TMY files of the locations on a thread pool with one pooled HTTP session.
+    Parameters
+    ----------
+    locations: list
+        (latitude, longitude) tuples
+    directory: str
+        weather data repository, default: weather.WEATHER_DIR
+    Returns
+    -------
+    dict
+        (latitude, longitude) -> error message of the failed downloads
+    '''
+    repository = weather.WeatherRepository(directory or weather.WEATHER_DIR)
+    missing = missing_locations(locations, repository, tolerance)
+
+    with requests.Session() as session:
+        adapter = requests.adapters.HTTPAdapter(pool_connections = 1, pool_maxsize = workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        with ThreadPoolExecutor(max_workers = workers) as pool:
+            errors = pool.map(lambda location: download(session, *location, repository.directory, retries, backoff, timeout), missing)
+            failed = {location : error for location, error in zip(missing, errors) if error is not None}
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = 'Download the missing TMY files of many locations.')
+    parser.add_argument('coordinates', nargs = '*', help = 'latitude,longitude')
+    parser.add_argument('--locations', default = None, help = 'csv file with the columns latitude, longitude')
+    parser.add_argument('--workers', type = int, default = 4, help = 'concurrent downloads')
+    parser.add_argument('--tolerance', type = float, default = weather.TOLERANCE, help = '[km] maximum distance to existing weather data')
+    parser.add_argument('--retries', type = int, default = 4)
+    parser.add_argument('--url', default = utilities.PVGIS_TMY_URL, help = 'PVGIS tmy API or a local stand-in')
+    args = parser.parse_args()
+
+    locations = [tuple(float(value) for value in coordinate.split(',')) for coordinate in args.coordinates]
+    if args.locations:
+        table = pd.read_csv(args.locations)
+        locations += list(table[['latitude', 'longitude']].drop_duplicates().itertuples(index = False, name = None))
+
+    utilities.PVGIS_TMY_URL = args.url
+    failed = prefetch(locations, workers = args.workers, tolerance = args.tolerance, retries = args.retries)
+    for (latitude, longitude), error in failed.items():
+        print(f"Failed: latitude {latitude}, longitude {longitude}: {error}")
+    print(f"{len(failed)} downloads failed, start again to resume." if failed else "All weather data available.")
@@ -0,0 +1,88 @@
+''' Process-wide registry of the reference data (u-value table, profiles, component templates, eco2 paths).
+
+The files are read once per process and only again if their modification time changed. The registry hands out
+copies: tables as deep copies (small, a shallow copy shares the buffers without copy on write, e.g. pandas 1.4),
+the hourly profiles as shallow copies of a read-only memory map (shared by all users and processes), dicts as copies,
+so callers can't change the cached data.
+preload() reads all reference data, pools created afterwards (fork) inherit it without reading the files again.
+'''
+import os
+import copy
+import glob
+import types
+from pathlib import Path
+
+import pandas as pd
+import yaml
+
+import utilities
+
+U_VALUES_PATH = "data/components/u_values.csv"
+PROFILE_PATH = "data/profiles/user_profile_norm.csv"
+PROFILE_CACHE_DIR = "data/profiles/cache" # hourly input store of the profiles, can be deleted at any time
+COMPONENT_TEMPLATES_DIR = "data/systems/components"
+ECO2_PATHS_DIR = "data/eco2_paths"
+
+# (path, loader) -> (modification time [ns], data)
+_entries = {}
+
+def load(path, loader):
+    ''' Return loader(path), loaded once per process and again if the modification time of the file changed '''
+    key = (os.fspath(path), loader)
+    mtime = os.stat(path).st_mtime_ns
+    entry = _entries.get(key)
+    if entry is None or entry[0] != mtime:
+        entry = (mtime, loader(path))
+        _entries[key] = entry
+    return entry[1]
+
+def clear():
+    _entries.clear()
+
+def info():
+    ''' Paths of the loaded reference data '''
+    return sorted(path for path, _ in _entries)
+
+def _read_u_values(path):
+    return pd.read_csv(path, index_col = "bac")
+
+def _open_profile_norm(path):
+    # memory mapped from the hourly input store, which is created from the csv file on the first use
+    cache_path = Path(PROFILE_CACHE_DIR).joinpath(f"{Path(path).stem}_{utilities.file_hash(path)[:16]}.hourly")
+    if not cache_path.is_file():
+        utilities.save_hourly(pd.read_csv(path), cache_path)
+    profile_norm = utilities.open_hourly(cache_path, mode = 'r') # writes raise instead of changing the shared pages
+    return profile_norm.set_index('hour')
+
+def _read_component_template(path):
+    with open(path, "r") as stream:
+        component_file = yaml.safe_load(stream)
+    return types.MappingProxyType(list(component_file.items())[0][1]) # extract single value from dict
+
+def _read_eco2_path(path):
+    return pd.read_csv(path, index_col = "year")
+
+def u_values():
+    ''' u-value table [W/(m^2K)], index: building age class (bac) '''
+    return load(U_VALUES_PATH, _read_u_values).copy()
+
+def profile_norm():
+    ''' Normalized hourly profiles, index: hour (read-only memory map, copy the frame to change it) '''
+    return load(PROFILE_PATH, _open_profile_norm).copy(deep = False)
+
+def component_template(path):
+    ''' Parameters of a component template file (copy), see actions.load_component '''
+    return copy.deepcopy(dict(load(path, _read_component_template)))
+
+def eco2_path(path):
+    ''' eco2 path table of a scenario file, index: year, see scenario.Eco2 '''
+    return load(path, _read_eco2_path).copy()
+
+def preload():
+    ''' Load all reference data, e.g. before worker processes are started '''
+    u_values()
+    profile_norm()
+    for path in glob.glob(f'{COMPONENT_TEMPLATES_DIR}/*.yaml'):
+        component_template(path)
+    for path in glob.glob(f'{ECO2_PATHS_DIR}/*.csv'):
+        eco2_path(path)
@@ -0,0 +1,294 @@
+import os
+import csv
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import utilities
+
+try: # optional, compressed Arrow IPC files of the hourly results store
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.feather
+except ImportError:
+    pa = None
+
+TEXT_LENGTH = 32 # maximum length of the text results of AnnualLedger
+HOURLY_CATEGORIES = ['system', 'ecology', 'economy'] # hourly results of Simulator.simulate_year
+HOURLY_CHUNK = 730 # [h] rows per record batch of the Arrow files of HourlyStore (about one month)
+MONTH_HOURS = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]) * 24 # [h] hours of the months of the typical year
+LOAD_BINS = np.concatenate([[-np.inf], np.arange(0, 50001, 1000), [np.inf]]) # [W] bin edges of the load histograms of Aggregates
+
+class ResultBuffer:
+    ''' Preallocated, typed storage for the hourly results of one category (system, ecology or economy).
+
+    One contiguous numpy column is allocated per declared result key before the simulation starts.
+    Results are written into these columns (hour by hour or for the whole year at once)
+    and a DataFrame view on the columns is handed out at the end.
+    '''
+    def __init__(self, keys, n_hours, dtype = np.float64):
+        self.keys = list(dict.fromkeys(keys)) # unique keys, declaration order
+        self.n_hours = n_hours
+        # one row per key, so every result column is contiguous in memory
+        self.data = np.zeros((len(self.keys), n_hours), dtype = dtype)
+        self.columns = {key : self.data[i] for i, key in enumerate(self.keys)}
+
+    @property
+    def nbytes(self):
+        ''' Memory used by the buffer [bytes] '''
+        return self.data.nbytes
+
+    def write(self, values, hours = slice(None)):
+        ''' Write results to the buffer.
+        Parameters
+        ----------
+        values : dict
+            result key -> value (scalar or array)
+        hours : int, slice or array of int
+            hours to write to, default is the whole year
+        '''
+        for key, value in values.items():
+            try:
+                column = self.columns[key]
+            except KeyError:
+                raise KeyError(f"Result '{key}' was not declared for this buffer, declared results: {self.keys}") from None
+            column[hours] = value
+
+    def to_frame(self, index = None):
+        ''' Return the buffered results as DataFrame (a view on the buffer, no copy) '''
+        if index is None:
+            index = pd.RangeIndex(self.n_hours)
+        return pd.DataFrame(self.data.T, index = index, columns = self.keys, copy = False)
+
+
+def month_slices(n_hours = 8760):
+    ''' Slices of the hours of the months of the typical year '''
+    ends = np.cumsum(MONTH_HOURS)
+    if ends[-1] != n_hours:
+        raise ValueError(f"Hourly results of {n_hours} hours can't be split into the months of a typical year")
+    return [slice(int(end - hours), int(end)) for hours, end in zip(MONTH_HOURS, ends)]
+
+class Aggregates:
+    ''' Monthly sums, peaks and load histograms of hourly results, accumulated chunk by chunk (e.g. month by month).
+
+    The hourly results are only seen once while they are dispatched and never stored,
+    the aggregates of a year take a few kilobytes instead of megabytes.
+    '''
+    def __init__(self, keys, n_months = 12, bins = LOAD_BINS):
+        self.keys = list(dict.fromkeys(keys)) # unique keys, declaration order
+        self.bins = bins
+        self.monthly = np.zeros((len(self.keys), n_months))
+        self.peaks = np.full(len(self.keys), np.nan)
+        self.histograms = np.zeros((len(self.keys), len(bins) - 1), dtype = np.int64) # hours per bin
+        self.uncovered_hours = 0 # hours with uncovered heat
+
+    @property
+    def nbytes(self):
+        ''' Memory used by the aggregates [bytes] '''
+        return self.monthly.nbytes + self.peaks.nbytes + self.histograms.nbytes
+
+    def add(self, month, values):
+        ''' Add the hourly results (dict: result key -> array) of a chunk of hours of the given month (0 .. 11) '''
+        for i, key in enumerate(self.keys):
+            column = np.asarray(values[key], dtype = float)
+            column = column[~np.isnan(column)]
+            if len(column) == 0:
+                continue
+            self.monthly[i, month] += column.sum()
+            self.peaks[i] = np.fmax(self.peaks[i], column.max())
+            self.histograms[i] += np.histogram(column, self.bins)[0]
+        if 'Uncovered heat [Wh]' in values:
+            self.uncovered_hours += int(np.count_nonzero(np.asarray(values['Uncovered heat [Wh]']) > 0))
+
+    def totals(self):
+        ''' Annual sums: result key -> value '''
+        return dict(zip(self.keys, self.monthly.sum(axis = 1)))
+
+    def monthly_sums(self):
+        ''' Monthly sums: result key -> array of the months '''
+        return dict(zip(self.keys, self.monthly))
+
+    def peak(self, key):
+        ''' Maximum hourly value of a result '''
+        return self.peaks[self.keys.index(key)]
+
+    def load_duration(self, key):
+        ''' Load duration curve from the histogram of a result: hours with at least the lower bin edges, pandas series (index: lower bin edge) '''
+        histogram = self.histograms[self.keys.index(key)]
+        return pd.Series(np.cumsum(histogram[::-1])[::-1], index = self.bins[:-1], name = key)
+
+
+class AnnualLedger:
+    ''' Typed annual results of a game, one row per year from the initial state (START_YEAR - 1) to END_YEAR.
+
+    The schema (result keys) is fixed when the ledger is created and the table is preallocated for all years.
+    Rows are appended year by year; each row can be streamed to a csv file immediately (one line per year),
+    instead of writing the whole table again after every year.
+    '''
+    def __init__(self, keys, years, text_keys = ('Comfort',), stream_path = None):
+        '''
+        Parameters
+        ----------
+        keys : list
+            result keys, float columns apart from the text keys
+        years : list
+            years of the ledger, the rows have to be appended in this order
+        text_keys : list
+            keys of the text columns (e.g. the comfort smileys)
+        stream_path : str
+            csv file the rows are streamed to, no streaming if None
+        '''
+        self.keys = list(dict.fromkeys(keys))
+        self.years = [int(year) for year in years]
+        self.dtype = np.dtype([(key, f'U{TEXT_LENGTH}' if key in text_keys else np.float64) for key in self.keys])
+        self.table = np.zeros(len(self.years), dtype = self.dtype)
+        for key in self.keys:
+            if key not in text_keys:
+                self.table[key] = np.nan
+        self.n_rows = 0 # rows written
+        self.stream = None
+        if stream_path is not None:
+            self.stream = open(stream_path, 'w', newline = '')
+            self.writer = csv.writer(self.stream)
+            self.writer.writerow(['year'] + self.keys)
+            self.stream.flush()
+
+    def __len__(self):
+        return self.n_rows
+
+    def append(self, year, *values):
+        ''' Write the results (one or more dicts: result key -> value) of the next year and stream the row '''
+        if self.n_rows == len(self.years) or year != self.years[self.n_rows]:
+            raise ValueError(f"Results of {year} can't be appended, next year of the ledger: {self.years[self.n_rows] if self.n_rows < len(self.years) else None}")
+        for results in values:
+            for key in results:
+                if key not in self.dtype.names:
+                    raise KeyError(f"Result '{key}' was not declared for this ledger, declared results: {self.keys}")
+        row = self.table[self.n_rows] # view on the table
+        for results in values:
+            for key, value in results.items():
+                row[key] = value
+        self.n_rows += 1
+        if self.stream is not None:
+            self.writer.writerow([year] + [row[key] if self.dtype[key].kind == 'U' or not np.isnan(row[key]) else '' for key in self.keys])
+            self.stream.flush()
+
+    def row(self, year):
+        ''' Return the results of a written year as dict '''
+        i = self.years.index(year)
+        if i >= self.n_rows:
+            raise KeyError(f"No results of {year} written yet")
+        return {key : self.table[i][key].item() for key in self.keys}
+
+    def to_frame(self):
+        ''' Return the results of the written years as pandas df (index: year) '''
+        rows = self.table[:self.n_rows]
+        return pd.DataFrame({key : rows[key] for key in self.keys}, index = pd.Index(self.years[:self.n_rows], name = 'year'))
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+    def finalize(self, path = None):
+        ''' Close the stream and write the results to a .csv or .parquet file (not needed for the streamed csv file)
+        Returns
+        -------
+        pandas df
+            results of the written years
+        '''
+        self.close()
+        frame = self.to_frame()
+        if path is not None:
+            if Path(path).suffix == '.parquet':
+                frame.to_parquet(path) # requires pyarrow
+            else:
+                frame.to_csv(path)
+        return frame
+
+
+class HourlyStore:
+    ''' Hourly system, ecology and economy results of many runs, one file per run and year:
+        {directory}/run={run}/year={year}.arrow
+
+    The files are Arrow IPC files (record batches of HOURLY_CHUNK hours, compressed) if pyarrow is installed,
+    otherwise files of the hourly input store (utilities.save_hourly, not compressed).
+    Both are read from memory maps, only the columns used are loaded (and decompressed).
+    The columns depend on the system of the run and year (e.g. a heat pump replacing a gas boiler),
+    the scans over runs and years skip the files without the requested column.
+    '''
+    def __init__(self, directory, format = None, compression = 'zstd'):
+        '''
+        Parameters
+        ----------
+        format : str
+            'arrow' or 'hourly', default: 'arrow' if pyarrow is installed
+        compression : str
+            compression of the Arrow files ('zstd', 'lz4' or None)
+        '''
+        self.directory = Path(directory)
+        self.format = format or ('arrow' if pa is not None else 'hourly')
+        if self.format == 'arrow' and pa is None:
+            raise ImportError("The arrow format of the hourly results store requires pyarrow")
+        self.compression = compression
+
+    def path(self, run, year):
+        return self.directory.joinpath(f'run={run}', f'year={year}.{self.format}')
+
+    def write(self, run, year, results_year):
+        ''' Write the hourly results of a year (dict of dataframes per category, see Simulator.simulate_year) '''
+        frame = pd.concat([results_year[category] for category in HOURLY_CATEGORIES], axis = 1).reset_index(drop = True)
+        path = self.path(run, year)
+        if self.format == 'hourly':
+            utilities.save_hourly(frame, path)
+            return path
+
+        path.parent.mkdir(parents = True, exist_ok = True)
+        table = pa.Table.from_pandas(frame, preserve_index = False)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        with pa.OSFile(str(tmp_path), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema, options = pa.ipc.IpcWriteOptions(compression = self.compression)) as writer:
+                writer.write_table(table, max_chunksize = HOURLY_CHUNK)
+        tmp_path.replace(path) # atomic, concurrent readers never see a partly written file
+        return path
+
+    def read(self, run, year, columns = None):
+        ''' Return the hourly results of a run and year (all columns or the given ones) as pandas df '''
+        path = self.path(run, year)
+        if self.format == 'hourly':
+            frame = utilities.open_hourly(path)
+            return frame if columns is None else frame[columns]
+
+        # column projection: only the buffers of the requested columns are read and decompressed
+        return pa.feather.read_table(str(path), columns = columns, memory_map = True).to_pandas()
+
+    def columns(self, run, year):
+        ''' Result columns stored for a run and year (from the file header or schema, no data is read) '''
+        path = self.path(run, year)
+        if self.format == 'hourly':
+            return list(utilities.open_hourly(path).columns)
+        return pa.ipc.open_file(pa.memory_map(str(path))).schema.names
+
+    def runs(self):
+        return sorted(path.name.split('=', 1)[1] for path in self.directory.glob('run=*'))
+
+    def years(self, run):
+        return sorted(int(path.stem.split('=', 1)[1]) for path in self.directory.joinpath(f'run={run}').glob(f'year=*.{self.format}'))
+
+    def scan(self, column, runs = None):
+        ''' Yield run, year and hourly values of a result column of all stored years that have the column, one file at a time '''
+        for run in runs or self.runs():
+            for year in self.years(run):
+                if column in self.columns(run, year):
+                    yield run, year, self.read(run, year, [column])[column].to_numpy()
+
+    def peaks(self, column, runs = None):
+        ''' Maximum hourly value of a result column per run and year, pandas series with index (run, year) '''
+        peaks = {(run, year) : np.nanmax(values) for run, year, values in self.scan(column, runs)}
+        return pd.Series(list(peaks.values()), index = pd.MultiIndex.from_tuples(list(peaks), names = ['run', 'year']), name = column, dtype = float)
+
+    def load_duration(self, column, runs = None):
+        ''' Load duration curve of a result column (hourly values in descending order) per run and year, pandas df with columns (run, year) '''
+        curves = {(run, year) : -np.sort(-values) for run, year, values in self.scan(column, runs)}
+        return pd.DataFrame(curves, columns = pd.MultiIndex.from_tuples(list(curves), names = ['run', 'year']))
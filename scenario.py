@@ -1,8 +1,66 @@
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 
+import registry
+
 class Eco2:
     ''' Economic and ecological calculation, and parameters
     '''
     def __init__(self, eco2_paths_filepath):
         self.CO2_budget = 50 # [t]
-        self.eco2_path = pd.read_csv(eco2_paths_filepath, index_col = "year") 
\ No newline at end of file
+        self.eco2_path = registry.eco2_path(eco2_paths_filepath) # Material properties
+
+    def get(self, column, year):
+        ''' Return the value of the cost or emission path in the given year '''
+        return self.eco2_path[column].at[year]
+
+class Eco2Ensemble:
+    ''' Several cost and emission paths (scenarios) evaluated at once.
+    get() returns one value per scenario, so emissions and costs calculated from annual energy totals
+    (see Simulator.simulate_year_annual) are broadcast along the scenario axis.
+    '''
+    def __init__(self, eco2_paths):
+        '''
+        Parameters
+        ----------
+        eco2_paths : dict
+            scenario name -> pandas df of the cost and emission path (index: year, columns as in Scenario.csv)
+        '''
+        self.CO2_budget = 50 # [t]
+        self.names = list(eco2_paths)
+        paths = list(eco2_paths.values())
+        # years and variables available in all scenarios
+        self.years = paths[0].index
+        self.columns = paths[0].columns
+        for path in paths[1:]:
+            self.years = self.years.intersection(path.index)
+            self.columns = self.columns.intersection(path.columns)
+        self.eco2_path = pd.DataFrame(index = self.years) # years of the game, see game.init_annual_results
+
+        # one array (years x scenarios) per variable
+        self.values = {column : np.stack([path.loc[self.years, column].to_numpy(dtype = float) for path in paths], axis = 1) for column in self.columns}
+        self.rows = {year : row for row, year in enumerate(self.years)}
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_files(cls, filepaths):
+        ''' One scenario per file (same format as Scenario.csv), the scenarios are named after the files '''
+        return cls({Path(filepath).stem : registry.eco2_path(filepath) for filepath in filepaths})
+
+    @classmethod
+    def from_columns(cls, filepath, separator = ':'):
+        ''' Several scenarios in one file, with one column per variable and scenario, e.g. "cost_gas [ct/kWh]:high" '''
+        df = registry.eco2_path(filepath)
+        eco2_paths = {}
+        for column in df.columns:
+            variable, name = column.rsplit(separator, 1)
+            eco2_paths.setdefault(name, pd.DataFrame(index = df.index))[variable] = df[column]
+        return cls(eco2_paths)
+
+    def get(self, column, year):
+        ''' Return the values of the cost or emission paths in the given year, one per scenario '''
+        return self.values[column][self.rows[year]]
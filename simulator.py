@@ -1,6 +1,65 @@
+import itertools
+import functools
+
+import numpy as np
 import pandas as pd
 
-import controller
+import results
+import utilities
+import building
+import system
+
+# annual economic results, stored in the first hour of the economy results
+ANNUAL_ECONOMY_KEYS = ["Event balance [Euro/a]", "Investment cost [Euro/a]", 'Revenues [Euro/a]', 'Expenses [Euro/a]', "Balance [Euro/a]"]
+
+COMFORT_KEYS = ["Comfort deviation [degC]"]
+
+# phase 1 results (hourly energy balance) per physical configuration, see Simulator.simulate_energy
+ENERGY_CACHE = utilities.LRUCache(maxsize = 32)
+
+# aggregates of the hourly energy balance (kilobytes) per physical configuration, see Simulator.simulate_aggregates
+AGGREGATE_CACHE = utilities.LRUCache(maxsize = 256)
+
+def component_classes():
+    ''' Component classes of the system module (all subclasses of Component) '''
+    classes, subclasses = [], system.Component.__subclasses__()
+    while subclasses:
+        component_class = subclasses.pop(0)
+        classes.append(component_class)
+        subclasses += component_class.__subclasses__()
+    return classes
+
+@functools.lru_cache(maxsize = None)
+def _component_annual_keys():
+    # result keys of the dispatch plans of all combinations of the component classes the controllers support
+    keys = []
+    classes = component_classes()
+    for n_components in range(1, len(classes) + 1):
+        for combination in itertools.combinations(classes, n_components):
+            my_system = system.System()
+            for component_class in combination:
+                my_system.add_component(component_class({'name' : component_class.__name__, 'type' : component_class.__name__}))
+            try:
+                plan = my_system.dispatch_plan()
+            except ValueError: # no controller for these components
+                continue
+            my_simulator = Simulator(None, None, my_system, None)
+            my_simulator.plan = plan
+            for category_keys in my_simulator.output_keys().values():
+                keys += category_keys
+    return tuple(dict.fromkeys(keys))
+
+def declared_annual_keys(my_system = None):
+    ''' Keys of the annual results (Simulator.simulate_year_annual) of all systems the game can create
+    from the component classes and controllers, of my_system (if given) and of the building and comfort results
+    '''
+    keys = list(building.ANNUAL_KEYS) + list(_component_annual_keys())
+    if my_system is not None and my_system.components:
+        my_simulator = Simulator(None, None, my_system, None)
+        my_simulator.plan = my_system.dispatch_plan()
+        for category_keys in my_simulator.output_keys().values():
+            keys += category_keys
+    return list(dict.fromkeys(keys + COMFORT_KEYS))
 
 class Simulator():
     def __init__(self, user, building, system, scenario):
@@ -11,9 +70,28 @@ class Simulator():
         
     
 
+    def output_keys(self):
+        ''' Keys of the hourly results per category, as declared by the dispatch plan '''
+        keys = dict(self.plan.outputs)
+        keys['economy'] = keys['economy'] + ANNUAL_ECONOMY_KEYS
+        return keys
+
+    def configuration_fingerprint(self):
+        ''' Fingerprint of everything the hourly energy balance depends on:
+        building and weather, set point and electricity profile of the user, system components
+        '''
+        return utilities.fingerprint(self.building.fingerprint(),
+                                     self.user.set_point_temperature,
+                                     utilities.array_hash(self.user.profile['el_hh [W]'].to_numpy()),
+                                     self.system.fingerprint())
+
     def one_step(self, year, Qdot_heat_load, P_el_hh, one_step_disturbances):
+        ''' Calculate energy flows, emissions and costs.
+        The inputs can be the values of a single hour or whole-year arrays (weather as DataFrame),
+        the controllers and components work element-wise on both.
+        '''
         # calculate energy
-        system_results = self.ctrl.control(Qdot_heat_load, P_el_hh, one_step_disturbances, self.system)
+        system_results = self.plan(Qdot_heat_load, P_el_hh, one_step_disturbances)
         # calculate eco2
         ecologic_results = self.system.calc_emissions(year, self.scenario, system_results)
         economic_results = self.system.calc_energy_cost(year, self.scenario, system_results)
@@ -21,47 +99,173 @@ class Simulator():
         results = {'system' : system_results, 'ecology' : ecologic_results, 'economy' : economic_results}
         return results
 
-    def simulate_year(self, year):
-        # select controller
-        self.ctrl = controller.select_controller(self.system)
+    def simulate_energy(self):
+        ''' Phase 1: hourly energy balance of the current physical configuration.
+        The energy balance does not depend on the year, it is only calculated again if the configuration changed.
+        Returns
+        -------
+        tuple
+            system results buffer (read only), annual energy totals dict, annual building results dict
+        '''
+        # controller and components, only compiled again if the system components changed
+        self.plan = self.system.dispatch_plan()
+        system_buffer, energy_totals, annual_building_results = ENERGY_CACHE.get(self.configuration_fingerprint(), self._simulate_energy)
+        return system_buffer, dict(energy_totals), dict(annual_building_results)
 
+    def _simulate_energy(self):
         # Building heat demand
-        hourly_heat_demand = self.building.calc(self.user)[1]
+        annual_building_results, hourly_heat_demand = self.building.calc(self.user)
         # User el profile
         hourly_el_demand = self.user.profile['el_hh [W]']
         # Disturbances
         disturbances = self.building.weather
-        
-        hours = hourly_heat_demand.index
-
-        results = {}
-        results['system'] = pd.DataFrame(index = hours)
-        results['economy'] = pd.DataFrame(index = hours)
-        results['ecology'] = pd.DataFrame(index = hours)
-        for hour in hours:
-            Qdot_heat_load = hourly_heat_demand.loc[hour]
-            P_el_hh = hourly_el_demand.loc[hour]
-            one_step_disturbances = disturbances.loc[hour]
-            one_step_results = self.one_step(year, Qdot_heat_load, P_el_hh, one_step_disturbances)
-            for category, values in one_step_results.items(): # system, ecology, economy
-                for key, value in values.items():
-                    results[category].at[hour, key] = value
-
-        # economic balance
-        #annual_economy_results = energy_costs.sum() # [Euro]
-        results["economy"].at[0, "Event balance [Euro/a]"] = self.user.event_economic_balance
-        results["economy"].at[0, "Investment cost [Euro/a]"] = self.user.action_economic_balance
+
+        # simulate all hours of the year in a single pass
+        system_buffer = results.ResultBuffer(self.plan.outputs['system'], len(hourly_heat_demand))
+        system_buffer.write(self.plan(hourly_heat_demand.to_numpy(), hourly_el_demand.to_numpy(), disturbances))
+        system_buffer.data.flags.writeable = False # shared by all years with this configuration
+
+        energy_totals = dict(zip(system_buffer.keys, np.nansum(system_buffer.data, axis = 1)))
+        return system_buffer, energy_totals, annual_building_results
+
+    def simulate_aggregates(self):
+        ''' Phase 1 in aggregate mode: the hourly energy balance of the current physical configuration is dispatched month by month
+        and only its aggregates (monthly sums, peaks, load histograms, see results.Aggregates) are kept.
+        Returns
+        -------
+        tuple
+            aggregates of the system results and the heat demand 'Heat demand [Wh]' (read only), annual building results dict
+        '''
+        self.plan = self.system.dispatch_plan()
+        aggregates, annual_building_results = AGGREGATE_CACHE.get(self.configuration_fingerprint(), self._simulate_aggregates)
+        return aggregates, dict(annual_building_results)
+
+    def _simulate_aggregates(self):
+        annual_building_results, hourly_heat_demand = self.building.calc(self.user)
+        heat_demand = hourly_heat_demand.to_numpy()
+        el_demand = self.user.profile['el_hh [W]'].to_numpy()
+        disturbances = self.building.weather
+
+        aggregates = results.Aggregates(self.plan.outputs['system'] + ['Heat demand [Wh]'])
+        for month, hours in enumerate(results.month_slices(len(heat_demand))):
+            weather = disturbances.iloc[hours]
+            weather.attrs = dict(disturbances.attrs, hours = hours) # part of the year, see Photovoltaic.calc_module_state
+            values = self.plan(heat_demand[hours], el_demand[hours], weather)
+            values['Heat demand [Wh]'] = heat_demand[hours]
+            aggregates.add(month, values)
+        for values in [aggregates.monthly, aggregates.peaks, aggregates.histograms]:
+            values.flags.writeable = False # shared by all years with this configuration
+        return aggregates, annual_building_results
+
+    def calc_annual_economy(self, energy_cost_total):
+        ''' Annual revenues, expenses and economic balance of the user [Euro/a].
+        The event and action balances of the user are reset.
+        '''
+        annual_economy_results = {}
+        annual_economy_results["Event balance [Euro/a]"] = self.user.event_economic_balance
+        annual_economy_results["Investment cost [Euro/a]"] = self.user.action_economic_balance
 
         # annual revenues and expenses
-        results["economy"].at[0, 'Revenues [Euro/a]'], results["economy"].at[0, 'Expenses [Euro/a]'] = self.user.calc_economy() # [Euro]
+        annual_economy_results['Revenues [Euro/a]'], annual_economy_results['Expenses [Euro/a]'] = self.user.calc_economy() # [Euro]
 
         # calculate economic balance
-        results["economy"].at[0, "Balance [Euro/a]"] = (results["economy"].at[0, 'Revenues [Euro/a]'] - results["economy"].at[0, 'Expenses [Euro/a]']\
-             - results['economy']['Energy cost total [Euro]'].sum() + self.user.event_economic_balance - self.user.action_economic_balance)
+        annual_economy_results["Balance [Euro/a]"] = (annual_economy_results['Revenues [Euro/a]'] - annual_economy_results['Expenses [Euro/a]']\
+             - energy_cost_total + self.user.event_economic_balance - self.user.action_economic_balance)
         self.user.event_economic_balance, self.user.action_economic_balance = 0, 0
+        return annual_economy_results
 
-        # ToDo! calc building results with actual heating power
-        results['building'] = self.building.calc(self.user)[0]
+    def calc_comfort(self):
         # ToDo! calc comfort deviation with actual room temperature
-        results['comfort'] = {"Comfort deviation [degC]" : self.user.comfort_temperature - self.user.set_point_temperature}    # [degC]
-        return results
\ No newline at end of file
+        return {"Comfort deviation [degC]" : self.user.comfort_temperature - self.user.set_point_temperature}    # [degC]
+
+    def simulate_year(self, year):
+        ''' Simulate the year, returns the hourly system, ecology and economy results (writable dataframes) '''
+        system_buffer, energy_totals, annual_building_results = self.simulate_energy()
+        n_hours = system_buffer.n_hours
+        keys = self.output_keys()
+
+        # Phase 2: emissions and costs of the year
+        ecology = results.ResultBuffer(keys['ecology'], n_hours)
+        ecology.write(self.system.calc_emissions(year, self.scenario, system_buffer.columns))
+        economy = results.ResultBuffer(keys['economy'], n_hours)
+        economy.write(self.system.calc_energy_cost(year, self.scenario, system_buffer.columns))
+
+        # economic balance, annual values are stored in the first hour
+        economy.write(self.calc_annual_economy(np.nansum(economy.columns['Energy cost total [Euro]'])), hours = 0)
+
+        # the system buffer is shared through ENERGY_CACHE (read-only), the caller gets a copy
+        results_year = {'system' : system_buffer.to_frame().copy(), 'ecology' : ecology.to_frame(), 'economy' : economy.to_frame()}
+        # ToDo! calc building results with actual heating power
+        results_year['building'] = annual_building_results
+        results_year['comfort'] = self.calc_comfort()
+        return results_year
+
+    def simulate_year_annual(self, year):
+        ''' Simulate the year, returns only the annual results (the sums of the hourly results of simulate_year).
+        Emissions and costs are linear in the energy and the prices are constant within a year,
+        so they are calculated from the annual energy totals (phase 2 takes microseconds).
+        The hourly results are never stored, see simulate_aggregates.
+        '''
+        aggregates, annual_building_results = self.simulate_aggregates()
+        energy_totals = {key : aggregates.totals()[key] for key in self.plan.outputs['system']}
+
+        # Phase 2: emissions and costs of the year
+        ecology = self.system.calc_emissions(year, self.scenario, energy_totals)
+        economy = self.system.calc_energy_cost(year, self.scenario, energy_totals)
+        economy.update(self.calc_annual_economy(economy['Energy cost total [Euro]']))
+
+        return {'building' : annual_building_results, 'system' : energy_totals, 'ecology' : ecology,
+                'economy' : economy, 'comfort' : self.calc_comfort()}
+
+    def simulate_year_aggregates(self, year):
+        ''' Simulate the year in aggregate mode, like simulate_year_annual with monthly results.
+        Returns
+        -------
+        tuple
+            dict of the annual results (see simulate_year_annual),
+            pandas df of the monthly system, ecology and economy results (index: month),
+            results.Aggregates of the system results and the heat demand (peaks, uncovered heat hours, load histograms)
+        '''
+        aggregates, annual_building_results = self.simulate_aggregates()
+        monthly_sums = aggregates.monthly_sums()
+        monthly_energy = {key : monthly_sums[key] for key in self.plan.outputs['system']}
+
+        # Phase 2: emissions and costs of the months, the prices are constant within a year
+        ecology = self.system.calc_emissions(year, self.scenario, monthly_energy)
+        economy = self.system.calc_energy_cost(year, self.scenario, monthly_energy)
+        monthly = pd.DataFrame({**monthly_energy, **ecology, **economy}, index = pd.RangeIndex(1, len(aggregates.monthly[0]) + 1, name = 'month'))
+
+        annual = {'building' : annual_building_results}
+        for category, values in [('system', monthly_energy), ('ecology', ecology), ('economy', economy)]:
+            annual[category] = {key : float(np.sum(value)) for key, value in values.items()}
+        annual['economy'].update(self.calc_annual_economy(annual['economy']['Energy cost total [Euro]']))
+        annual['comfort'] = self.calc_comfort()
+        return annual, monthly, aggregates
+
+    def simulate_year_hourly(self, year):
+        ''' Simulate the year, returns the annual results (like simulate_year_annual) and the hourly results (like simulate_year) '''
+        results_year = self.simulate_year(year)
+        annual = {'building' : results_year['building']}
+        for category in ['system', 'ecology', 'economy']:
+            annual[category] = results_year[category].sum().to_dict() # annual economy results are stored in the first hour
+        annual['comfort'] = results_year['comfort']
+        return annual, results_year
+
+    def simulate_scenarios(self, years):
+        ''' Annual emissions and costs of all scenarios of a scenario ensemble (scenario.Eco2Ensemble) from one physics pass.
+        Returns
+        -------
+        pandas df
+            annual ecology and economy results, index (scenario, year)
+        '''
+        names = self.scenario.names
+        columns = {}
+        for year in years:
+            annual = self.simulate_year_annual(year)
+            for category in ['ecology', 'economy']:
+                for key, value in annual[category].items():
+                    columns.setdefault(key, []).append(np.broadcast_to(value, (len(names),)))
+
+        index = pd.MultiIndex.from_product([names, list(years)], names = ['scenario', 'year'])
+        # (years x scenarios) -> scenario major order of the index
+        return pd.DataFrame({key : np.array(values).T.ravel() for key, values in columns.items()}, index = index)
@@ -0,0 +1,134 @@
+''' Sizing of the components (gas boiler, heat pump, PV system): investment, energy cost, CO2 emissions and uncovered heat
+of candidate nominal powers over the years of the game, and the cost-optimal and CO2-optimal size.
+
+The nominal power of the component is set to a column of candidate sizes, the controllers and components work element-wise,
+so one dispatch of the year (month by month) gives the results of all sizes (sizes x hours).
+
+usage:
+    python sizing.py --component GasBoiler --sizes 4 30 1                      # sizes from 4 to 30 kW in steps of 1 kW
+    python sizing.py --template HeatPumpAir --replace GasBoiler --sizes 4 20 0.5
+'''
+import copy
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import utilities as util
+import constants as c
+import controller
+import results
+import actions
+import montecarlo
+
+def sized_system(system, name, sizes):
+    ''' Copy of the system with the nominal power [kW] of the component set to the candidate sizes (column array) '''
+    sized = copy.deepcopy(system)
+    sized.components[name].power_nom = np.asarray(sizes, dtype = float)[:, np.newaxis]
+    return sized
+
+def dispatch(user, building, system):
+    ''' Dispatch the year month by month, the results are only kept as annual sums per size
+    Returns
+    -------
+    tuple
+        dict of the annual system results (result key -> value or array of the sizes), hours with uncovered heat (array of the sizes)
+    '''
+    plan = controller.select_controller(system)
+    heat_demand = building.calc(user)[1].to_numpy()
+    el_demand = user.profile['el_hh [W]'].to_numpy()
+    disturbances = building.weather
+
+    totals, uncovered_hours = dict.fromkeys(plan.outputs, 0), 0
+    for hours in results.month_slices(len(heat_demand)):
+        weather = disturbances.iloc[hours]
+        weather.attrs = dict(disturbances.attrs, hours = hours) # part of the year, see Photovoltaic.calc_module_state
+        values = plan.control(heat_demand[hours], el_demand[hours], weather)
+        for key in plan.outputs:
+            totals[key] = totals[key] + np.nansum(np.asarray(values[key], dtype = float), axis = -1)
+        uncovered_hours = uncovered_hours + np.count_nonzero(np.asarray(values['Uncovered heat [Wh]']) > 0, axis = -1)
+    return totals, uncovered_hours
+
+def size(user, building, system, scenario, name, sizes, years = None):
+    ''' Evaluate candidate sizes of a component of the system (the system is not changed)
+    Parameters
+    ----------
+    name: str
+        name of the component in the system
+    sizes: list
+        candidate nominal powers [kW], greater than zero
+    years: list
+        years the energy cost and CO2 emissions are summed over, default: START_YEAR to END_YEAR
+    Returns
+    -------
+    pandas df
+        index: nominal power [kW], columns: investment, energy and total cost [Euro], CO2 emissions [t] over the years,
+        annual uncovered heat [kWh/a] and hours with uncovered heat [h/a], annual system results
+    '''
+    sizes = np.asarray(sizes, dtype = float)
+    if (sizes <= 0).any():
+        raise ValueError("The candidate sizes have to be greater than zero")
+    sized = sized_system(system, name, sizes)
+    totals, uncovered_hours = dispatch(user, building, sized)
+
+    co2_emissions, energy_cost = 0, 0
+    for year in years or range(c.START_YEAR, c.END_YEAR + 1):
+        co2_emissions = co2_emissions + sized.calc_emissions(year, scenario, totals)['CO2 emissions total [t]']
+        energy_cost = energy_cost + sized.calc_energy_cost(year, scenario, totals)['Energy cost total [Euro]']
+    investment_cost = np.ravel(sized.components[name].calc_investment_cost())
+
+    table = pd.DataFrame({'Investment cost [Euro]' : investment_cost,
+                          'Energy cost [Euro]' : np.broadcast_to(energy_cost, sizes.shape),
+                          'Total cost [Euro]' : investment_cost + energy_cost,
+                          'CO2 emissions [t]' : np.broadcast_to(co2_emissions, sizes.shape),
+                          'Uncovered heat [kWh/a]' : np.broadcast_to(totals['Uncovered heat [Wh]'], sizes.shape) / 1000,
+                          'Uncovered hours [h/a]' : np.broadcast_to(uncovered_hours, sizes.shape)},
+                         index = pd.Index(sizes, name = 'power_nom [kW]'))
+    for key, value in totals.items():
+        table[key] = np.broadcast_to(value, sizes.shape)
+    return table
+
+def optimal_sizes(table, max_uncovered_hours = 0):
+    ''' Cost-optimal and CO2-optimal size [kW] of the sizes with at most max_uncovered_hours [h/a] of uncovered heat
+    Returns
+    -------
+    dict
+        'cost' : size with the lowest total cost, 'co2' : size with the lowest CO2 emissions (the cheapest of equal emissions)
+    '''
+    feasible = table[table['Uncovered hours [h/a]'] <= max_uncovered_hours]
+    if len(feasible) == 0:
+        raise ValueError(f"None of the sizes covers the heat load with at most {max_uncovered_hours} h/a uncovered heat")
+    by_co2 = np.lexsort((feasible['Total cost [Euro]'].to_numpy(), feasible['CO2 emissions [t]'].to_numpy()))
+    return {'cost' : feasible['Total cost [Euro]'].idxmin(), 'co2' : feasible.index[by_co2[0]]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = 'Cost-optimal and CO2-optimal nominal power of a component.')
+    parser.add_argument('--user', default = 'data/users/DefaultUser.yaml')
+    parser.add_argument('--building', default = 'data/buildings/DefaultBuilding.yaml')
+    parser.add_argument('--system', default = 'data/systems/Default_GasBoiler12kW.yaml')
+    parser.add_argument('--scenario', default = 'data/eco2_paths/Scenario.csv')
+    parser.add_argument('--component', default = None, help = 'name of the component of the system to size')
+    parser.add_argument('--template', default = None, help = 'component template (data/systems/components) added to the system and sized')
+    parser.add_argument('--replace', nargs = '*', default = [], help = 'names of the components removed from the system')
+    parser.add_argument('--sizes', type = float, nargs = 3, default = [2, 30, 1], metavar = ('START', 'STOP', 'STEP'), help = '[kW]')
+    parser.add_argument('--max-uncovered-hours', type = float, default = 0, help = '[h/a]')
+    args = parser.parse_args()
+
+    util.INTERACTIVE = False
+    configuration = montecarlo.load_configuration(args.user, args.building, args.system, args.scenario)
+    my_system = configuration['system']
+    name = args.component
+    if args.template:
+        component = actions.load_component(f'data/systems/components/{args.template}.yaml')
+        component.commission(c.START_YEAR)
+        for replaced in args.replace:
+            my_system.remove_component(replaced)
+        my_system.add_component(component)
+        name = component.name
+
+    start, stop, step = args.sizes
+    table = size(configuration['user'], configuration['building'], my_system, configuration['scenario'], name, np.arange(start, stop + step/2, step))
+    print(table.iloc[:, :6].to_string())
+    optimum = optimal_sizes(table, args.max_uncovered_hours)
+    print(f"\nCost-optimal size: {optimum['cost']:.1f} kW, CO2-optimal size: {optimum['co2']:.1f} kW")
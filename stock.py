@@ -0,0 +1,184 @@
+''' Building stocks: geometry, u-values and heat demand of many buildings as a columnar table.
+
+One row per building with the parameters of the building files (see data/buildings/DefaultBuilding.yaml),
+the location as columns latitude / longitude and the set point temperature as column set_point.
+The buildings with the same weather data (location and orientation offset) are calculated together in array operations,
+the formulas are the ones of Building.calc_geometry and Building.loss_coefficients applied to columns instead of scalars.
+
+usage:
+    my_stock = stock.sample_stock(10000, seed = 42)
+    annual_results, hourly_heat_demand = my_stock.calc()
+'''
+import types
+import argparse
+
+import numpy as np
+import pandas as pd
+import yaml
+
+import building
+import weather
+import registry
+import heatindex
+import sweep
+
+COMPONENTS = ['facade', 'roof', 'upper_ceiling', 'groundplate']
+WEATHER_KEYS = ['latitude', 'longitude', 'orientation_offset']
+
+# building parameters and values of a sampled stock with their probabilities, own assumptions
+SAMPLING = {'stories' : {1 : 0.3, 2 : 0.6, 3 : 0.1},
+            'neighbours' : {'detached' : 0.6, 'semi-detached' : 0.25, 'terraced' : 0.15},
+            'shape' : {'compact' : 0.7, 'elongated' : 0.3},
+            'basement' : {'none' : 0.2, 'unheated' : 0.6, 'partly heated' : 0.1, 'fully heated' : 0.1},
+            'attic' : {'none' : 0.3, 'unheated' : 0.3, 'partly heated' : 0.2, 'fully heated' : 0.2},
+            'dormers' : {'none' : 0.7, 'existing' : 0.3},
+            'construction_facade' : {'massive' : 0.8, 'wooden' : 0.2},
+            'construction_roof' : {'massive' : 0.3, 'wooden' : 0.7},
+            'construction_upper_ceiling' : {'massive' : 0.5, 'wooden' : 0.5},
+            'construction_groundplate' : {'massive' : 0.9, 'wooden' : 0.1}}
+
+def default_u_values(parameters):
+    ''' u-values [W/(m^2K)] of the building age classes and constructions of the table u_values.csv, like Building.get_u_values
+    Returns
+    -------
+    dict
+        u_value_facade, u_value_roof, u_value_upper_ceiling, u_value_groundplate, u_value_window arrays
+    '''
+    u_table = registry.u_values()
+    rows = u_table.index.get_indexer(parameters['bac'])
+    if (rows == -1).any():
+        raise KeyError(f"Unknown building age classes {sorted(set(parameters['bac'][rows == -1]))}")
+
+    columns = {component : component + '_' + parameters[f'construction_{component}'].astype(str) for component in COMPONENTS}
+    columns['window'] = 'window_' + parameters['type_window'].astype(str).map(building.WINDOW_CONSTRUCTIONS)
+    u_values = {}
+    for component, column in columns.items():
+        u_value = u_table.to_numpy()[rows, u_table.columns.get_indexer(column)]
+        if np.isnan(u_value).any():
+            raise ValueError(f"No {component} u-value for some of the construction types / building age classes")
+        u_values[f'u_value_{component}'] = u_value
+    return u_values
+
+class Stock:
+    def __init__(self, buildings):
+        ''' buildings: pandas df, one building per row, see module docstring
+        The u-value columns (u_value_facade, ...) are optional, missing values are taken from u_values.csv.
+        '''
+        self.buildings = buildings.reset_index(drop = True)
+        if 'set_point' not in self.buildings:
+            self.buildings['set_point'] = 20.0
+
+    @classmethod
+    def from_csv(cls, path):
+        return cls(pd.read_csv(path))
+
+    @classmethod
+    def from_building_files(cls, paths):
+        ''' Create a stock of the buildings of the given building files '''
+        rows = []
+        for path in paths:
+            with open(path, "r") as stream:
+                params = yaml.safe_load(stream)
+            params.update(params.pop('location'))
+            if params.get('use_default_u_values') == 1: # u-values of the file are replaced by the defaults
+                for component in COMPONENTS + ['window']:
+                    params[f'u_value_{component}'] = np.nan
+            rows.append(params)
+        return cls(pd.DataFrame(rows))
+
+    def __len__(self):
+        return len(self.buildings)
+
+    def groups(self):
+        ''' Yield the weather data and the building columns (SimpleNamespace of arrays) of the buildings with the same weather data '''
+        for (latitude, longitude, orientation_offset), rows in self.buildings.groupby(WEATHER_KEYS, sort = False):
+            columns = types.SimpleNamespace(**{key : values.to_numpy() for key, values in rows.items()})
+            columns.orientation_offset = orientation_offset
+            columns.location = {'latitude' : latitude, 'longitude' : longitude}
+            columns.weather = weather.load_weather(columns.location, orientation_offset)
+
+            building.Building.calc_geometry(columns)
+            for key, u_value in default_u_values(rows).items():
+                given = rows[key].to_numpy(dtype = float) if key in rows else np.full(len(rows), np.nan)
+                setattr(columns, key, np.where(np.isnan(given), u_value, given))
+            yield rows.index, columns
+
+    def calc(self, chunksize = 256):
+        ''' Heat demand of all buildings
+        Returns
+        -------
+        tuple
+            pandas df of the annual results per building (keys of Building.calc and the maximum heat load),
+            pandas series of the hourly heat demand of the whole stock [W]
+        '''
+        annual_results, hourly_heat_demand = [], 0
+        for index, columns in self.groups():
+            H = {key : np.broadcast_to(np.asarray(value, dtype = float), (len(index),)) for key, value in building.Building.loss_coefficients(columns).items()}
+            hourly_weather = heatindex.HeatDemandIndex.of(columns).hourly # same irradiance as Building.calc
+            group_results, group_hourly = sweep.heat_demand(H, columns.set_point, hourly_weather, chunksize)
+            annual_results.append(group_results.set_index(index))
+            hourly_heat_demand = hourly_heat_demand + group_hourly
+        return pd.concat(annual_results).sort_index(), pd.Series(hourly_heat_demand, name = 'Heat demand [W]')
+
+    def geometry(self):
+        ''' Dimensions, areas and volume of all buildings, see Building.calc_geometry '''
+        keys = ['n_heated_stories', 'area_story_heated', 'area_ground', 'area_roof', 'area_upper_ceiling', 'area_facade_story',
+                'area_window', 'area_basement_wall', 'area_facade', 'volume_air']
+        frames = [pd.DataFrame({key : getattr(columns, key) for key in keys}, index = index) for index, columns in self.groups()]
+        return pd.concat(frames).sort_index()
+
+
+def sample_stock(n_buildings, bac_shares = None, location = None, seed = None):
+    ''' Sample a synthetic building stock
+    Parameters
+    ----------
+    bac_shares: dict
+        building age class -> share of the buildings, default: equal shares of all classes of the u-value table
+    location: dict
+        latitude and longitude of all buildings, default: location of DefaultBuilding
+    Returns
+    -------
+    Stock
+    '''
+    rng = np.random.default_rng(seed)
+    u_table = registry.u_values()
+    bac_shares = bac_shares or {bac : 1 for bac in u_table.index}
+    location = location or {'latitude' : 48, 'longitude' : 7}
+
+    shares = np.array(list(bac_shares.values()), dtype = float)
+    buildings = pd.DataFrame({'bac' : rng.choice(list(bac_shares), size = n_buildings, p = shares / shares.sum())})
+    for key, probabilities in SAMPLING.items():
+        buildings[key] = rng.choice(list(probabilities), size = n_buildings, p = list(probabilities.values()))
+    buildings['area_floor'] = np.clip(rng.lognormal(np.log(120), 0.35, n_buildings), 50, 400).round() # [m^2]
+    buildings['story_height'] = rng.uniform(2.4, 2.8, n_buildings).round(1) # [m]
+
+    # window types with a u-value for the building age class
+    buildings['type_window'] = 0
+    for bac, rows in buildings.groupby('bac').groups.items():
+        available = [int(type) for type, construction in building.WINDOW_CONSTRUCTIONS.items() if not np.isnan(u_table.at[bac, f'window_{construction}'])]
+        buildings.loc[rows, 'type_window'] = rng.choice(available, size = len(rows))
+
+    buildings['orientation_offset'] = 0 # [deg]
+    buildings['g_value_window'] = 0.75 # [-]
+    buildings['shading_window'] = 0.1 # [-]
+    buildings['ventilation_rate'] = 0.2 # [1/h]
+    buildings['infiltration_rate'] = 0.2 # [1/h]
+    buildings['latitude'], buildings['longitude'] = location['latitude'], location['longitude']
+    buildings['set_point'] = 20.0 # [degC]
+    return Stock(buildings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = 'Heat demand of a building stock.')
+    parser.add_argument('--stock', default = None, help = 'csv file with one building per row, a sampled stock if not given')
+    parser.add_argument('-n', '--buildings', type = int, default = 10000, help = 'number of buildings of a sampled stock')
+    parser.add_argument('--seed', type = int, default = None)
+    parser.add_argument('--output', default = None, help = 'csv file for the annual results of all buildings')
+    args = parser.parse_args()
+
+    my_stock = Stock.from_csv(args.stock) if args.stock else sample_stock(args.buildings, seed = args.seed)
+    annual_results, hourly_heat_demand = my_stock.calc()
+    if args.output:
+        pd.concat([my_stock.buildings, annual_results], axis = 1).to_csv(args.output, index = False)
+    print(annual_results.describe().to_string())
+    print(f"\nMaximum heat load of the stock: {hourly_heat_demand.max()/1e6:.2f} MW")
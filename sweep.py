@@ -0,0 +1,121 @@
+''' Parameter sweeps of the building heat demand: evaluate many renovation variants of one building at once.
+
+The variants are the rows of a parameter table (see grid), the heat demand of all variants is calculated
+as one 2-D array (variants x hours) instead of one Building.calc per variant.
+
+usage:
+    parameters = sweep.grid(facade = [0, 8, 16], roof = [0, 20], window = ['1', '2', '3'], set_point = [19, 20, 21])
+    results = sweep.sweep(my_building, me, parameters)
+'''
+import copy
+
+import numpy as np
+import pandas as pd
+
+import actions
+import heatindex
+
+# parameters of a sweep, missing parameters keep the value of the building resp. user
+PARAMETERS = {'facade' : 'insulation thickness [cm]',
+              'roof' : 'insulation thickness [cm]',
+              'upper_ceiling' : 'insulation thickness [cm]',
+              'groundplate' : 'insulation thickness [cm]',
+              'window' : 'window type, see actions.WINDOW_TYPES',
+              'ventilation_rate' : '[1/h]',
+              'set_point' : 'set point temperature [degC]'}
+
+def grid(**axes):
+    ''' Return the parameter table of all combinations of the given parameter values, see PARAMETERS '''
+    unknown = set(axes) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters {sorted(unknown)}")
+    return pd.MultiIndex.from_product(list(axes.values()), names = list(axes.keys())).to_frame(index = False)
+
+def variant_coefficients(building, parameters):
+    ''' Heat loss coefficients of all variants, dict of arrays (one value per row of parameters), see Building.loss_coefficients '''
+    variants = copy.copy(building) # shallow copy, shares the weather data
+    for component in actions.INSULATION_COMPONENTS.values():
+        if component in parameters:
+            u_value = getattr(building, f'u_value_{component}')
+            setattr(variants, f'u_value_{component}', actions.insulated_u_value(u_value, parameters[component].to_numpy(dtype = float)))
+    if 'window' in parameters:
+        window_types = parameters['window'].astype(str)
+        u_values = {type : actions.window_u_value(type) for type in window_types.unique()}
+        variants.u_value_window = window_types.map(u_values).to_numpy(dtype = float)
+    if 'ventilation_rate' in parameters:
+        variants.ventilation_rate = parameters['ventilation_rate'].to_numpy(dtype = float)
+
+    n_variants = len(parameters)
+    return {term : np.broadcast_to(np.asarray(value, dtype = float), (n_variants,)) for term, value in variants.loss_coefficients().items()}
+
+def sweep(building, user, parameters, chunksize = 256):
+    ''' Annual heat demand and losses of all variants.
+    Parameters
+    ----------
+    parameters: pandas df
+        one variant per row, columns see PARAMETERS
+    chunksize: int
+        number of variants per 2-D array, limits the memory use to about 4 * chunksize * 70 kB
+    Returns
+    -------
+    pandas df
+        parameters and annual results (keys of Building.calc and the maximum heat load) of all variants
+    '''
+    parameters = parameters.reset_index(drop = True)
+    H = variant_coefficients(building, parameters)
+    set_point = parameters['set_point'].to_numpy(dtype = float) if 'set_point' in parameters else float(user.set_point_temperature)
+    weather = heatindex.HeatDemandIndex.of(building).hourly # same irradiance as Building.calc
+    annual_results, _ = heat_demand(H, set_point, weather, chunksize)
+    return pd.concat([parameters, annual_results], axis = 1)
+
+def heat_demand(H, set_point, weather, chunksize = 256):
+    ''' Heat demand of many buildings or variants with the same weather data as one 2-D array (buildings x hours) per chunk
+    Parameters
+    ----------
+    H: dict
+        heat loss coefficients, arrays with one value per building, see Building.loss_coefficients
+    set_point: float or array
+        set point temperature [degC]
+    weather: dict
+        hourly T_amb, T_ground and G arrays, see HeatDemandIndex.hourly
+    Returns
+    -------
+    tuple
+        pandas df of the annual results per building, array of the total hourly heat demand of all buildings [W]
+    '''
+    n_buildings = len(H['ventilation'])
+    set_point = np.broadcast_to(np.asarray(set_point, dtype = float), (n_buildings,))
+    H_amb = sum(H[term] for term in heatindex.AMBIENT_TERMS) # [W/K]
+    H_adj = sum(H[term] for term in heatindex.ADJACENT_TERMS) # [W/K]
+
+    dT_sum, dT_ground_sum = np.empty(n_buildings), np.empty(n_buildings)
+    annual_heat_demand, heat_load_max = np.empty(n_buildings), np.empty(n_buildings)
+    hourly_total = np.zeros(len(weather['T_amb'])) # [W]
+    for start in range(0, n_buildings, chunksize):
+        rows = slice(start, start + chunksize)
+        dT = set_point[rows, None] - weather['T_amb'] # [degC] buildings x hours
+        dT_ground = set_point[rows, None] - weather['T_ground'] # [degC]
+        dT_adj = set_point[rows, None] - H['T_adj [degC]'][rows, None] # [degC]
+        heatdemand = H_amb[rows, None] * dT + H['ground heated'][rows, None] * dT_ground + H_adj[rows, None] * dT_adj \
+                     - H['solar aperture [m^2]'][rows, None] * weather['G'] # [W]
+        dT_sum[rows], dT_ground_sum[rows] = dT.sum(axis = 1), dT_ground.sum(axis = 1) # [Kh]
+        annual_heat_demand[rows], heat_load_max[rows] = heatdemand.sum(axis = 1), heatdemand.max(axis = 1) # [Wh], [W]
+        hourly_total += heatdemand.sum(axis = 0)
+
+    n_hours = len(weather['T_amb'])
+    dT_adj_sum = n_hours * (set_point - H['T_adj [degC]']) # [Kh]
+    transmission = {term : H[term] * dT_sum for term in ['facade', 'window', 'roof heated']} # [Wh/a]
+    transmission.update({term : H[term] * dT_adj_sum for term in heatindex.ADJACENT_TERMS})
+    transmission['ground heated'] = H['ground heated'] * dT_ground_sum
+
+    annual_results = pd.DataFrame({'Annual heat demand [kWh/a]' : annual_heat_demand/1000,
+                                   'Maximum heat load [kW]' : heat_load_max/1000,
+                                   'Transmission losses [kWh/a]' : sum(transmission.values())/1000,
+                                   'Transmission losses facade [kWh/a]' : transmission['facade']/1000,
+                                   'Transmission losses roof [kWh/a]' : (transmission['roof heated'] + transmission['roof unheated'])/1000,
+                                   'Transmission losses ground [kWh/a]' : (transmission['ground heated'] + transmission['ground unheated'])/1000,
+                                   'Transmission losses window [kWh/a]' : transmission['window']/1000,
+                                   'Ventilation losses [kWh/a]' : H['ventilation'] * dT_sum/1000,
+                                   'Infiltration losses [kWh/a]' : H['infiltration'] * dT_sum/1000,
+                                   'Solar gains [kWh/a]' : H['solar aperture [m^2]'] * weather['G'].sum()/1000})
+    return annual_results, hourly_total
@@ -3,12 +3,22 @@ import math
 import pandas as pd
 import numpy as np
 
-from utilities import calc_irradiance_on_tilted_plane
+import utilities
+from utilities import calc_irradiance_on_tilted_plane, LRUCache
 import constants as c
+import controller
+
+# full-year plane-of-array irradiance and module temperature per (tilt angle, azimuth angle, weather source)
+POA_CACHE = LRUCache(maxsize = 16)
 
 class System:
-    def __init__(self, system_path):
+    def __init__(self, system_path = None):
+        ''' Load the components of the system parameter file, an empty system if system_path is None (see add_component) '''
         self.components = {}
+        self.revision = 0 # incremented on every change of the components, see dispatch_plan()
+        self._dispatch_plan = None
+        if system_path is None:
+            return
         try:
             # read system parameter file
             with open(system_path, "r") as stream:
@@ -27,6 +37,25 @@ class System:
             pass
 
 
+    def add_component(self, component):
+        self.components[component.name] = component
+        self.revision += 1
+
+    def remove_component(self, component_name):
+        component = self.components.pop(component_name, None)
+        self.revision += 1
+        return component
+
+    def dispatch_plan(self):
+        ''' Return the dispatch plan of the system, it is only rebuilt if components were added or removed '''
+        if self._dispatch_plan is None or self._dispatch_plan.revision != self.revision:
+            self._dispatch_plan = controller.DispatchPlan(self)
+        return self._dispatch_plan
+
+    def fingerprint(self):
+        ''' Fingerprint of the parameters of all components '''
+        return utilities.fingerprint([(name, component.__dict__) for name, component in self.components.items()])
+
     def write_yaml(self, path):
         dict = {}
         for component_name, component_instance in self.components.items():
@@ -36,9 +65,19 @@ class System:
             yaml.dump(dict, f)
 
     
+    def emission_outputs(self):
+        ''' Keys of the results returned by calc_emissions() '''
+        keys = [component.emission for component in self.components.values()]
+        return keys + ["CO2 emissions el household [t]", 'CO2 emissions total [t]']
+
+    def cost_outputs(self):
+        ''' Keys of the results returned by calc_energy_cost() '''
+        keys = [component.cost for component in self.components.values()]
+        return keys + ["Household El. cost [Euro]", 'Energy cost total [Euro]']
+
     def calc_emissions(self, year, scenario, system_results):
-        spec_co2_gas = scenario.eco2_path['spec_CO2_gas [g/kWh]'].at[year]
-        spec_co2_el = scenario.eco2_path['spec_CO2_el [g/kWh]'].at[year]
+        spec_co2_gas = scenario.get('spec_CO2_gas [g/kWh]', year)
+        spec_co2_el = scenario.get('spec_CO2_el [g/kWh]', year)
         spec_co2 = {'gas' : spec_co2_gas, 'el' : spec_co2_el}
 
         res = {}
@@ -58,9 +97,9 @@ class System:
         return res 
 
     def calc_energy_cost(self, year, scenario, system_results):
-        spec_cost_gas = scenario.eco2_path['cost_gas [ct/kWh]'].at[year]
-        spec_cost_el_hh = scenario.eco2_path['cost_el_hh [ct/kWh]'].at[year]
-        spec_cost_el_hp = scenario.eco2_path['cost_el_hp [ct/kWh]'].at[year]
+        spec_cost_gas = scenario.get('cost_gas [ct/kWh]', year)
+        spec_cost_el_hh = scenario.get('cost_el_hh [ct/kWh]', year)
+        spec_cost_el_hp = scenario.get('cost_el_hp [ct/kWh]', year)
 
         # find PV system, note only the last component with type Photovoltaic will be used!
         for component, params in self.components.items():
@@ -70,8 +109,9 @@ class System:
                     pv_system.feedin_tariff_start = year
                     old_tariff = pv_system.feedin_tariff
                     pv_feedin_tariff = pv_system.calc_feedin_tariff() 
+                    pv_system.feedin_tariff = pv_feedin_tariff
                     print(f"The feed-in tariff payment period of your PV system is expired: {old_tariff:.2f} ct/kWh -> {pv_feedin_tariff:.2f} ct/kWh\n")
-                    input("    ENTER to continue")
+                    utilities.pause("    ENTER to continue")
                 else:
                     pv_feedin_tariff = pv_system.feedin_tariff
             else:
@@ -108,6 +148,10 @@ class Component:
                 print(f"    - {key}, {value}")
             setattr(self, key, value)
 
+    def commission(self, year):
+        ''' Put a component into operation that was added in the given year without user interaction (see configure) '''
+        self.construction_year = year
+
 class GasBoiler(Component):
     def __init__(self, params):
         Component.__init__(self, params)
@@ -138,11 +182,14 @@ class GasBoiler(Component):
         return energy_cost
 
     def calc_investment_cost(self):
-        cost = self.power_nom * self.cost_value_a * math.pow(self.power_nom, self.cost_value_b)
+        cost = self.power_nom * self.cost_value_a * np.float_power(self.power_nom, self.cost_value_b) # element-wise for candidate sizes, see sizing
         return cost
     
 
 class Photovoltaic(Component): 
+    u_pv = 12.0     #PV voltage [V]
+    c_th_pv = 0.5   #thermal capacity of PV module [kJ/kgK]
+
     def __init__(self, params):
         Component.__init__(self, params)
         self.energy = "PV El. Production [Wh]"
@@ -168,6 +215,11 @@ class Photovoltaic(Component):
         azimuth_angles = {'S':0, 'SW':45, 'W':90, 'NW':135, 'N':180, 'NE':-135, 'E':-90, 'SE':-45 }
         self.azimuth_angle = azimuth_angles[orientation_input]
 
+    def commission(self, year):
+        self.construction_year = year
+        self.feedin_tariff_start = year
+        self.feedin_tariff = self.calc_feedin_tariff()
+
     def calc_feedin_tariff(self):
         ''' Calculate the constant feed-in tariff for the PV System based on its year of construction.
         Returns
@@ -190,6 +242,46 @@ class Photovoltaic(Component):
 
 
 
+    def calc_module_state(self, weather):
+        ''' calculate irradiance on the tilted PV modules and module temperature
+        The full-year values are calculated once per tilt angle, azimuth angle and weather source,
+        single hours (weather rows) and parts of the year are looked up in the cached full-year arrays.
+        Other row selections of the weather data are calculated without the cache.
+        Parameters
+        ----------
+        weather : pandas_df or pandas_series
+            weather data of the whole year or of a single hour, see calc_energy
+        Returns
+        -------
+        tuple
+            irradiance on the tilted plane [W/m^2], temperature of the PV modules [degC]
+        '''
+        key = (self.tilt_angle, self.azimuth_angle, weather.attrs.get('source'))
+        if key[2] is None: # unknown weather source, nothing to cache
+            return self._module_state(weather)
+        if isinstance(weather, pd.DataFrame) and 'hours' in weather.attrs: # part of the year, e.g. a month (see Simulator.simulate_aggregates)
+            if key not in POA_CACHE:
+                return self._module_state(weather)
+            irradiance_tilted, temp_pv = POA_CACHE.get(key, None)
+            return irradiance_tilted[weather.attrs['hours']], temp_pv[weather.attrs['hours']]
+        if isinstance(weather, pd.DataFrame):
+            if len(weather) != weather.attrs.get('n_hours'): # not the full year (the attrs are carried over by iloc/loc)
+                return self._module_state(weather)
+            return POA_CACHE.get(key, lambda: self._module_state(weather))
+        if key in POA_CACHE: # single hour of an already calculated year
+            irradiance_tilted, temp_pv = POA_CACHE.get(key, None)
+            return irradiance_tilted[weather.name], temp_pv[weather.name]
+        return self._module_state(weather)
+
+    def _module_state(self, weather):
+        # calculate irradiance on tilted plane
+        irradiance_tilted = calc_irradiance_on_tilted_plane(weather, self.tilt_angle, self.azimuth_angle)
+        temp_pv = weather['T_amb [degC]'] + self.c_th_pv * irradiance_tilted / self.u_pv # temperature of PV module [degC]
+        if isinstance(weather, pd.DataFrame):
+            irradiance_tilted, temp_pv = irradiance_tilted.to_numpy(), temp_pv.to_numpy()
+            irradiance_tilted.flags.writeable, temp_pv.flags.writeable = False, False # shared by all PV systems with this configuration
+        return irradiance_tilted, temp_pv
+
     def calc_energy(self, weather):
         ''' calculate PV power
         Parameters
@@ -206,29 +298,24 @@ class Photovoltaic(Component):
             power produced by the PV modules [W]
         '''
 
-        # calculate irradiance on tilted plane
-        irradiance_tilted = calc_irradiance_on_tilted_plane(weather, self.tilt_angle, self.azimuth_angle)
-
-        temp_amb = weather['T_amb [degC]']
+        # irradiance on tilted plane and module temperature
+        irradiance_tilted, temp_pv = self.calc_module_state(weather)
 
         #constant parameters
         a0 = 0.8249     #constant eff. parameter
         a1 = 0.0007     #linear eff. parameter
         a2 = -1E-6      #quadratic eff. parameter
         a3 = 4E-10      #cubic eff. parameter
-        u_pv = 12.0     #PV voltage [V]
-        c_th_pv = 0.5   #thermal capacity of PV module [kJ/kgK]
         area_spec = 6.5 #specific area of PV module [m²/kW]
         irrad_norm = 1.0#standard irradiance [kW/m²]
         temp_stc = 25   #standard test condition temperature [°C]
         
-        if self.power_nom != 0:
+        if np.any(self.power_nom != 0): # power_nom can be an array of candidate sizes, see sizing
             #eta = a0 + a1*irradiance_tilted + a2* irradiance_tilted.pow(2) + a3* irradiance_tilted.pow(3) # efficiency curve
             eta = a0 + a1*irradiance_tilted + a2* np.power(irradiance_tilted, 2) + a3* np.power(irradiance_tilted, 3) # efficiency curve
             area_total = area_spec * self.power_nom # total area [m²]
             eta_nom = self.power_nom / (irrad_norm * area_total) # nominal efficiency [-]
             eta = eta * self.efficiency_param * eta_nom # efficiency
-            temp_pv = temp_amb + c_th_pv * irradiance_tilted / u_pv # temperature of PV module [degC]
             power_pv_opt = eta * irradiance_tilted / 1000 * area_total # PV power without temperature losses [kW]
             power = power_pv_opt * (1 - self.neg_temp_coeff/100 * (temp_pv - temp_stc)) * 1000 # PV power [W]
         else:
@@ -245,7 +332,7 @@ class Photovoltaic(Component):
         return energy_cost
     
     def calc_investment_cost(self):
-        cost = self.power_nom * self.cost_value_a * math.pow(self.power_nom, self.cost_value_b)
+        cost = self.power_nom * self.cost_value_a * np.float_power(self.power_nom, self.cost_value_b) # element-wise for candidate sizes, see sizing
         return cost
 
 class HeatPumpAir(Component):
@@ -295,8 +382,8 @@ class HeatPumpAir(Component):
         #calculate COP
         cop = self.c_eff_const + self.c_eff_lin * delta_temp + self.c_eff_quad * np.power(delta_temp,2)
         
-        #calculate electrical power of the heat pump
-        power_el = heat_demand / cop
+        #calculate electrical power of the heat pump (element-wise, also for the heat of candidate sizes, see sizing)
+        power_el = heat_demand / np.asarray(cop)
         return power_el
 
     def calc_emissions(self, energy, spec_co2):
@@ -308,5 +395,5 @@ class HeatPumpAir(Component):
         return energy_cost
 
     def calc_investment_cost(self):
-        cost = self.power_nom * self.cost_value_a * math.pow(self.power_nom, self.cost_value_b)
+        cost = self.power_nom * self.cost_value_a * np.float_power(self.power_nom, self.cost_value_b) # element-wise for candidate sizes, see sizing
         return cost
\ No newline at end of file
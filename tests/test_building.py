@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import user
+import building
+
+
+class TestBuilding(unittest.TestCase):
+    def setUp(self):
+        self.building_path = 'data/buildings/DefaultBuilding.yaml'
+        self.my_building = building.Building(self.building_path)
+
+    def test_weather_cache(self):
+        ''' Test if the cached weather data equals the freshly derived weather data'''
+        latitude, longitude = self.my_building.location['latitude'], self.my_building.location['longitude']
+        derived_weather = self.my_building.derive_weather(f"data/weather/TMY_lat{latitude}_lon{longitude}.json", latitude, longitude)
+        cached_weather = building.Building(self.building_path).weather
+        pd.testing.assert_frame_equal(derived_weather, cached_weather)
+
+    def test_calc_cache(self):
+        ''' Test if the heat demand is only calculated again after a parameter changed'''
+        me = user.User('data/users/DefaultUser.yaml')
+        building.CALC_CACHE.clear()
+        annual_results, heatdemand = self.my_building.calc(me)
+        self.assertEqual(self.my_building.calc(me)[0], annual_results)
+        self.assertEqual(building.CALC_CACHE.info()['hits'], 1)
+        self.assertFalse(np.shares_memory(self.my_building.calc(me)[1].to_numpy(), heatdemand.to_numpy())) # the cached series is not handed out
+        self.my_building.ventilation_rate *= 2
+        self.assertGreater(self.my_building.calc(me)[0]['Ventilation losses [kWh/a]'], annual_results['Ventilation losses [kWh/a]'])
+        me.set_point_temperature -= 2
+        self.assertLess(self.my_building.calc(me)[1].sum(), heatdemand.sum())
+        self.assertEqual(building.CALC_CACHE.info()['misses'], 3)
+
+    def test_building_file_written_on_change(self):
+        ''' Test if the default u-values are only written to the building file if they changed'''
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory)
+        building_path = directory.joinpath('Building.yaml')
+        shutil.copyfile(self.building_path, building_path)
+        building.Building(building_path)
+        mtime = os.stat(building_path).st_mtime_ns
+        building.Building(building_path)
+        self.assertEqual(os.stat(building_path).st_mtime_ns, mtime)
+
+        text = building_path.read_text().replace('bac: 1958-1968', 'bac: 1984-1994')
+        building_path.write_text(text)
+        self.assertEqual(building.Building(building_path).u_value_facade, 0.6)
+        self.assertIn('u_value_facade: 0.6 ', building_path.read_text())
+        self.assertIn('# [m^2] heated living area', building_path.read_text())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+import utilities as util
+import constants as c
+import user
+import building
+import system
+import scenario
+import game
+import batch
+import montecarlo
+
+
+class TestGame(unittest.TestCase):
+    def setUp(self):
+        util.INTERACTIVE = False
+        self.me = user.User('data/users/DefaultUser.yaml')
+        self.my_building = building.Building('data/buildings/DefaultBuilding.yaml')
+        self.my_system = system.System('data/systems/Default_GasBoiler12kW.yaml')
+        self.my_scenario = scenario.Eco2('data/eco2_paths/Scenario.csv')
+
+    def test_play_action_plan(self):
+        ''' Test if a headless game carries out the planned actions'''
+        action_plan = batch.load_action_plan('data/actions/ExamplePlan.yaml')
+        annual_results, reason = game.play(self.me, self.my_building, self.my_system, self.my_scenario, action_plan)
+        self.assertIn('HeatPumpAir', self.my_system.components)
+        self.assertNotIn('GasBoiler', self.my_system.components)
+        self.assertGreater(annual_results.at[2030, 'Investment cost [Euro/a]'], 0)
+        self.assertIsNone(reason) # the plan wins the game without events
+        self.assertFalse(annual_results.loc[c.START_YEAR:c.END_YEAR, 'CO2 Budget [t]'].isna().any())
+        self.assertGreater(annual_results.at[c.END_YEAR, 'CO2 Budget [t]'], 0)
+        self.assertGreater(annual_results.at[c.END_YEAR, 'Bank Deposit [Euro]'], 0)
+
+    def test_trajectory_reproducible(self):
+        ''' Test if a Monte Carlo trajectory is reproducible from its seed and leaves the configuration unchanged'''
+        configuration = {'user' : self.me, 'building' : self.my_building, 'system' : self.my_system,
+                         'scenario' : self.my_scenario, 'action_plan' : {}}
+        ventilation_rate = self.my_building.ventilation_rate
+        seed = montecarlo.trajectory_seeds(42, 1)[0]
+        self.assertEqual(montecarlo.play_trajectory(configuration, seed), montecarlo.play_trajectory(configuration, seed))
+        self.assertEqual(self.my_building.ventilation_rate, ventilation_rate)
+
+
+if __name__ == '__main__':
+    unittest.main()
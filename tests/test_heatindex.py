@@ -0,0 +1,33 @@
+import unittest
+
+import user
+import building
+import heatindex
+
+
+class TestHeatDemandIndex(unittest.TestCase):
+    def setUp(self):
+        self.me = user.User('data/users/DefaultUser.yaml')
+        self.my_building = building.Building('data/buildings/DefaultBuilding.yaml')
+        self.index = heatindex.HeatDemandIndex.of(self.my_building)
+
+    def test_equals_calc(self):
+        ''' Test if the index gives the same annual results as the hourly calculation'''
+        for set_point in [self.me.set_point_temperature, 17]:
+            self.me.set_point_temperature = set_point
+            annual_results, heatdemand = self.my_building.calc(self.me)
+            index_results = self.index.annual_results(self.my_building.loss_coefficients(), set_point)
+            for key, value in annual_results.items():
+                self.assertAlmostEqual(index_results[key], value, delta = 1e-9 * abs(value))
+
+            # only hours with a positive heat demand
+            clipped = self.index.heat_demand(self.my_building.loss_coefficients(), set_point, clip = True)
+            self.assertAlmostEqual(clipped, heatdemand.clip(lower = 0).sum()/1000, delta = 1e-9 * clipped)
+
+    def test_index_shared(self):
+        ''' Test if buildings with the same weather data share the index'''
+        self.assertIs(heatindex.HeatDemandIndex.of(building.Building('data/buildings/DefaultBuilding.yaml')), self.index)
+
+
+if __name__ == '__main__':
+    unittest.main()
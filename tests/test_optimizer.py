@@ -0,0 +1,37 @@
+import copy
+import unittest
+
+import utilities as util
+import constants as c
+import montecarlo
+import game
+import optimizer
+
+
+class TestOptimizer(unittest.TestCase):
+    def setUp(self):
+        util.INTERACTIVE = False
+        self.configuration = montecarlo.load_configuration('data/users/DefaultUser.yaml', 'data/buildings/DefaultBuilding.yaml',
+                                                           'data/systems/Default_GasBoiler12kW.yaml', 'data/eco2_paths/Scenario.csv')
+
+    def test_pareto(self):
+        ''' Test if dominated labels are pruned'''
+        labels = [(10, 100, ('a',)), (5, 200, ('b',)), (4, 150, ('c',)), (10, 90, ('d',)), (12, 50, ('e',))]
+        self.assertEqual(optimizer.pareto(labels), [(5, 200, ('b',)), (10, 100, ('a',)), (12, 50, ('e',))])
+
+    def test_plan_feasible(self):
+        ''' Test if the optimal plan wins the game with the predicted CO2 budget and bank deposit'''
+        configuration = self.configuration
+        my_optimizer = optimizer.Optimizer(configuration['user'], configuration['building'], configuration['system'], configuration['scenario'])
+        plan, co2, bank = my_optimizer.search()
+        self.assertIn('GasBoiler', configuration['system'].components) # searched on copies
+
+        me, my_building, my_system = copy.deepcopy((configuration['user'], configuration['building'], configuration['system']))
+        annual_results, reason = game.play(me, my_building, my_system, configuration['scenario'], plan)
+        self.assertIsNone(reason)
+        self.assertAlmostEqual(annual_results.at[c.END_YEAR, 'Bank Deposit [Euro]'], bank, places = 6)
+        self.assertAlmostEqual(annual_results.at[c.END_YEAR, 'CO2 Budget [t]'], co2, places = 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import utilities as util
+import montecarlo
+import pareto
+
+CONFIGURATION_PATHS = ('data/users/DefaultUser.yaml', 'data/buildings/DefaultBuilding.yaml',
+                       'data/systems/Default_GasBoiler12kW.yaml', 'data/eco2_paths/Scenario.csv', None)
+
+
+class TestPareto(unittest.TestCase):
+    def setUp(self):
+        util.INTERACTIVE = False
+        self.candidates = pareto.candidates(thicknesses = [0, 16], window_types = [0], heating_powers = [8, 14], pv_powers = [0, 5])
+
+    def test_front_not_dominated(self):
+        ''' Test if no candidate dominates a candidate of the front'''
+        explorer = pareto.Explorer(CONFIGURATION_PATHS)
+        results = explorer.evaluate(self.candidates, workers = 2)
+        self.assertEqual(len(results), len(self.candidates))
+        front = pareto.pareto_front(results)
+        self.assertGreater(len(front), 0)
+        feasible = results[results['Uncovered hours [h/a]'] == 0]
+        for _, candidate in front.iterrows():
+            dominated = ((feasible['Cost [Euro]'] <= candidate['Cost [Euro]']) & (feasible['CO2 emissions [t]'] <= candidate['CO2 emissions [t]'])
+                         & ((feasible['Cost [Euro]'] < candidate['Cost [Euro]']) | (feasible['CO2 emissions [t]'] < candidate['CO2 emissions [t]'])))
+            self.assertFalse(dominated.any())
+
+    def test_cache(self):
+        ''' Test if cached candidates are not evaluated again, also by a new explorer with the same cache file'''
+        with tempfile.TemporaryDirectory() as directory:
+            cache_path = Path(directory) / 'pareto.csv'
+            explorer = pareto.Explorer(CONFIGURATION_PATHS, cache_path)
+            results = explorer.evaluate(self.candidates.iloc[:8], workers = 2)
+            explorer.evaluate(self.candidates, workers = 2) # only the new candidates are evaluated and appended
+            self.assertEqual(len(explorer.cache), len(self.candidates))
+
+            explorer = pareto.Explorer(CONFIGURATION_PATHS, cache_path)
+            explorer._evaluate = None # fails if a candidate is evaluated
+            cached = explorer.evaluate(self.candidates.iloc[:8])
+            np.testing.assert_allclose(cached[pareto.RESULT_KEYS].to_numpy(dtype = float), results[pareto.RESULT_KEYS].to_numpy(dtype = float))
+            self.assertEqual(list(cached['heating']), list(results['heating']))
+
+    def test_refine_reuses_cache(self):
+        ''' Test if refining the front only evaluates the new candidates (the float powers of refine hit the cached int powers)'''
+        with tempfile.TemporaryDirectory() as directory:
+            cache_path = Path(directory) / 'pareto.csv'
+            explorer = pareto.Explorer(CONFIGURATION_PATHS, cache_path)
+            front = pareto.pareto_front(explorer.evaluate(self.candidates, workers = 2))
+            refined = pareto.refine(front, 2.0)
+            self.assertEqual(refined['heating_power'].dtype, float)
+            explorer.evaluate(refined, workers = 2)
+            numeric = {key : float for key in pareto.CANDIDATE_KEYS if key != 'heating'}
+            candidates = pd.concat([self.candidates, refined]).astype(numeric).drop_duplicates()
+            self.assertEqual(len(explorer.cache), len(candidates)) # every candidate evaluated once
+            cached = pd.read_csv(cache_path, index_col = 'key')
+            self.assertFalse(cached[pareto.CANDIDATE_KEYS].astype(numeric).duplicated().any())
+
+    def test_base_key_templates(self):
+        ''' Test if a changed component template invalidates the cached results'''
+        configuration = montecarlo.load_configuration(*CONFIGURATION_PATHS)
+        with tempfile.TemporaryDirectory() as directory:
+            for template in pareto.COMPONENT_TEMPLATES:
+                shutil.copyfile(pareto.template_path(template), Path(directory) / f'{template}.yaml')
+            with mock.patch.object(pareto, 'template_path', lambda template: f'{directory}/{template}.yaml'):
+                key = pareto.base_key(configuration)
+                self.assertEqual(pareto.base_key(configuration), key)
+                with open(Path(directory) / 'HeatPumpAir.yaml', 'a') as file:
+                    file.write('# changed template\n')
+                self.assertNotEqual(pareto.base_key(configuration), key)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import copy
+import unittest
+
+import utilities as util
+import game
+import montecarlo
+import policies
+
+
+class TestPolicies(unittest.TestCase):
+    def setUp(self):
+        util.INTERACTIVE = False
+        self.configuration = montecarlo.load_configuration('data/users/DefaultUser.yaml', 'data/buildings/DefaultBuilding.yaml',
+                                                           'data/systems/Default_GasBoiler12kW.yaml', 'data/eco2_paths/Scenario.csv')
+
+    def test_make_policy(self):
+        ''' Test if policies are created from their names and arguments'''
+        policy = policies.make_policy('heat_pump:2028,9')
+        self.assertEqual((policy.year, policy.power_nom), (2028, 9))
+        with self.assertRaises(ValueError):
+            policies.make_policy('cheat')
+
+    def test_greedy_insulation(self):
+        ''' Test if the part with the highest transmission losses is renovated first and every part only once'''
+        policy = policies.GreedyInsulation()
+        policy.reset(0)
+        building = self.configuration['building']
+        last_results = {'Transmission losses facade [kWh/a]' : 100, 'Transmission losses roof [kWh/a]' : 50,
+                        'Transmission losses ground [kWh/a]' : 20, 'Transmission losses window [kWh/a]' : 300}
+        decisions = [policy(2022 + i, last_results, None, building, None) for i in range(5)]
+        self.assertEqual(decisions[0], [('change_windows', {'type' : '2'})])
+        self.assertEqual(decisions[1], [('insulate', {'component' : 'facade', 'thickness' : 16})])
+        self.assertEqual(decisions[4], [])
+
+    def test_heat_pump_switch(self):
+        ''' Test if the heat pump replaces the gas boiler as soon as the user can afford it'''
+        me, my_building, my_system = copy.deepcopy((self.configuration['user'], self.configuration['building'], self.configuration['system']))
+        policy = policies.make_policy('heat_pump:2023')
+        annual_results, reason = game.play(me, my_building, my_system, self.configuration['scenario'], policy = policy)
+        self.assertEqual(list(my_system.components), ['HeatPumpAir'])
+        self.assertGreater(annual_results.loc[2023:, 'Investment cost [Euro/a]'].max(), 0)
+
+    def test_reproducible(self):
+        ''' Test if a game of a random policy is reproducible from its seed and played on a copy of the configuration'''
+        seed = montecarlo.trajectory_seeds(7, 1)[0]
+        summary = montecarlo.play_trajectory(self.configuration, seed, policies.make_policy('random_renovation:0.5'))
+        self.assertEqual(summary, montecarlo.play_trajectory(self.configuration, seed, policies.make_policy('random_renovation:0.5')))
+        self.assertIn('GasBoiler', self.configuration['system'].components)
+
+    def test_play_without_reset(self):
+        ''' Test if new policies are playable without reset (e.g. directly with game.play)'''
+        for spec in ['random_renovation:0.3', 'greedy_insulation']:
+            me, my_building, my_system = copy.deepcopy((self.configuration['user'], self.configuration['building'], self.configuration['system']))
+            annual_results, reason = game.play(me, my_building, my_system, self.configuration['scenario'], policy = policies.make_policy(spec))
+            self.assertFalse(annual_results.loc[2022:2025, 'CO2 Budget [t]'].isna().any())
+
+if __name__ == '__main__':
+    unittest.main()
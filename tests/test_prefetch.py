@@ -0,0 +1,58 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import utilities as util
+import weather
+import prefetch
+
+
+class FlakyRequestHandler(weather.TMYRequestHandler):
+    ''' Fails every first request of a location with 503 (overloaded) '''
+    def do_GET(self):
+        if self.path not in self.server.seen:
+            self.server.seen.add(self.path)
+            return self.send_error(503)
+        super().do_GET()
+
+
+class TestPrefetch(unittest.TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+        pvgis_url = util.PVGIS_TMY_URL
+        self.addCleanup(setattr, util, 'PVGIS_TMY_URL', pvgis_url)
+
+        # mock PVGIS server: serves the TMY file of data/weather for all locations of the test
+        self.server = weather.PVGISStandIn(weather.WeatherRepository('data/weather'), tolerance = 1000)
+        self.server.RequestHandlerClass = FlakyRequestHandler
+        self.server.seen = set()
+        self.server.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        util.PVGIS_TMY_URL = self.server.url
+
+    def test_prefetch(self):
+        ''' Test if the missing TMY files are downloaded once per site, with retries, and skipped when started again'''
+        shutil.copyfile('data/weather/TMY_lat48_lon7.json', self.directory.joinpath('TMY_lat48_lon7.json'))
+        locations = [(48.01, 7.01), (49, 8), (49.01, 8.01), (50, 9)]
+        self.assertEqual(prefetch.missing_locations(locations, weather.WeatherRepository(self.directory)), [(49, 8), (50, 9)])
+
+        failed = prefetch.prefetch(locations, self.directory, workers = 2, backoff = 0)
+        self.assertEqual(failed, {})
+        self.assertEqual(sorted(path.name for path in self.directory.iterdir()), ['TMY_lat48_lon7.json', 'TMY_lat49_lon8.json', 'TMY_lat50_lon9.json'])
+        self.assertIn('tmy_hourly', json.loads(self.directory.joinpath('TMY_lat50_lon9.json').read_text())['outputs'])
+        self.assertEqual(prefetch.missing_locations(locations, weather.WeatherRepository(self.directory)), [])
+
+    def test_permanent_error(self):
+        ''' Test if failed downloads are reported without leaving files behind'''
+        self.server.tolerance = 1
+        failed = prefetch.prefetch([(10, 10)], self.directory, backoff = 0, retries = 2)
+        self.assertIn((10, 10), failed)
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
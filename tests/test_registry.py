@@ -0,0 +1,60 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+import registry
+
+
+class TestRegistry(unittest.TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.addCleanup(registry.clear)
+
+    def test_reload_on_change(self):
+        ''' Test if a file is only read again after its modification time changed'''
+        path = self.directory.joinpath('Scenario.csv')
+        shutil.copyfile('data/eco2_paths/Scenario.csv', path)
+        reads = []
+        def loader(path):
+            reads.append(path)
+            return Path(path).read_text()
+        self.assertEqual(registry.load(path, loader), registry.load(path, loader))
+        self.assertEqual(len(reads), 1)
+
+        mtime = os.stat(path).st_mtime_ns
+        path.write_text('year\n2022\n')
+        os.utime(path, ns = (mtime + 10**9, mtime + 10**9))
+        self.assertEqual(registry.load(path, loader), 'year\n2022\n')
+        self.assertEqual(len(reads), 2)
+
+    def test_frozen(self):
+        ''' Test if changes of the handed out data don't change the registry'''
+        u_values = registry.u_values()
+        u_values.loc['>1995', 'roof_massive'] = 99
+        self.assertNotEqual(registry.u_values().at['>1995', 'roof_massive'], 99)
+        # no shared buffers, also without copy on write (pandas < 3)
+        self.assertFalse(np.shares_memory(registry.u_values()['roof_massive'].to_numpy(), registry.u_values()['roof_massive'].to_numpy()))
+        # the profiles are shared (zero copy) and read-only
+        profile_norm = registry.profile_norm()
+        self.assertTrue(np.shares_memory(profile_norm['el_hh_norm'].to_numpy(), registry.profile_norm()['el_hh_norm'].to_numpy()))
+        value = profile_norm['el_hh_norm'].iat[0]
+        try:
+            profile_norm.iloc[0, 0] = 99 # raises without copy on write, changes a private copy with copy on write
+        except ValueError:
+            pass
+        self.assertEqual(registry.profile_norm()['el_hh_norm'].iat[0], value)
+        eco2_path = registry.eco2_path('data/eco2_paths/Scenario.csv')
+        eco2_path.iloc[0, 0] = 99
+        self.assertNotEqual(registry.eco2_path('data/eco2_paths/Scenario.csv').iloc[0, 0], 99)
+        template = registry.component_template('data/systems/components/HeatPumpAir.yaml')
+        template['power_nom'] = 99
+        self.assertNotEqual(registry.component_template('data/systems/components/HeatPumpAir.yaml')['power_nom'], 99)
+
+
+if __name__ == '__main__':
+    unittest.main()
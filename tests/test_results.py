@@ -0,0 +1,121 @@
+import unittest
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import utilities as util
+import user
+import building
+import system
+import scenario
+import simulator
+import results
+import actions
+
+
+class TestResultBuffer(unittest.TestCase):
+    def setUp(self):
+        self.buffer = results.ResultBuffer(['Heat [Wh]', 'Gas [Wh]'], 8760)
+
+    def test_frame_is_view(self):
+        ''' Test if the handed out DataFrame shares the memory of the buffer'''
+        self.buffer.write({'Heat [Wh]' : np.ones(8760)})
+        frame = self.buffer.to_frame()
+        self.assertTrue(np.shares_memory(frame.to_numpy(), self.buffer.data))
+        self.assertEqual(frame['Heat [Wh]'].sum(), 8760)
+
+    def test_undeclared_key(self):
+        ''' Test if writing an undeclared result raises a KeyError'''
+        with self.assertRaises(KeyError):
+            self.buffer.write({'Electricity [Wh]' : 1.0}, hours = 0)
+
+
+class TestAnnualLedger(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name).joinpath('annual_results.csv')
+        self.ledger = results.AnnualLedger(['CO2 Budget [t]', 'Balance [Euro/a]', 'Comfort'], range(2021, 2025), stream_path = self.path)
+
+    def tearDown(self):
+        self.ledger.close()
+        self.directory.cleanup()
+
+    def test_streamed_rows(self):
+        ''' Test if the streamed csv file holds the typed rows written so far'''
+        self.ledger.append(2021, {'CO2 Budget [t]' : 50.0, 'Comfort' : ' =) =) =)'})
+        self.ledger.append(2022, {'CO2 Budget [t]' : 45.5, 'Comfort' : ' =) =)'}, {'Balance [Euro/a]' : np.float64(-100.25)})
+        streamed = pd.read_csv(self.path, index_col = 'year')
+        frame = self.ledger.to_frame()
+        self.assertEqual(list(streamed.index), [2021, 2022])
+        self.assertEqual(frame['CO2 Budget [t]'].dtype, np.float64)
+        self.assertEqual(streamed.at[2022, 'Comfort'], ' =) =)')
+        self.assertTrue(np.isnan(streamed.at[2021, 'Balance [Euro/a]']))
+        np.testing.assert_array_equal(streamed['Balance [Euro/a]'].to_numpy(), frame['Balance [Euro/a]'].to_numpy())
+        self.assertEqual(self.ledger.row(2022)['Balance [Euro/a]'], -100.25)
+
+    def test_append_only(self):
+        ''' Test if years can only be appended in order and undeclared results are rejected'''
+        with self.assertRaises(ValueError):
+            self.ledger.append(2022, {'CO2 Budget [t]' : 50.0})
+        self.ledger.append(2021, {'CO2 Budget [t]' : 50.0})
+        with self.assertRaises(ValueError):
+            self.ledger.append(2021, {'CO2 Budget [t]' : 50.0})
+        with self.assertRaises(KeyError):
+            self.ledger.append(2022, {'Electricity [Wh]' : 1.0})
+
+
+class TestHourlyStore(unittest.TestCase):
+    def setUp(self):
+        util.INTERACTIVE = False
+        self.directory = tempfile.TemporaryDirectory()
+        me = user.User('data/users/DefaultUser.yaml')
+        my_building = building.Building('data/buildings/DefaultBuilding.yaml')
+        my_system = system.System('data/systems/Default_GasBoiler12kW_PV10kWp.yaml')
+        my_scenario = scenario.Eco2('data/eco2_paths/Scenario.csv')
+        self.my_simulator = simulator.Simulator(me, my_building, my_system, my_scenario)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def check_store(self, store):
+        annual, results_year = self.my_simulator.simulate_year_hourly(2022)
+        store.write('default', 2022, results_year)
+        self.assertEqual(store.runs(), ['default'])
+        self.assertEqual(store.years('default'), [2022])
+        stored = store.read('default', 2022, ['PV El. Production [Wh]', 'Balance [Euro/a]'])
+        np.testing.assert_array_equal(stored['PV El. Production [Wh]'].to_numpy(), results_year['system']['PV El. Production [Wh]'].to_numpy())
+        self.assertAlmostEqual(stored['Balance [Euro/a]'].sum(), annual['economy']['Balance [Euro/a]'])
+        peaks = store.peaks('GasBoiler Heat Production [Wh]')
+        self.assertEqual(peaks[('default', 2022)], results_year['system']['GasBoiler Heat Production [Wh]'].max())
+        curve = store.load_duration('GasBoiler Heat Production [Wh]')[('default', 2022)].to_numpy()
+        self.assertTrue((np.diff(curve) <= 0).all())
+
+        # a run with another system: the heat pump replaces the gas boiler in the second year
+        store.write('retrofit', 2022, results_year)
+        heat_pump_system = system.System()
+        heat_pump_system.add_component(actions.load_component('data/systems/components/HeatPumpAir.yaml'))
+        retrofit = simulator.Simulator(self.my_simulator.user, self.my_simulator.building, heat_pump_system, self.my_simulator.scenario)
+        heat_pump_results = retrofit.simulate_year_hourly(2023)[1]
+        store.write('retrofit', 2023, heat_pump_results)
+        self.assertNotIn('GasBoiler Heat Production [Wh]', store.columns('retrofit', 2023))
+        peaks = store.peaks('GasBoiler Heat Production [Wh]')
+        self.assertEqual(list(peaks.index), [('default', 2022), ('retrofit', 2022)])
+        self.assertEqual(list(store.load_duration('GasBoiler Heat Production [Wh]').columns), [('default', 2022), ('retrofit', 2022)])
+        peaks = store.peaks('HeatPumpAir Heat Production [Wh]')
+        self.assertEqual(peaks[('retrofit', 2023)], heat_pump_results['system']['HeatPumpAir Heat Production [Wh]'].max())
+        self.assertEqual(len(store.peaks('Unknown [Wh]')), 0)
+
+    def test_hourly_format(self):
+        ''' Test if the hourly results are stored and read back memory mapped (hourly input store format)'''
+        self.check_store(results.HourlyStore(self.directory.name, format = 'hourly'))
+
+    @unittest.skipIf(results.pa is None, 'pyarrow is not installed')
+    def test_arrow_format(self):
+        ''' Test if the hourly results are stored and read back from compressed Arrow files'''
+        self.check_store(results.HourlyStore(self.directory.name, format = 'arrow'))
+
+
+if __name__ == '__main__':
+    unittest.main()
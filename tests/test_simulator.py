@@ -0,0 +1,116 @@
+import unittest
+
+import utilities as util
+import user
+import building
+import system
+import scenario
+import simulator
+
+
+class TestSimulator(unittest.TestCase):
+    def setUp(self):
+        util.INTERACTIVE = False
+        self.year = 2022
+        self.me = user.User('data/users/DefaultUser.yaml')
+        self.my_building = building.Building('data/buildings/DefaultBuilding.yaml')
+        self.my_system = system.System('data/systems/Default_GasBoiler12kW_PV10kWp.yaml')
+        self.my_scenario = scenario.Eco2('data/eco2_paths/Scenario.csv')
+        self.my_simulator = simulator.Simulator(self.me, self.my_building, self.my_system, self.my_scenario)
+
+    def test_vectorized_equals_hourly(self):
+        ''' Test if the whole-year pass gives the same results as single hourly steps'''
+        results = self.my_simulator.simulate_year(self.year)
+        hourly_heat_demand = self.my_building.calc(self.me)[1]
+        for hour in [0, 12, 4000, 8759]:
+            one_step_results = self.my_simulator.one_step(self.year, hourly_heat_demand.loc[hour], self.me.profile['el_hh [W]'].loc[hour],
+                                                          self.my_building.weather.loc[hour])
+            for category, values in one_step_results.items():
+                for key, value in values.items():
+                    self.assertAlmostEqual(results[category].at[hour, key], float(value), places = 6)
+
+    def test_annual_equals_hourly_sums(self):
+        ''' Test if the annual results from the energy totals equal the sums of the hourly results'''
+        for year in [2022, 2035]:
+            annual = self.my_simulator.simulate_year_annual(year)
+            results = self.my_simulator.simulate_year(year)
+            for category in ['system', 'ecology', 'economy']:
+                for key, value in results[category].sum().items():
+                    self.assertAlmostEqual(annual[category][key], value, delta = 1e-9 * max(1, abs(value)))
+
+    def test_aggregates_equal_hourly(self):
+        ''' Test if the aggregate mode gives the sums, monthly sums and peaks of the hourly results without storing them'''
+        annual, monthly, aggregates = self.my_simulator.simulate_year_aggregates(self.year)
+        results = self.my_simulator.simulate_year(self.year)
+        february = slice(31*24, 59*24)
+        for category, key in [('system', 'PV El. Production [Wh]'), ('system', 'GasBoiler Gas Consumption [Wh]'),
+                              ('ecology', 'CO2 emissions total [t]'), ('economy', 'Energy cost total [Euro]')]:
+            total = results[category][key].sum()
+            self.assertAlmostEqual(annual[category][key], total, delta = 1e-9 * abs(total))
+            self.assertAlmostEqual(monthly.at[2, key], results[category][key].iloc[february].sum(), delta = 1e-9 * abs(total))
+        system = results['system']
+        self.assertEqual(aggregates.peak('GasBoiler Heat Production [Wh]'), system['GasBoiler Heat Production [Wh]'].max())
+        self.assertEqual(aggregates.uncovered_hours, (system['Uncovered heat [Wh]'] > 0).sum())
+        self.assertEqual(aggregates.load_duration('GasBoiler Heat Production [Wh]').iloc[0], 8760)
+        self.assertLess(aggregates.nbytes, 16000)
+
+    def test_scenario_ensemble(self):
+        ''' Test if all scenarios of an ensemble give the same results as separate simulations'''
+        expensive = self.my_scenario.eco2_path * 2
+        ensemble = scenario.Eco2Ensemble({'default' : self.my_scenario.eco2_path, 'expensive' : expensive})
+        ensemble_results = simulator.Simulator(self.me, self.my_building, self.my_system, ensemble).simulate_scenarios([2022, 2023])
+        self.my_scenario.eco2_path = expensive
+        for year in [2022, 2023]:
+            annual = self.my_simulator.simulate_year_annual(year)
+            for key in ['CO2 emissions total [t]', 'Energy cost total [Euro]']:
+                value = annual['ecology'].get(key, annual['economy'].get(key))
+                self.assertAlmostEqual(ensemble_results.at[('expensive', year), key], value, places = 6)
+
+    def test_dispatch_plan_rebuild(self):
+        ''' Test if the dispatch plan is only rebuilt when components are added or removed'''
+        plan = self.my_system.dispatch_plan()
+        self.assertIs(plan, self.my_system.dispatch_plan())
+        self.my_system.remove_component('Photovoltaic')
+        new_plan = self.my_system.dispatch_plan()
+        self.assertIsNot(plan, new_plan)
+        self.assertNotIn('Electricity PV feedin [Wh]', new_plan.outputs['system'])
+
+    def test_results_writable(self):
+        ''' Test if the hourly results can be changed without changing the cached energy balance'''
+        results_year = self.my_simulator.simulate_year(self.year)
+        heat = results_year['system']['GasBoiler Heat Production [Wh]'].sum()
+        for category in ['system', 'ecology', 'economy']:
+            results_year[category].iloc[0, 0] = -1.0
+        results_year['system'].loc[:, 'GasBoiler Heat Production [Wh]'] = 0.0
+        self.assertEqual(self.my_simulator.simulate_year(self.year)['system']['GasBoiler Heat Production [Wh]'].sum(), heat)
+
+    def test_module_state_cache(self):
+        ''' Test if a part of the year doesn't take the place of the full year in the PV module state cache'''
+        pv = self.my_system.components['Photovoltaic']
+        weather = self.my_building.weather
+        system.POA_CACHE.clear()
+        self.assertEqual(len(pv.calc_energy(weather.iloc[:24])), 24)
+        self.assertEqual(len(pv.calc_energy(weather)), len(weather))
+        self.assertEqual(len(pv.calc_energy(weather.iloc[24:48])), 24)
+
+    def test_declared_annual_keys(self):
+        ''' Test if the annual results schema covers new component classes and every system of the game'''
+        class WoodBoiler(system.GasBoiler): # a component type the schema was not written for
+            def __init__(self, params):
+                system.GasBoiler.__init__(self, params)
+                self.emission = 'WoodBoiler CO2 emissions [t]'
+                self.cost = 'WoodBoiler Wood cost [Euro]'
+        self.assertEqual(system.System().components, {}) # the schema is derived from empty systems
+        simulator._component_annual_keys.cache_clear()
+        self.addCleanup(simulator._component_annual_keys.cache_clear)
+        keys = simulator.declared_annual_keys()
+        self.assertIn('WoodBoiler CO2 emissions [t]', keys)
+        self.assertIn('WoodBoiler Wood cost [Euro]', keys)
+        for my_system in [self.my_system, system.System('data/systems/Default_GasBoiler12kW.yaml')]:
+            my_simulator = simulator.Simulator(self.me, self.my_building, my_system, self.my_scenario)
+            annual = my_simulator.simulate_year_annual(self.year)
+            self.assertTrue(set(key for values in annual.values() for key in values) <= set(keys))
+
+
+if __name__ == '__main__':
+    unittest.main()
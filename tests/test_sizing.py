@@ -0,0 +1,70 @@
+import copy
+import unittest
+
+import numpy as np
+
+import utilities as util
+import montecarlo
+import simulator
+import system
+import actions
+import sizing
+
+
+class TestSizing(unittest.TestCase):
+    def setUp(self):
+        util.INTERACTIVE = False
+        self.configuration = montecarlo.load_configuration('data/users/DefaultUser.yaml', 'data/buildings/DefaultBuilding.yaml',
+                                                           'data/systems/Default_GasBoiler12kW_PV10kWp.yaml', 'data/eco2_paths/Scenario.csv')
+        self.years = [2022, 2030]
+
+    def test_sizes_equal_simulation(self):
+        ''' Test if the broadcast sizing gives the results of simulations with a single size'''
+        configuration = self.configuration
+        for name, sizes in [('GasBoiler', [6, 9, 12]), ('Photovoltaic', [2, 10])]:
+            table = sizing.size(configuration['user'], configuration['building'], configuration['system'], configuration['scenario'],
+                                name, sizes, self.years)
+            my_system = copy.deepcopy(configuration['system'])
+            my_system.components[name].power_nom = sizes[0]
+            my_simulator = simulator.Simulator(copy.deepcopy(configuration['user']), configuration['building'], my_system, configuration['scenario'])
+            annual = [my_simulator.simulate_year_annual(year) for year in self.years]
+            self.assertAlmostEqual(table.at[sizes[0], 'CO2 emissions [t]'], sum(results['ecology']['CO2 emissions total [t]'] for results in annual), places = 9)
+            self.assertAlmostEqual(table.at[sizes[0], 'Energy cost [Euro]'], sum(results['economy']['Energy cost total [Euro]'] for results in annual), places = 6)
+            self.assertAlmostEqual(table.at[sizes[0], 'Uncovered heat [kWh/a]'], annual[0]['system']['Uncovered heat [Wh]']/1000, places = 9)
+            self.assertAlmostEqual(table.at[sizes[0], 'Investment cost [Euro]'], my_system.components[name].calc_investment_cost(), places = 9)
+
+    def test_heat_pump_sizes(self):
+        ''' Test if the heat pump electricity follows the heat it covers, i.e. depends on its size'''
+        configuration = self.configuration
+        my_system = system.System()
+        heat_pump = actions.load_component('data/systems/components/HeatPumpAir.yaml')
+        heat_pump.commission(2022)
+        my_system.add_component(heat_pump)
+        sizes = [4, 20]
+        table = sizing.size(configuration['user'], configuration['building'], my_system, configuration['scenario'], 'HeatPumpAir', sizes, self.years)
+        self.assertGreater(table.at[4, 'Uncovered heat [kWh/a]'], 0)
+        self.assertLess(table.at[4, 'HeatPumpAir El. Consumption [Wh]'], table.at[20, 'HeatPumpAir El. Consumption [Wh]'])
+        self.assertLess(table.at[4, 'CO2 emissions [t]'], table.at[20, 'CO2 emissions [t]'])
+        for size in sizes:
+            sized = copy.deepcopy(my_system)
+            sized.components['HeatPumpAir'].power_nom = size
+            my_simulator = simulator.Simulator(copy.deepcopy(configuration['user']), configuration['building'], sized, configuration['scenario'])
+            annual = [my_simulator.simulate_year_annual(year) for year in self.years]
+            self.assertAlmostEqual(table.at[size, 'CO2 emissions [t]'], sum(results['ecology']['CO2 emissions total [t]'] for results in annual), places = 9)
+            self.assertAlmostEqual(table.at[size, 'Energy cost [Euro]'], sum(results['economy']['Energy cost total [Euro]'] for results in annual), places = 6)
+
+    def test_optimal_sizes(self):
+        ''' Test if the optimal gas boiler covers the heat load'''
+        configuration = self.configuration
+        table = sizing.size(configuration['user'], configuration['building'], configuration['system'], configuration['scenario'],
+                            'GasBoiler', np.arange(4, 21, 1))
+        optimum = sizing.optimal_sizes(table)
+        heat_load_max = configuration['building'].calc(configuration['user'])[1].max() / 1000 # [kW]
+        self.assertGreaterEqual(optimum['cost'], heat_load_max)
+        self.assertLess(optimum['cost'] - 1, heat_load_max)
+        with self.assertRaises(ValueError):
+            sizing.optimal_sizes(table.loc[:5])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+
+import user
+import building
+import stock
+
+
+class TestStock(unittest.TestCase):
+    def setUp(self):
+        self.building_path = 'data/buildings/DefaultBuilding.yaml'
+        self.me = user.User('data/users/DefaultUser.yaml')
+
+    def test_stock_equals_building(self):
+        ''' Test if the stock calculation gives the same results as the building of the same file'''
+        my_stock = stock.Stock.from_building_files([self.building_path, self.building_path])
+        my_stock.buildings.loc[1, ['attic', 'basement', 'set_point']] = ['partly heated', 'unheated', 18.0]
+        annual_results, hourly_heat_demand = my_stock.calc(chunksize = 1)
+
+        for i, row in my_stock.buildings.iterrows():
+            my_building = building.Building(self.building_path)
+            my_building.attic, my_building.basement = row['attic'], row['basement']
+            my_building.calc_geometry()
+            self.me.set_point_temperature = row['set_point']
+            building_results, heatdemand = my_building.calc(self.me)
+            for key, value in building_results.items():
+                self.assertAlmostEqual(annual_results.at[i, key], value, delta = 1e-9 * abs(value))
+            self.assertAlmostEqual(annual_results.at[i, 'Maximum heat load [kW]'], heatdemand.max()/1000, places = 9)
+        self.assertAlmostEqual(hourly_heat_demand.sum()/1000, annual_results['Annual heat demand [kWh/a]'].sum(), places = 6)
+
+    def test_sample_stock(self):
+        ''' Test if a sampled stock is reproducible and follows the building age class shares'''
+        shares = {'<1918' : 1, '>1995' : 3}
+        my_stock = stock.sample_stock(2000, bac_shares = shares, seed = 1)
+        self.assertTrue(my_stock.buildings.equals(stock.sample_stock(2000, bac_shares = shares, seed = 1).buildings))
+        self.assertAlmostEqual((my_stock.buildings['bac'] == '>1995').mean(), 0.75, delta = 0.05)
+        annual_results, _ = my_stock.calc()
+        self.assertFalse(np.isnan(annual_results.to_numpy()).any())
+
+
+if __name__ == '__main__':
+    unittest.main()
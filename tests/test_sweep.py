@@ -0,0 +1,35 @@
+import io
+import copy
+import unittest
+import contextlib
+
+import user
+import building
+import actions
+import sweep
+
+
+class TestSweep(unittest.TestCase):
+    def setUp(self):
+        self.me = user.User('data/users/DefaultUser.yaml')
+        self.my_building = building.Building('data/buildings/DefaultBuilding.yaml')
+
+    def test_sweep_equals_calc(self):
+        ''' Test if the sweep gives the same results as renovating the building and calculating each variant'''
+        parameters = sweep.grid(facade = [0, 12], window = ['1', '3'], ventilation_rate = [0.3, 0.6], set_point = [18, 21])
+        results = sweep.sweep(self.my_building, self.me, parameters, chunksize = 5)
+        for i, row in results.iterrows():
+            variant = copy.copy(self.my_building)
+            with contextlib.redirect_stdout(io.StringIO()):
+                actions.insulate(variant, '1', row['facade'])
+                actions.change_windows(variant, row['window'])
+            variant.ventilation_rate = row['ventilation_rate']
+            self.me.set_point_temperature = row['set_point']
+            annual_results, heatdemand = variant.calc(self.me)
+            annual_results['Maximum heat load [kW]'] = heatdemand.max()/1000
+            for key, value in annual_results.items():
+                self.assertAlmostEqual(results.at[i, key], value, delta = 1e-9 * abs(value))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import utilities as util
+
+
+class TestHourlyStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_round_trip(self):
+        ''' Test if a stored dataframe is opened unchanged as memory map'''
+        df = pd.DataFrame({'time' : pd.date_range('2022-01-01', periods = 8760, freq = 'h'),
+                           'T [degC]' : np.linspace(-10, 30, 8760),
+                           'hour' : np.arange(8760)})
+        path = self.directory.joinpath('test.hourly')
+        util.save_hourly(df, path)
+        opened = util.open_hourly(path)
+        pd.testing.assert_frame_equal(opened.copy(), df)
+
+        # the column is a view of the memory map of the file
+        values = opened['T [degC]'].to_numpy()
+        while values is not None and not isinstance(values, np.memmap):
+            values = values.base
+        self.assertIsNotNone(values)
+        opened.loc[0, 'T [degC]'] = 100 # private change, the file is not changed
+        self.assertEqual(util.open_hourly(path).at[0, 'T [degC]'], -10)
+
+    def test_unsupported_dtype(self):
+        ''' Test if columns without a fixed width of 8 bytes are rejected'''
+        with self.assertRaises(ValueError):
+            util.save_hourly(pd.DataFrame({'name' : ['a', 'b']}), self.directory.joinpath('test.hourly'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import requests
+
+import utilities as util
+import weather
+
+
+class TestWeather(unittest.TestCase):
+    def setUp(self):
+        self.tmy_path = 'data/weather/TMY_lat48_lon7.json'
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_nearest(self):
+        ''' Test if the nearest TMY file within the tolerance is found'''
+        for name in ['TMY_lat48_lon7.json', 'TMY_lat48.2_lon7.3.json', 'TMY_lat-33.9_lon18.4.json']:
+            shutil.copyfile(self.tmy_path, self.directory.joinpath(name))
+        repository = weather.WeatherRepository(self.directory)
+        self.assertEqual(len(repository), 3)
+        path, latitude, longitude, distance = repository.nearest(48.15, 7.25, tolerance = 10)
+        self.assertEqual((path.name, latitude, longitude), ('TMY_lat48.2_lon7.3.json', 48.2, 7.3))
+        self.assertAlmostEqual(distance, 6.7, delta = 0.1) # [km]
+        self.assertIsNone(repository.nearest(48.15, 7.25, tolerance = 5))
+        self.assertEqual(repository.nearest(-33.91, 18.42, tolerance = 10)[0].name, 'TMY_lat-33.9_lon18.4.json')
+
+    def test_import_and_serve(self):
+        ''' Test if imported TMY files are named by their location and served by the PVGIS stand-in'''
+        data = json.loads(Path(self.tmy_path).read_text())
+        data['inputs']['location'].update({'latitude' : 50.5, 'longitude' : 8.25})
+        download_path = self.directory.joinpath('download.json')
+        download_path.write_text(json.dumps(data))
+        repository = weather.WeatherRepository(self.directory.joinpath('repository'))
+        repository.directory.mkdir()
+        self.assertEqual(repository.import_files([download_path], orientation_offsets = [])[0].name, 'TMY_lat50.5_lon8.25.json')
+
+        pvgis_url = util.PVGIS_TMY_URL
+        self.addCleanup(setattr, util, 'PVGIS_TMY_URL', pvgis_url)
+        with weather.PVGISStandIn(repository) as server:
+            util.PVGIS_TMY_URL = server.url
+            self.assertEqual(json.loads(util.get_tmy_data(50.51, 8.26))['inputs']['location']['latitude'], 50.5)
+            self.assertIsNone(repository.nearest(48, 7)) # no file within 5 km
+            with self.assertRaises(requests.HTTPError) as context:
+                util.get_tmy_data(48, 7)
+            self.assertEqual(context.exception.response.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
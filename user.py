@@ -4,6 +4,8 @@ import yaml
 import pandas as pd
 import numpy as np
 
+import registry
+
 class User:
     def __init__(self, user_path, verbose = False):
         # load user parameters from file
@@ -25,7 +27,7 @@ class User:
 
     def generate_profiles(self):
         # read hourly factors of normalized profile
-        user_profile_norm = pd.read_csv("data/profiles/user_profile_norm.csv", index_col = "hour")
+        user_profile_norm = registry.profile_norm()
 
         df = pd.DataFrame(index = user_profile_norm.index)
         df['el_hh [W]'] = user_profile_norm['el_hh_norm'] * self.annual_el_demand * 1000 # [W]
@@ -1,9 +1,13 @@
+import os
 import ntpath
 import json
+import hashlib
 import subprocess
 from pathlib import Path
+from collections import OrderedDict
 
 import requests
+import numpy as np
 import pandas as pd
 from pvlib import irradiance
 
@@ -12,7 +16,10 @@ def path_leaf(path):
     head, tail = ntpath.split(path)
     return tail or ntpath.basename(head)
 
-def get_tmy_data(latitude, longitude):
+# PVGIS API for typical meteorological years, can be pointed to a local stand-in (see weather.PVGISStandIn)
+PVGIS_TMY_URL = 'https://re.jrc.ec.europa.eu/api/tmy'
+
+def get_tmy_data(latitude, longitude, session = None, timeout = None):
     """Load weather - typical meterological year(TMY) data from PVGIS
     Parameters
     ----------
@@ -20,12 +27,17 @@ def get_tmy_data(latitude, longitude):
         Latitude [decimal degrees]
     longitude : float
         Longitude [decimal degrees]
+    session : requests.Session
+        reuses the connections of many downloads (optional)
+    timeout : float
+        [s] (optional)
     Returns
     -------
     content of the requests.response object containing weather data
     """
-    url = 'https://re.jrc.ec.europa.eu/api/tmy?lat='+str(latitude)+'&lon='+str(longitude)+'&outputformat=json'
-    response = requests.get(url)
+    url = PVGIS_TMY_URL+'?lat='+str(latitude)+'&lon='+str(longitude)+'&outputformat=json'
+    response = (session or requests).get(url, timeout = timeout)
+    response.raise_for_status() # don't save error messages as weather data
     return response.content
 
 def save_tmy_data(data, filepath):
@@ -37,7 +49,9 @@ def save_tmy_data(data, filepath):
     filepath : pathlib Path
         filepath where the json file should be saved
     """
-    Path(filepath).write_bytes(data)
+    tmp_path = Path(filepath).with_suffix(f'.{os.getpid()}.part')
+    tmp_path.write_bytes(data)
+    tmp_path.replace(filepath) # atomic, an interrupted download leaves no incomplete weather file
 
 
 def read_tmy_data(filepath):
@@ -74,6 +88,108 @@ def read_tmy_data(filepath):
     return df[['T2m','G(h)','Gb(n)','Gd(h)']]
 
 
+class LRUCache:
+    ''' Small least recently used cache with hit and miss statistics '''
+    def __init__(self, maxsize = 32):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, key, compute):
+        ''' Return the cached value of key, call compute() to create it on a miss '''
+        if key in self.data:
+            self.hits += 1
+            self.data.move_to_end(key)
+            return self.data[key]
+        self.misses += 1
+        value = compute()
+        self.data[key] = value
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last = False) # evict least recently used entry
+        return value
+
+    def clear(self):
+        self.data.clear()
+        self.hits, self.misses = 0, 0
+
+    def info(self):
+        return {'hits' : self.hits, 'misses' : self.misses, 'size' : len(self.data), 'maxsize' : self.maxsize}
+
+def fingerprint(*values):
+    ''' Return a hash of the representation of the values, e.g. of parameter dicts '''
+    return hashlib.sha1(repr(values).encode()).hexdigest()
+
+def array_hash(array):
+    ''' Return a hash of the content of a numpy array '''
+    return hashlib.sha1(np.ascontiguousarray(array).view(np.uint8)).hexdigest()
+
+def file_hash(filepath):
+    ''' Return the sha256 hex digest of the file content '''
+    return bytes_hash(Path(filepath).read_bytes())
+
+def bytes_hash(content):
+    ''' Return the sha256 hex digest of the bytes '''
+    return hashlib.sha256(content).hexdigest()
+
+# hourly input store: magic, header length (uint64), json header, columns as consecutive arrays of 8 byte values
+HOURLY_MAGIC = b'HOURLY01'
+HOURLY_ALIGNMENT = 64 # [bytes] of the data offset
+
+def save_hourly(df, filepath):
+    """Save a dataframe in the hourly input store format, see open_hourly.
+    Parameters
+    ----------
+    df : pandas df
+        dataframe with a default (range) index and columns of 8 byte dtypes (float64, int64, datetime64)
+    filepath : pathlib Path
+        filepath of the .hourly file
+    """
+    columns = [np.ascontiguousarray(df[column].to_numpy()) for column in df.columns]
+    for column, values in zip(df.columns, columns):
+        if values.dtype.itemsize != 8 or values.dtype.kind not in 'fiuM':
+            raise ValueError(f"Column {column} of dtype {values.dtype} can't be stored in the hourly input store")
+    header = json.dumps({'columns' : list(df.columns), 'dtypes' : [values.dtype.str for values in columns], 'n_rows' : len(df)}).encode()
+    header += b' ' * (-(len(HOURLY_MAGIC) + 8 + len(header)) % HOURLY_ALIGNMENT)
+
+    Path(filepath).parent.mkdir(parents = True, exist_ok = True)
+    tmp_path = Path(filepath).with_suffix(f'.{os.getpid()}.tmp') # one per process, workers may write the same file
+    with open(tmp_path, 'wb') as file:
+        file.write(HOURLY_MAGIC + np.uint64(len(header)).tobytes() + header)
+        for values in columns:
+            file.write(values.tobytes())
+    tmp_path.replace(filepath) # atomic, concurrent readers never see a partly written file
+
+def open_hourly(filepath, mode = 'c'):
+    """Open a dataframe saved with save_hourly without reading or copying the data.
+    The columns are memory maps of the file: processes opening the same file share the memory pages,
+    changes of the dataframe are private to the process (copy on write) and are not written to the file.
+    Parameters
+    ----------
+    filepath : pathlib Path
+        filepath of the .hourly file
+    mode : str
+        'c' (changes are private to the process) or 'r' (read-only)
+    Returns
+    -------
+    pandas df
+    """
+    with open(filepath, 'rb') as file:
+        if file.read(len(HOURLY_MAGIC)) != HOURLY_MAGIC:
+            raise ValueError(f"{filepath} is not an hourly input store file")
+        header_length = int(np.frombuffer(file.read(8), dtype = np.uint64)[0])
+        header = json.loads(file.read(header_length))
+    offset = len(HOURLY_MAGIC) + 8 + header_length
+    n_rows, n_columns = header['n_rows'], len(header['columns'])
+    data = np.memmap(filepath, dtype = np.uint64, mode = mode, offset = offset, shape = (n_columns, n_rows)) if n_rows * n_columns > 0 else np.empty((n_columns, n_rows), dtype = np.uint64)
+    return pd.DataFrame({column : data[i].view(dtype) for i, (column, dtype) in enumerate(zip(header['columns'], header['dtypes']))}, copy = False)
+
 def calc_irradiance_on_tilted_plane(weather, tilt_angle, azimuth_angle):
     irradiance_df = irradiance.get_total_irradiance(surface_tilt = tilt_angle,
                                                         surface_azimuth = azimuth_angle,
@@ -86,6 +202,14 @@ def calc_irradiance_on_tilted_plane(weather, tilt_angle, azimuth_angle):
     return irradiance_tilted
 
 # USER INTERFACE
+# set to False for runs without user interaction (e.g. batch runs), pause() then returns immediately
+INTERACTIVE = True
+
+def pause(prompt = '    ENTER to continue.'):
+    ''' Wait for the user to acknowledge a message '''
+    if INTERACTIVE:
+        input(prompt)
+
 # https://stackoverflow.com/questions/517970/how-to-clear-the-interpreter-console
 def clear_console():
     debugging_mode = 1 # off (0), on (1)
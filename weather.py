@@ -0,0 +1,278 @@
+''' Weather data: local repository of the TMY files, derived weather data of the buildings and a local stand-in of the PVGIS API.
+
+The TMY files in data/weather are named TMY_lat{latitude}_lon{longitude}.json. Buildings use the nearest file
+within TOLERANCE instead of downloading the weather data of their exact location, so nearby buildings share the weather data.
+
+usage:
+    python weather.py import downloads/*.json    # copy PVGIS files into the repository and derive the cached weather data
+    python weather.py nearest 48.01 7.02         # nearest weather data of a location
+    python weather.py serve --port 8080          # serve the repository like the PVGIS tmy API (offline use, tests)
+'''
+import os
+import re
+import json
+import shutil
+import argparse
+import threading
+import urllib.parse
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+
+from pvlib import solarposition
+
+import utilities
+
+try: # optional, faster nearest site lookup in large repositories
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+WEATHER_DIR = "data/weather"
+WEATHER_CACHE_DIR = "data/weather/cache" # derived weather data, can be deleted at any time
+TOLERANCE = 5 # [km] maximum distance of the weather data to the location of a building
+EARTH_RADIUS = 6371.0 # [km]
+TMY_FILENAME = re.compile(r'TMY_lat(?P<latitude>-?\d+(\.\d+)?)_lon(?P<longitude>-?\d+(\.\d+)?)\.json$')
+
+FACADE_ORIENTATIONS = np.array([0,90,180,-90]) # [deg] N/E/S/W without orientation offset
+
+def tmy_filename(latitude, longitude):
+    return f"TMY_lat{latitude}_lon{longitude}.json"
+
+def unit_vectors(latitude, longitude):
+    ''' Points on the unit sphere, the euclidean (chord) distances of these points are monotonic in the great circle distances '''
+    latitude, longitude = np.radians(latitude), np.radians(longitude)
+    return np.column_stack([np.cos(latitude) * np.cos(longitude), np.cos(latitude) * np.sin(longitude), np.sin(latitude)])
+
+def chord_to_distance(chord):
+    ''' Great circle distance [km] of points on the unit sphere with the given euclidean distance '''
+    return 2 * EARTH_RADIUS * np.arcsin(np.minimum(chord / 2, 1.0))
+
+class WeatherRepository:
+    def __init__(self, directory = WEATHER_DIR):
+        ''' Spatial index of the TMY files in the directory '''
+        self.directory = Path(directory)
+        self.refresh()
+
+    def refresh(self):
+        ''' Index the TMY files of the directory again, e.g. after files were added '''
+        sites = []
+        for path in sorted(self.directory.glob('TMY_lat*_lon*.json')):
+            match = TMY_FILENAME.match(path.name)
+            if match:
+                sites.append((float(match['latitude']), float(match['longitude']), path))
+        self.paths = [path for _, _, path in sites]
+        self.coordinates = np.array([site[:2] for site in sites], dtype = float).reshape(-1, 2)
+        self.vectors = unit_vectors(self.coordinates[:, 0], self.coordinates[:, 1])
+        self.tree = cKDTree(self.vectors) if cKDTree is not None and len(self.paths) > 0 else None
+
+    def __len__(self):
+        return len(self.paths)
+
+    def nearest(self, latitude, longitude, tolerance = TOLERANCE):
+        ''' Return the path, latitude and longitude of the nearest TMY file and its distance [km], None if there is none within the tolerance [km] '''
+        if len(self.paths) == 0:
+            return None
+        vector = unit_vectors(latitude, longitude)[0]
+        if self.tree is not None:
+            chord, i = self.tree.query(vector)
+        else:
+            chords = np.linalg.norm(self.vectors - vector, axis = 1)
+            i = int(np.argmin(chords))
+            chord = chords[i]
+        distance = chord_to_distance(chord) # [km]
+        if distance > tolerance:
+            return None
+        return self.paths[i], float(self.coordinates[i, 0]), float(self.coordinates[i, 1]), float(distance)
+
+    def import_files(self, paths, orientation_offsets = (0,)):
+        ''' Copy PVGIS TMY files (.json) into the repository and derive the cached weather data of the given orientation offsets
+        The files are named after the location in the file, files of the same location are replaced.
+        Returns
+        -------
+        list
+            paths of the imported files
+        '''
+        imported = []
+        for path in paths:
+            with open(path, 'r') as file:
+                data = json.load(file)
+            if len(data['outputs']['tmy_hourly']) != 8760:
+                raise ValueError(f"{path} does not contain the 8760 hours of a typical meteorological year")
+            location = data['inputs']['location']
+            latitude, longitude = location['latitude'], location['longitude']
+            target = self.directory.joinpath(tmy_filename(latitude, longitude))
+            if Path(path).resolve() != target.resolve():
+                tmp_path = target.with_suffix(f'.{os.getpid()}.tmp')
+                shutil.copyfile(path, tmp_path)
+                tmp_path.replace(target)
+            imported.append(target)
+        self.refresh()
+
+        for target in imported:
+            match = TMY_FILENAME.match(target.name)
+            for orientation_offset in orientation_offsets:
+                derived_weather(target, float(match['latitude']), float(match['longitude']), orientation_offset)
+        return imported
+
+# repository of WEATHER_DIR, see repository()
+_repository = None
+
+def repository():
+    ''' Return the repository of WEATHER_DIR, indexed on the first use '''
+    global _repository
+    if _repository is None or _repository.directory != Path(WEATHER_DIR):
+        _repository = WeatherRepository(WEATHER_DIR)
+    return _repository
+
+def load_weather(location, orientation_offset, tolerance = TOLERANCE):
+    ''' Return the weather data of the location with the facade irradiance of the given orientation offset [deg]
+    The weather data of the nearest TMY file within the tolerance [km] is used, if there is none the TMY data of the location is downloaded.
+    '''
+    latitude, longitude = location['latitude'], location['longitude']
+    site = repository().nearest(latitude, longitude, tolerance)
+    if site is None: # index the files again, other processes may have added them
+        repository().refresh()
+        site = repository().nearest(latitude, longitude, tolerance)
+    if site is None:
+        # If there is no weather data for the given location in the input directory download it
+        weather_path = Path(WEATHER_DIR).joinpath(tmy_filename(latitude, longitude))
+        print(f'Downloading TMY data for latitude: {latitude}, longitude: {longitude}')
+        data = utilities.get_tmy_data(latitude=latitude, longitude=longitude)
+        utilities.save_tmy_data(data, weather_path)
+        repository().refresh()
+    else:
+        weather_path, latitude, longitude, _ = site
+    return derived_weather(weather_path, latitude, longitude, orientation_offset)
+
+def derived_weather(weather_path, latitude, longitude, orientation_offset):
+    ''' Return the derived weather data of a TMY file, from the cache if it exists '''
+    # the derived weather data only depends on the location, the orientation and the raw weather data
+    source_hash = utilities.file_hash(weather_path)
+    cache_path = Path(WEATHER_CACHE_DIR).joinpath(f"{Path(weather_path).stem}_offset{orientation_offset}_{source_hash[:16]}.hourly")
+    if not cache_path.is_file():
+        df_weather = derive_weather(weather_path, latitude, longitude, FACADE_ORIENTATIONS + orientation_offset)
+        utilities.save_hourly(df_weather, cache_path)
+    df_weather = utilities.open_hourly(cache_path) # memory mapped, the processes share the pages
+
+    # identifies the weather data, e.g. for caches of derived values (row selections carry the attrs over, n_hours tells the full year apart)
+    df_weather.attrs['source'] = cache_path.stem
+    df_weather.attrs['n_hours'] = len(df_weather)
+    return df_weather
+
+def derive_weather(weather_path, latitude, longitude, facade_orientations):
+    ''' Read the raw TMY data and derive solar position, facade irradiance and ground temperature '''
+    df_weather = utilities.read_tmy_data(weather_path)
+
+    column_names = {
+        'T2m':'T_amb [degC]', # Ambient air temperature [°C]
+        'G(h)': 'G(h) [W/m^2]', # Global horizontal irradiance [W/m^2]
+        'Gb(n)': 'Gb(n) [W/m^2]', # Normal beam irradiance [W/m^2]
+        'Gd(h)': 'Gd(h) [W/m^2]', # Diffuse horizontal irradiance [W/m^2]
+    }
+
+    df_weather.rename(columns=column_names, inplace=True)
+
+    # calculate solar position with weather index and add to weather_df
+    solar_position = solarposition.get_solarposition(df_weather.index, latitude, longitude)
+    df_weather['solar_zenith [deg]'], df_weather['solar_azimuth [deg]'] = solar_position['zenith'], solar_position['azimuth']
+
+    # calculate solar irradiance on vertical planes
+    tilt_angle = 90 # [deg] vertical
+    for orientation in facade_orientations:
+        irrad_facade = utilities.calc_irradiance_on_tilted_plane(df_weather, tilt_angle, orientation)
+        df_weather[f'G(v,{orientation}deg) [W/(m^2)'] = irrad_facade
+
+    # calculate ground temperature dependent on ambient temperature
+    df_weather['T_ground [degC]'] = 4.918 * np.tanh(0.095 * (df_weather['T_amb [degC]'] - 10.545)) + 8.261 # [degC]
+
+    df_weather.reset_index(inplace = True)
+    # print(df_weather.head())
+
+    return df_weather
+
+
+class TMYRequestHandler(BaseHTTPRequestHandler):
+    ''' Answers GET /api/tmy?lat=..&lon=.. with the nearest TMY file of the repository of the server '''
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        try:
+            latitude, longitude = float(query['lat'][0]), float(query['lon'][0])
+        except (KeyError, ValueError):
+            return self.send_error(400, 'lat and lon required')
+        if url.path != '/api/tmy':
+            return self.send_error(404)
+        site = self.server.repository.nearest(latitude, longitude, self.server.tolerance)
+        if site is None:
+            return self.send_error(404, f'No weather data within {self.server.tolerance} km')
+        content = Path(site[0]).read_bytes()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass # no request log
+
+class PVGISStandIn(ThreadingHTTPServer):
+    ''' Local stand-in of the PVGIS tmy API, serves the TMY files of a repository (offline use, tests).
+    usage:
+        with weather.PVGISStandIn(weather.WeatherRepository('data/weather')) as server:
+            utilities.PVGIS_TMY_URL = server.url
+    '''
+    daemon_threads = True
+
+    def __init__(self, repository, host = '127.0.0.1', port = 0, tolerance = TOLERANCE):
+        super().__init__((host, port), TMYRequestHandler)
+        self.repository = repository
+        self.tolerance = tolerance
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/tmy"
+
+    def start(self):
+        ''' Serve in a background thread '''
+        self.thread = threading.Thread(target = self.serve_forever, daemon = True)
+        self.thread.start()
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = 'Local weather data repository.')
+    parser.add_argument('--directory', default = WEATHER_DIR)
+    commands = parser.add_subparsers(dest = 'command', required = True)
+    import_parser = commands.add_parser('import', help = 'copy PVGIS TMY files (.json) into the repository')
+    import_parser.add_argument('files', nargs = '+')
+    import_parser.add_argument('--offsets', type = int, nargs = '+', default = [0], help = 'orientation offsets [deg] of the derived weather data')
+    nearest_parser = commands.add_parser('nearest', help = 'nearest weather data of a location')
+    nearest_parser.add_argument('latitude', type = float)
+    nearest_parser.add_argument('longitude', type = float)
+    nearest_parser.add_argument('--tolerance', type = float, default = TOLERANCE, help = '[km]')
+    serve_parser = commands.add_parser('serve', help = 'serve the repository like the PVGIS tmy API')
+    serve_parser.add_argument('--port', type = int, default = 8080)
+    args = parser.parse_args()
+
+    my_repository = WeatherRepository(args.directory)
+    if args.command == 'import':
+        for path in my_repository.import_files(args.files, args.offsets):
+            print(f"Imported {path}")
+    elif args.command == 'nearest':
+        site = my_repository.nearest(args.latitude, args.longitude, args.tolerance)
+        print(f"{site[0]} ({site[3]:.1f} km)" if site else f"No weather data within {args.tolerance} km")
+    elif args.command == 'serve':
+        server = PVGISStandIn(my_repository, port = args.port)
+        print(f"Serving {len(my_repository)} TMY files at {server.url}")
+        server.serve_forever()